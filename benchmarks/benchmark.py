@@ -0,0 +1,290 @@
+# *** Benchmarks for the hot paths ***
+# Reproducible timings for the operations the scripts spend their time in:
+#   toy_curve      `add_points` / `double` on y^2 = x^3 + 3 (mod 11)
+#                  affine:   the tutorial's helpers from `03_EC_Point_Addition.py` (copied in `affine_reference.py`)
+#                  jacobian: their replacement in `module1/.../ec_jacobian.py` (Jacobian coordinates, normalized
+#                            back to affine on every call), a different implementation with the same results
+#   bn128          `add` / `multiply` / `pairing`, `py_ecc.bn128` next to `py_ecc.optimized_bn128` (the comment in
+#                  `08_associative_and_inverse.py` says the optimized version "runs much quicker": this measures it)
+#   lagrange_poly  `galois.lagrange_poly` over n = 4, 8, ..., 64 points
+#   pipeline       R1CS -> QAP -> h(x) for a chain of n = 2^4, ..., 2^14 multiplication constraints
+#                  dense: `example.py` over the BN128 scalar field (`qap.r1cs_to_qap`, a @ U, (uv - w) // t),
+#                  O(n^3), so only up to --max-dense
+#                  ntt:   `sparse_r1cs.py` + `ntt.py` (Lw, Rw, Ow, then h(x) with NTTs over the roots of unity)
+#
+# Every benchmark runs its function `number` times per repeat, with `number` chosen so that a repeat takes at least
+# --min-time seconds, and reports the best and the median time per call over the repeats. Random inputs come from a
+# fixed seed, so two runs time the same work.
+#
+# Results are written as JSON (`{"meta": {...}, "results": {name: {"best": s, "median": s, ...}}}`). With --compare,
+# the best times are compared with an earlier results file, and every benchmark that got slower by more than
+# --threshold (default 20%) is flagged as a regression. Benchmarks that are only in the old file are reported as
+# removed, and count as a failure too, so a regression can't disappear with its benchmark; benchmarks that are only
+# in the new file are listed as added. The exit status is 1 if there is a regression or a removed benchmark.
+# With --filter, only the matching names of both runs are compared.
+#
+# Usage (from the repository root):
+#   python benchmarks/benchmark.py --output baseline.json             # everything
+#   python benchmarks/benchmark.py --quick --filter pipeline/ntt      # one repeat, only matching names
+#   python benchmarks/benchmark.py --compare baseline.json --output new.json   # --output is optional here
+#   python benchmarks/benchmark.py --compare baseline.json new.json   # compare two files, no benchmarking
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+
+import galois
+import numpy as np
+import py_ecc
+from py_ecc import bn128, optimized_bn128
+from py_ecc.bn128 import curve_order
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(here, "..", "module1", "09-elliptic-curves-over-finite-fields"))
+sys.path.append(os.path.join(here, "..", "module2", "07-R1CS-to-QAP-FF"))
+import affine_reference
+import ec_jacobian
+import qap
+from ntt import Domain
+from sparse_r1cs import SparseR1CS
+
+SEED = 0
+DEFAULT_THRESHOLD = 0.2
+
+
+# *** Timing ***
+def measure(fn, repeat=5, min_time=0.1):
+    start = time.perf_counter()
+    fn()
+    first = time.perf_counter() - start
+    number = max(1, int(min_time / first)) if first > 0 else 1000
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        times.append((time.perf_counter() - start) / number)
+    return {"best": min(times), "median": statistics.median(times), "repeat": repeat, "number": number}
+
+
+# *** Benchmarks ***
+# Each `*_benchmarks` function returns [(name, fn)]; the inputs are built before timing.
+def toy_curve_benchmarks():
+    return [
+        ("toy_curve/affine/add_points", lambda: affine_reference.add_points(7, 7, 8, 8, 11)),
+        ("toy_curve/affine/double", lambda: affine_reference.double(8, 3, 0, 11)),
+        ("toy_curve/jacobian/add_points", lambda: ec_jacobian.add_points(7, 7, 8, 8, 11)),
+        ("toy_curve/jacobian/double", lambda: ec_jacobian.double(8, 3, 0, 11)),
+    ]
+
+
+def bn128_benchmarks():
+    rng = random.Random(SEED)
+    k = rng.randrange(curve_order)
+    P = bn128.multiply(bn128.G1, rng.randrange(curve_order))
+    Q = bn128.multiply(bn128.G2, rng.randrange(curve_order))
+    P_opt = optimized_bn128.multiply(optimized_bn128.G1, rng.randrange(curve_order))
+    Q_opt = optimized_bn128.multiply(optimized_bn128.G2, rng.randrange(curve_order))
+    return [
+        ("bn128/add_g1", lambda: bn128.add(P, bn128.G1)),
+        ("bn128/multiply_g1", lambda: bn128.multiply(P, k)),
+        ("bn128/multiply_g2", lambda: bn128.multiply(Q, k)),
+        ("bn128/pairing", lambda: bn128.pairing(Q, P)),
+        ("optimized_bn128/add_g1", lambda: optimized_bn128.add(P_opt, optimized_bn128.G1)),
+        ("optimized_bn128/multiply_g1", lambda: optimized_bn128.multiply(P_opt, k)),
+        ("optimized_bn128/multiply_g2", lambda: optimized_bn128.multiply(Q_opt, k)),
+        ("optimized_bn128/pairing", lambda: optimized_bn128.pairing(Q_opt, P_opt)),
+    ]
+
+
+def lagrange_poly_benchmarks(sizes=(4, 8, 16, 32, 64)):
+    GF = galois.GF(3221225473)
+    result = []
+    for n in sizes:
+        xs = GF(np.arange(1, n + 1))
+        ys = GF.Random(n, seed=SEED)
+        result.append((f"lagrange_poly/n={n}", lambda xs=xs, ys=ys: galois.lagrange_poly(xs, ys)))
+    return result
+
+
+# Constraint i: a[k_i] * a[i + 1] = a[i + 2], k_i in {0, 1}. Returns the (L, R, O) entries and a witness.
+def chain_circuit(n):
+    rng = np.random.default_rng(SEED)
+    k = rng.integers(0, 2, size=n)
+    witness = [1, 3]
+    for i in range(n):
+        witness.append(witness[k[i]] * witness[i + 1] % curve_order)
+    rows = np.arange(n)
+    entries = ((rows, k, np.ones(n, dtype=np.int64)),
+               (rows, rows + 1, np.ones(n, dtype=np.int64)),
+               (rows, rows + 2, np.ones(n, dtype=np.int64)))
+    return entries, witness
+
+
+def _dense(entries, shape):
+    M = np.zeros(shape, dtype=np.int64)
+    rows, cols, values = entries
+    M[rows, cols] = values
+    return M
+
+
+def pipeline_benchmarks(log_sizes=range(4, 15), max_dense=2**7):
+    GF = galois.GF(curve_order, primitive_element=5, verify=False)
+    result = []
+    for log_n in log_sizes:
+        n = 2**log_n
+        entries, witness = chain_circuit(n)
+        shape = (n, n + 2)
+
+        # `example.py`, vectorized with `qap.py`; the basis cache is cleared so every call pays for it
+        if n <= max_dense:
+            L, R, O = (_dense(e, shape) for e in entries)
+
+            def dense(L=L, R=R, O=O, witness=witness, n=n):
+                qap._basis_cache.clear()
+                U, V, W = qap.r1cs_to_qap(L, R, O, GF)
+                a = qap.to_field(witness, GF)
+                u, v, w = (galois.Poly(a @ M) for M in (U, V, W))
+                h, remainder = divmod(u * v - w, qap.vanishing_polynomial(GF, n))
+                assert remainder == 0
+                return h
+
+            result.append((f"pipeline/dense/n=2^{log_n}", dense))
+
+        def sparse_ntt(entries=entries, witness=witness, n=n):
+            r1cs = SparseR1CS.from_coo(n, n + 2, *entries, curve_order)
+            Lw, Rw, Ow = r1cs.witness_products(witness)
+            return Domain.for_constraints(n).compute_h(Lw, Rw, Ow)
+
+        result.append((f"pipeline/ntt/n=2^{log_n}", sparse_ntt))
+    return result
+
+
+def all_benchmarks(max_dense=2**7):
+    return (toy_curve_benchmarks() + bn128_benchmarks() + lagrange_poly_benchmarks() +
+            pipeline_benchmarks(max_dense=max_dense))
+
+
+# Progress goes to stderr, so the JSON on stdout stays parseable
+def run(benchmarks, repeat=5, min_time=0.1, log=lambda line: print(line, file=sys.stderr)):
+    results = {}
+    for name, fn in benchmarks:
+        results[name] = measure(fn, repeat, min_time)
+        log(f"{name:40s} {_format(results[name]['best'])}")
+    return results
+
+
+def metadata():
+    return {
+        "time": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": np.__version__,
+        "galois": galois.__version__,
+        "py_ecc": getattr(py_ecc, "__version__", "unknown"),
+    }
+
+
+# *** Comparison ***
+# {name: (old best, new best, new / old, status)} for every benchmark in either run. status is "regression" (slower by
+# more than the threshold), "improvement" (faster by more than the threshold) or "ok" for benchmarks in both runs,
+# "removed" (new best and ratio are None) for benchmarks only in the old run, and "added" (old best and ratio are None)
+# for benchmarks only in the new run.
+FAILURES = ("regression", "removed")
+
+
+def compare(old, new, threshold=DEFAULT_THRESHOLD):
+    result = {}
+    for name in new["results"]:
+        if name not in old["results"]:
+            result[name] = (None, new["results"][name]["best"], None, "added")
+            continue
+        before, after = old["results"][name]["best"], new["results"][name]["best"]
+        ratio = after / before
+        if ratio > 1 + threshold:
+            status = "regression"
+        elif ratio < 1 / (1 + threshold):
+            status = "improvement"
+        else:
+            status = "ok"
+        result[name] = (before, after, ratio, status)
+    for name in old["results"]:
+        if name not in new["results"]:
+            result[name] = (old["results"][name]["best"], None, None, "removed")
+    return result
+
+
+# The same results file, with only the benchmarks whose name contains `pattern`
+def _select(results, pattern):
+    return {**results, "results": {name: r for name, r in results["results"].items() if pattern in name}}
+
+
+def _format(seconds):
+    for unit, scale in (("s", 1), ("ms", 1e-3), ("us", 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:8.2f} {unit}"
+    return f"{seconds / 1e-9:8.2f} ns"
+
+
+def report(comparison):
+    lines = []
+    for name, (before, after, ratio, status) in comparison.items():
+        if status == "removed":
+            lines.append(f"{name:40s} {_format(before)} -> {'missing':>11}  <-- REMOVED")
+        elif status == "added":
+            lines.append(f"{name:40s} {'new':>11} -> {_format(after)}  (added)")
+        else:
+            flag = {"regression": "  <-- REGRESSION", "improvement": "  (faster)"}.get(status, "")
+            lines.append(f"{name:40s} {_format(before)} -> {_format(after)}  x{ratio:5.2f}{flag}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks for the curve, pairing, interpolation and QAP hot paths")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", nargs="+", metavar="FILE",
+                        help="OLD [NEW]: compare against OLD, with NEW or with a fresh run")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="relative slowdown that counts as a regression (default 0.2)")
+    parser.add_argument("--filter", default="", help="only run (and compare) benchmarks whose name contains this")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--min-time", type=float, default=0.1, help="minimum seconds per repeat")
+    parser.add_argument("--quick", action="store_true", help="one repeat, no minimum time")
+    parser.add_argument("--max-dense", type=int, default=2**7, help="largest n for the dense pipeline")
+    args = parser.parse_args(argv)
+
+    if args.compare and len(args.compare) > 2:
+        parser.error("--compare takes OLD or OLD NEW")
+
+    if args.compare and len(args.compare) == 2:
+        with open(args.compare[1]) as f:
+            new = json.load(f)
+    else:
+        repeat, min_time = (1, 0.0) if args.quick else (args.repeat, args.min_time)
+        benchmarks = [(name, fn) for name, fn in all_benchmarks(args.max_dense) if args.filter in name]
+        new = {"meta": metadata(), "results": run(benchmarks, repeat, min_time)}
+        new["meta"].update(repeat=repeat, min_time=min_time)
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(new, f, indent=2)
+        elif not args.compare:
+            print(json.dumps(new, indent=2))
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            old = json.load(f)
+        old, new = (_select(results, args.filter) for results in (old, new))
+        comparison = compare(old, new, args.threshold)
+        print(report(comparison))
+        if any(status in FAILURES for *_, status in comparison.values()):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
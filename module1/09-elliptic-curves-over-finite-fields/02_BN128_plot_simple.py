@@ -1,6 +1,8 @@
 import libnum
 import matplotlib.pyplot as plt
 
+from point_enumeration import enumerate_curve_points
+
 # for the curve: y^2 = x^3 + 3 (mod 11)
 
 def generate_points(mod):
@@ -20,7 +22,10 @@ def generate_points(mod):
     return xs, ys
 
 
-xs, ys = generate_points(11)
+# `enumerate_curve_points` finds the same points as `generate_points`, using a vectorized Euler's criterion and
+# Tonelli-Shanks over every x at once, so it stays fast for moduli in the 10^5 - 10^6 range.
+xs, ys = enumerate_curve_points(11)
+assert sorted(zip(*generate_points(11))) == list(zip(xs.tolist(), ys.tolist()))
 fig, (ax1) = plt.subplots(1, 1);
 fig.suptitle('y^2 = x^3 + 3 (mod p)');
 fig.set_size_inches(6, 6);
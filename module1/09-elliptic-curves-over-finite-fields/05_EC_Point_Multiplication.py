@@ -37,13 +37,16 @@ import matplotlib.pyplot as plt
 from py_ecc.bn128 import G1, multiply, neg
 import math
 import numpy as np
-xs = []
-ys = []
-for i in range(1,1000):
-    xs.append(i)
-    ys.append(int(multiply(G1, i)[1]))
-    xs.append(i)
-    ys.append(int(neg(multiply(G1, i))[1]))
+from point_enumeration import bn128_scatter_points
+# The straightforward version computes every point from scratch with double-and-add, twice:
+# for i in range(1,1000):
+#     xs.append(i)
+#     ys.append(int(multiply(G1, i)[1]))
+#     xs.append(i)
+#     ys.append(int(neg(multiply(G1, i))[1]))
+# `bn128_scatter_points` walks P_{i+1} = P_i + G1 instead, and converts all the points to affine with one
+# batched inverse. The y value of -P is just field_modulus - y (see `point_enumeration.py`).
+xs, ys = bn128_scatter_points(999)
 plt.scatter(xs, ys, marker='.')
 plt.show()
 
@@ -19,3 +19,8 @@ one_half = pow(2, -1, curve_order) # (1/2) mod curve_order
 # Now the assertion passes: (5/2)G + (1/2)G == (3)G
 assert eq(add(multiply(G1, five_over_two), multiply(G1, one_half)), multiply(G1, 3))
 
+
+# *** Encoding many rationals at once ***
+# Each `pow(b, -1, curve_order)` above is a separate modular inverse. To encode a whole vector of rationals with a
+# single inverse in total (Montgomery's trick), see `encode_rationals` in `batch_inversion.py`; its `__main__` runs this
+# same (5/2)G + (1/2)G == (3)G example.
@@ -0,0 +1,98 @@
+# *** Montgomery batch inversion ***
+# A modular inverse `pow(x, -1, p)` costs far more than a modular multiplication. When we need the inverses of many
+# field elements at once (encoding a vector of rationals as in `07_encoding_Q.py`, or normalizing many Jacobian
+# points), we can trade n inverses for ONE inverse and 3(n - 1) multiplications:
+#
+#   prefix products:   c_1 = a_1, c_2 = a_1 a_2, ..., c_n = a_1 a_2 ... a_n      (n - 1 multiplications)
+#   one inverse:       inv = c_n^(-1)
+#   walk back:         a_n^(-1) = inv * c_{n-1},  then inv <- inv * a_n = c_{n-1}^(-1), and so on
+#                                                                               (2(n - 1) multiplications)
+#
+# Usage:
+#   from batch_inversion import batch_inverse, encode_rationals
+#   batch_inverse([2, 3, 4], 11)                          # [6, 4, 3]
+#   batch_inverse(np.array([2, 3, 4]), 11)                # array([6, 4, 3])
+#   encode_rationals([5, 1], [2, 2], curve_order)          # [5/2, 1/2] as field elements
+import numpy as np
+
+
+def batch_inverse(values, modulus):
+    is_array = isinstance(values, np.ndarray)
+    items = [int(v) % modulus for v in (values.ravel() if is_array else values)]
+    n = len(items)
+    if n == 0:
+        return values.copy() if is_array else []
+
+    prefix = [0] * n
+    acc = 1
+    for i, v in enumerate(items):
+        if v == 0:
+            raise ZeroDivisionError(f"element at index {i} is 0 (mod {modulus}) and has no inverse")
+        prefix[i] = acc
+        acc = (acc * v) % modulus
+
+    inv = pow(acc, -1, modulus)
+    result = [0] * n
+    for i in range(n - 1, -1, -1):
+        result[i] = (inv * prefix[i]) % modulus
+        inv = (inv * items[i]) % modulus
+
+    if is_array:
+        # Inverses are reduced mod p, so they need int64 (not the input dtype, e.g. int8) when p fits in one, and
+        # Python ints (dtype=object) otherwise
+        dtype = np.int64 if modulus <= np.iinfo(np.int64).max else object
+        result = np.array(result, dtype=dtype).reshape(values.shape)
+        if type(values) is not np.ndarray:
+            result = type(values)(result)       # e.g. a galois FieldArray comes back in the same field
+    return result
+
+
+# Encodes numerators[i] / denominators[i] as field elements, i.e. n * d^(-1) (mod modulus), with one inverse in total.
+def encode_rationals(numerators, denominators, modulus):
+    if len(numerators) != len(denominators):
+        raise ValueError("numerators and denominators must have the same length")
+    inverses = batch_inverse(list(denominators), modulus)
+    return [(int(n) * d_inv) % modulus for n, d_inv in zip(numerators, inverses)]
+
+
+if __name__ == "__main__":
+    import random
+    import time
+    import galois
+    from py_ecc.bn128 import curve_order, G1, add, multiply, eq
+
+    assert batch_inverse([2, 3, 4], 11) == [6, 4, 3]
+    assert batch_inverse([], 11) == []
+    assert batch_inverse(np.array([2, 3, 4]), 11).tolist() == [6, 4, 3]
+    assert batch_inverse(np.array([[2, 3], [4, 5]]), 11).shape == (2, 2)
+    # Narrow input dtypes don't overflow, and field arrays stay field arrays
+    assert batch_inverse(np.array([2, 3], dtype=np.int8), 1009).tolist() == [505, 673]
+    GF = galois.GF(11)
+    inverses = batch_inverse(GF([2, 3, 4]), 11)
+    assert type(inverses) is GF and (inverses * GF([2, 3, 4]) == 1).all()
+    try:
+        batch_inverse([1, 0, 2], 11)
+        assert False
+    except ZeroDivisionError:
+        pass
+
+    # The example from `07_encoding_Q.py`: (5/2)G + (1/2)G == (3)G
+    five_over_two, one_half = encode_rationals([5, 1], [2, 2], curve_order)
+    assert five_over_two == (5 * pow(2, -1, curve_order)) % curve_order
+    assert eq(add(multiply(G1, five_over_two), multiply(G1, one_half)), multiply(G1, 3))
+
+    # Negative numerators work too: -1/3 + 1/3 == 0
+    minus_third, third = encode_rationals([-1, 1], [3, 3], curve_order)
+    assert (minus_third + third) % curve_order == 0
+
+    # *** Timing ***
+    n = 20000
+    values = [random.randrange(1, curve_order) for _ in range(n)]
+    start = time.perf_counter()
+    expected = [pow(v, -1, curve_order) for v in values]
+    pow_time = time.perf_counter() - start
+    start = time.perf_counter()
+    result = batch_inverse(values, curve_order)
+    batch_time = time.perf_counter() - start
+    assert result == expected
+    print(f"{n} inverses mod curve_order: pow(x, -1, p) {pow_time:.3f}s, batch {batch_time:.3f}s")
@@ -0,0 +1,147 @@
+# *** Batch verification of linear relations between commitments ***
+# `10_BN128_ZkEx1.py` proves knowledge of a solution to a linear system by publishing xG and yG, and the verifier
+# checks every equation on its own:
+#   7(xG) + 4(yG) == 75G
+#   2(xG) - 1(yG) == 0G
+# An instance is (commitments [C_1, ..., C_m], coefficient matrix A, right-hand side b), and it holds if
+#   sum_j A[i][j] C_j - b_i G == O      for every row i
+#
+# To verify many instances at once, multiply every row of every instance by a random weight rho and add everything up:
+#   sum_t sum_i rho_(t,i) (sum_j A_t[i][j] C_(t,j) - b_(t,i) G)
+#     = sum_t sum_j (sum_i rho_(t,i) A_t[i][j]) C_(t,j) - (sum_t sum_i rho_(t,i) b_(t,i)) G == O
+# That is ONE multi-scalar multiplication over all the commitments plus G (`bucket_msm.py`), and
+# all the coefficient work is done on scalars. If any single row is false, the sum is O only if the random weights
+# happen to cancel it out, which has probability 2^-128 with 128-bit weights.
+#
+# When the batch is rejected, it is split in half and each half is checked again with fresh weights, down to the
+# failing instances, so the cost of finding them only has to be paid when something is wrong.
+#
+# Usage:
+#   from batch_verify import batch_verify, find_failures
+#   instances = [([commitment_x, commitment_y], [[7, 4], [2, -1]], [75, 0]), ...]
+#   batch_verify(instances)     # True if every equation of every instance holds
+#   find_failures(instances)    # indices of the instances that don't hold
+import secrets
+
+from py_ecc import optimized_bn128
+from py_ecc.bn128 import G1, curve_order
+
+from bucket_msm import msm_projective
+from fixed_base import to_optimized
+
+WEIGHT_BITS = 128
+
+
+# Every row needs one coefficient per commitment and one right-hand side; `zip` would silently drop the rest.
+def _check_shape(instance, t=0):
+    commitments, matrix, rhs = instance
+    if len(matrix) != len(rhs):
+        raise ValueError(f"instance {t}: {len(matrix)} rows but {len(rhs)} right-hand sides")
+    for i, row in enumerate(matrix):
+        if len(row) != len(commitments):
+            raise ValueError(f"instance {t}: row {i} has {len(row)} coefficients but there are "
+                             f"{len(commitments)} commitments")
+
+
+# The naive check, one equation at a time as in `10_BN128_ZkEx1.py`
+def verify_instance(instance):
+    _check_shape(instance)
+    commitments, matrix, rhs = instance
+    for row, b in zip(matrix, rhs):
+        lhs = optimized_bn128.Z1
+        for a, C in zip(row, commitments):
+            lhs = optimized_bn128.add(lhs, optimized_bn128.multiply(to_optimized(C), a % curve_order))
+        if not optimized_bn128.eq(lhs, optimized_bn128.multiply(optimized_bn128.G1, b % curve_order)):
+            return False
+    return True
+
+
+def _check(instances, indices):
+    points = []
+    scalars = []
+    g_scalar = 0
+    for t in indices:
+        _check_shape(instances[t], t)
+        commitments, matrix, rhs = instances[t]
+        weights = [secrets.randbits(WEIGHT_BITS) for _ in rhs]
+        for j, C in enumerate(commitments):
+            points.append(to_optimized(C))
+            scalars.append(sum(w * row[j] for w, row in zip(weights, matrix)) % curve_order)
+        g_scalar += sum(w * b for w, b in zip(weights, rhs))
+    points.append(to_optimized(G1))
+    scalars.append(-g_scalar % curve_order)
+    return optimized_bn128.is_inf(msm_projective(points, scalars, optimized_bn128.Z1))
+
+
+def batch_verify(instances):
+    return _check(instances, range(len(instances)))
+
+
+def _bisect(instances, indices, failures):
+    if not indices or _check(instances, indices):
+        return
+    if len(indices) == 1:
+        failures.append(indices[0])
+        return
+    mid = len(indices) // 2
+    _bisect(instances, indices[:mid], failures)
+    _bisect(instances, indices[mid:], failures)
+
+
+def find_failures(instances):
+    failures = []
+    _bisect(instances, list(range(len(instances))), failures)
+    return failures
+
+
+if __name__ == "__main__":
+    import random
+    import time
+    from py_ecc.bn128 import multiply
+
+    # `10_BN128_ZkEx1.py`: 7x + 4y = 75, 2x - y = 0 and `11_BN128_zKEx2.py`: 23x = 161
+    commitment_x = multiply(G1, 5)
+    commitment_y = multiply(G1, 10)
+    ex1 = ([commitment_x, commitment_y], [[7, 4], [2, -1]], [75, 0])
+    ex2 = ([multiply(G1, 7)], [[23]], [161])
+    assert verify_instance(ex1) and verify_instance(ex2)
+    assert batch_verify([ex1, ex2])
+    assert not batch_verify([ex1, ([commitment_x, commitment_y], [[7, 4]], [76])])
+
+    # *** Many random instances: a 3 x 3 system each ***
+    def random_instance():
+        xs = [random.randrange(curve_order) for _ in range(3)]
+        matrix = [[random.randrange(-100, 100) for _ in range(3)] for _ in range(3)]
+        rhs = [sum(a * x for a, x in zip(row, xs)) % curve_order for row in matrix]
+        return [multiply(G1, x) for x in xs], matrix, rhs
+
+    n = 100
+    instances = [random_instance() for _ in range(n)]
+
+    start = time.perf_counter()
+    assert all(verify_instance(instance) for instance in instances)
+    naive_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    assert batch_verify(instances)
+    batch_time = time.perf_counter() - start
+    print(f"{n} instances of 3 equations: one at a time {naive_time:.3f}s, batched {batch_time:.3f}s")
+
+    # Break two instances: only those are reported
+    commitments, matrix, rhs = instances[37]
+    instances[37] = (commitments, matrix, [rhs[0], rhs[1] + 1, rhs[2]])
+    commitments, matrix, rhs = instances[80]
+    instances[80] = ([commitments[1], commitments[0], commitments[2]], matrix, rhs)
+    assert not batch_verify(instances)
+    start = time.perf_counter()
+    assert find_failures(instances) == [37, 80]
+    print(f"found the 2 bad instances in {time.perf_counter() - start:.3f}s")
+
+    # A row with a missing coefficient is rejected, not truncated
+    short_row = ([commitment_x, commitment_y], [[7, 4], [2]], [75, 0])
+    for check in (verify_instance, lambda instance: batch_verify([ex1, instance])):
+        try:
+            check(short_row)
+            assert False, "short row accepted"
+        except ValueError as e:
+            print(e)
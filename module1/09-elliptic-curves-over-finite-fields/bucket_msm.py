@@ -0,0 +1,55 @@
+# *** Bucket-method multi-scalar multiplication on projective points ***
+# c_0 P_0 + c_1 P_1 + ... + c_n P_n with the doublings shared between all the points (Pippenger's bucket method), on
+# `py_ecc.optimized_bn128` projective points. The derivation and the `bn128`-point front end `msm` are in
+# `module2/08-Trusted-Setup/msm.py`; this is the core, kept here so that module1 helpers such as `batch_verify.py`
+# can use it without reaching into module2.
+#
+# Usage:
+#   from bucket_msm import msm_projective
+#   msm_projective([P, Q], [3, 5], optimized_bn128.Z1)     # 3P + 5Q, projective
+from py_ecc import optimized_bn128
+from py_ecc.bn128 import curve_order
+
+
+# A window of roughly log2(n) bits balances the n additions into buckets against the 2^c additions to sum them.
+def default_window(n):
+    if n < 4:
+        return 1
+    return max(1, min(16, n.bit_length() - 2))
+
+
+# The core of the bucket method on projective points. `zero` is the projective point at infinity of the group.
+def msm_projective(points, scalars, zero, window=None):
+    pairs = [(pt, s % curve_order) for pt, s in zip(points, scalars)]
+    pairs = [(pt, s) for pt, s in pairs if s != 0 and not optimized_bn128.is_inf(pt)]
+    if not pairs:
+        return zero
+    c = window if window is not None else default_window(len(pairs))
+    mask = (1 << c) - 1
+    max_bits = max(s for _, s in pairs).bit_length()
+    num_windows = -(-max_bits // c)
+
+    result = zero
+    for w in range(num_windows - 1, -1, -1):
+        # result * 2^c
+        if not optimized_bn128.is_inf(result):
+            for _ in range(c):
+                result = optimized_bn128.double(result)
+
+        shift = w * c
+        buckets = [None] * (mask + 1)
+        for pt, s in pairs:
+            digit = (s >> shift) & mask
+            if digit:
+                buckets[digit] = pt if buckets[digit] is None else optimized_bn128.add(buckets[digit], pt)
+
+        # running = B_top + ... + B_d, window_sum = sum of all running values = sum d * B_d
+        running = zero
+        window_sum = zero
+        for digit in range(mask, 0, -1):
+            if buckets[digit] is not None:
+                running = optimized_bn128.add(running, buckets[digit])
+            window_sum = optimized_bn128.add(window_sum, running)
+
+        result = optimized_bn128.add(result, window_sum)
+    return result
@@ -0,0 +1,243 @@
+# *** Counting and timing py_ecc operations ***
+# The scripts call `add`, `multiply`, `neg`, `pairing`, ... from `py_ecc.bn128` (and `py_ecc.optimized_bn128`)
+# directly. To see where the time of a slow run goes, `install()` replaces those functions in the py_ecc modules with
+# thin wrappers. While a `profile()` is active, every call is counted and timed, per stage, per group and per op:
+#   G1 / G2   add, double, multiply, neg, eq           (the group is read off the coordinates: FQ -> G1, FQ2 -> G2)
+#   GT        pairing, miller_loop, final_exponentiate, and mul / pow / div / inv on FQ12 values
+# Only the outermost call is recorded: the ~380 additions and doublings inside one `multiply`, or the FQ12 products
+# inside one `pairing`, are part of that call's time, not extra counts.
+#
+# Overhead: nothing is patched until `install()` (or the first `profile()`), so code that never profiles runs the
+# original py_ecc functions. Once installed, a wrapper outside of a profile is one extra Python call and a global check,
+# about 0.2us: ~1% of an optimized_bn128 `add`, nothing next to a `multiply` or a `pairing`. `profile()` uninstalls
+# again on exit if it was the one installing.
+#
+# `from py_ecc.bn128 import add` copies the function at import time, so to profile a script that does that, install
+# first: `python ec_profile.py script.py [args]` installs, runs the script under a profile and prints the report.
+# Counts are kept by the process that makes the calls; work sent to a process pool is not seen.
+#
+# Usage:
+#   from ec_profile import profile, stage
+#   with profile() as prof:
+#       with stage("commit"):
+#           ...                          # py_ecc calls here are recorded under "commit"
+#   print(prof.report())
+#   prof.dump("profile.json")           # {stage: {group: {op: {"count": n, "seconds": s}}}}
+#
+#   python ec_profile.py 10_BN128_ZkEx1.py
+import json
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+
+from py_ecc import bn128, optimized_bn128
+from py_ecc.bn128 import bn128_pairing
+from py_ecc.optimized_bn128 import optimized_pairing
+
+POINT_OPS = ("add", "double", "multiply", "neg", "eq")
+PAIRING_OPS = ("pairing", "final_exponentiate")
+GT_METHODS = {"__mul__": "mul", "__pow__": "pow", "__truediv__": "div", "inv": "inv"}
+DEFAULT_STAGE = "main"
+
+_active = None      # the Profile being recorded into, if any
+_depth = 0          # > 0 while inside a recorded call
+_originals = []     # (owner, attribute, original value or None if inherited) for uninstall()
+
+
+class Profile:
+    def __init__(self):
+        self.counts = defaultdict(int)
+        self.seconds = defaultdict(float)
+        self.stage_name = DEFAULT_STAGE
+
+    def record(self, group, op, seconds):
+        key = (self.stage_name, group, op)
+        self.counts[key] += 1
+        self.seconds[key] += seconds
+
+    # Nested stages are recorded as "outer/inner"
+    @contextmanager
+    def stage(self, name):
+        previous = self.stage_name
+        self.stage_name = name if previous == DEFAULT_STAGE else f"{previous}/{name}"
+        try:
+            yield self
+        finally:
+            self.stage_name = previous
+
+    def total(self, group=None, op=None):
+        keys = [k for k in self.counts if (group is None or k[1] == group) and (op is None or k[2] == op)]
+        return sum(self.counts[k] for k in keys), sum(self.seconds[k] for k in keys)
+
+    def as_dict(self):
+        result = {}
+        for (stage_name, group, op), count in self.counts.items():
+            ops = result.setdefault(stage_name, {}).setdefault(group, {})
+            ops[op] = {"count": count, "seconds": self.seconds[(stage_name, group, op)]}
+        return result
+
+    def dump(self, path):
+        with open(path, "w") as f:
+            json.dump(self.as_dict(), f, indent=2)
+
+    def report(self):
+        lines = [f"{'stage':>20} {'group':>5} {'op':>20} {'count':>8} {'seconds':>10}"]
+        for (stage_name, group, op) in sorted(self.counts, key=lambda k: -self.seconds[k]):
+            key = (stage_name, group, op)
+            lines.append(f"{stage_name:>20} {group:>5} {op:>20} {self.counts[key]:8d} {self.seconds[key]:10.4f}")
+        return "\n".join(lines)
+
+
+# G1 points have FQ coordinates, G2 points FQ2 coordinates; FQ12 points only show up inside the pairing.
+# Points at infinity (`None` in bn128) don't say which group they are in, so the other operand decides.
+def _group(args):
+    for value in args:
+        if isinstance(value, tuple) and value:
+            degree = getattr(type(value[0]), "degree", 1)
+            return {1: "G1", 2: "G2"}.get(degree, "GT")
+    return "inf"
+
+
+def _wrap(fn, op, group=None):
+    def wrapper(*args, **kwargs):
+        global _depth
+        if _active is None or _depth:
+            return fn(*args, **kwargs)
+        profile_ = _active
+        _depth += 1
+        start = time.perf_counter()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _depth -= 1
+            profile_.record(group or _group(args), op, time.perf_counter() - start)
+
+    wrapper.__name__ = getattr(fn, "__name__", op)
+    wrapper.__wrapped__ = fn
+    return wrapper
+
+
+def _patch(owner, attribute, replacement):
+    _originals.append((owner, attribute, owner.__dict__.get(attribute)))
+    setattr(owner, attribute, replacement)
+
+
+def installed():
+    return bool(_originals)
+
+
+def install():
+    if installed():
+        return
+    for module in (bn128, optimized_bn128):
+        for op in POINT_OPS:
+            _patch(module, op, _wrap(getattr(module, op), op))
+    # miller_loop is only exported by the pairing modules; one wrapper per function, shared by both names
+    for module, pairing_module in ((bn128, bn128_pairing), (optimized_bn128, optimized_pairing)):
+        for op in PAIRING_OPS:
+            wrapper = _wrap(getattr(module, op), op, "GT")
+            _patch(module, op, wrapper)
+            _patch(pairing_module, op, wrapper)
+        _patch(pairing_module, "miller_loop", _wrap(pairing_module.miller_loop, "miller_loop", "GT"))
+    for FQ12 in (bn128.FQ12, optimized_bn128.FQ12):
+        for method, op in GT_METHODS.items():
+            _patch(FQ12, method, _wrap(getattr(FQ12, method), op, "GT"))
+
+
+def uninstall():
+    while _originals:
+        owner, attribute, original = _originals.pop()
+        if original is None:
+            delattr(owner, attribute)     # was inherited from a base class
+        else:
+            setattr(owner, attribute, original)
+
+
+# Records every py_ecc call made inside the block into a new `Profile` (or `into`). Profiles don't nest: the inner
+# one records, the outer one resumes afterwards.
+@contextmanager
+def profile(into=None):
+    global _active
+    installing = not installed()
+    if installing:
+        install()
+    previous, _active = _active, into if into is not None else Profile()
+    try:
+        yield _active
+    finally:
+        _active = previous
+        if installing:
+            uninstall()
+
+
+# Labels the calls made inside the block with a stage name. Does nothing if no profile is active.
+@contextmanager
+def stage(name):
+    if _active is None:
+        yield None
+    else:
+        with _active.stage(name) as profile_:
+            yield profile_
+
+
+def run_script(path, argv=()):
+    import runpy
+    import sys
+
+    install()
+    sys.argv = [path] + list(argv)
+    with profile() as prof:
+        try:
+            runpy.run_path(path, run_name="__main__")
+        finally:
+            print(prof.report(), file=sys.stderr)
+    return prof
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) > 1:
+        run_script(sys.argv[1], sys.argv[2:])
+        sys.exit(0)
+
+    from py_ecc.bn128 import G1, G2
+
+    # Counts per group, and only the outermost call
+    with profile() as prof:
+        with stage("commit"):
+            P = bn128.multiply(G1, 5)
+            Q = bn128.add(P, G1)
+            bn128.neg(bn128.multiply(G2, 3))
+        with stage("verify"):
+            e = bn128.pairing(G2, P) * bn128.pairing(G2, Q)
+            assert bn128.eq(Q, bn128.multiply(G1, 6))
+    assert prof.total("G1", "multiply")[0] == 2 and prof.total("G1", "add")[0] == 1
+    assert prof.total("G2", "multiply")[0] == 1 and prof.total("G2", "neg")[0] == 1
+    assert prof.total("GT", "pairing")[0] == 2 and prof.total("GT", "mul")[0] == 1
+    assert prof.total(op="double") == (0, 0)       # inside multiply, not counted on their own
+    assert prof.as_dict()["verify"]["G1"]["eq"]["count"] == 1
+    assert not installed() and bn128.add.__name__ == "add" and not hasattr(bn128.add, "__wrapped__")
+    print(prof.report())
+
+    # optimized_bn128 and the miller_loop import used by `module2/01-bilinear-pairings/pairing_product.py`
+    with profile() as prof:
+        from py_ecc.optimized_bn128.optimized_pairing import miller_loop, twist, cast_point_to_fq12
+        f = miller_loop(twist(optimized_bn128.G2), cast_point_to_fq12(optimized_bn128.G1), final_exponentiate=False)
+        optimized_bn128.final_exponentiate(f)
+        optimized_bn128.multiply(optimized_bn128.G2, 7)
+    assert prof.total("GT", "miller_loop")[0] == 1 and prof.total("GT", "final_exponentiate")[0] == 1
+    assert prof.total("G2", "multiply")[0] == 1
+
+    # *** Overhead of an idle wrapper (installed, no profile) ***
+    import timeit
+    def noop(a, b):
+        return None
+
+    wrapped = _wrap(noop, "noop")
+    n = 200_000
+    overhead = (min(timeit.repeat(lambda: wrapped(1, 2), number=n, repeat=5)) -
+                min(timeit.repeat(lambda: noop(1, 2), number=n, repeat=5))) / n
+    add_time = min(timeit.repeat(lambda: optimized_bn128.add(optimized_bn128.G1, optimized_bn128.G1),
+                                 number=2000, repeat=5)) / 2000
+    print(f"idle wrapper: {overhead * 1e6:.2f}us per call, {100 * overhead / add_time:.1f}% of an optimized_bn128 add")
@@ -0,0 +1,158 @@
+# *** Fixed-base scalar multiplication for BN128 ***
+# Scripts like `05_EC_Point_Multiplication.py` and `09`/`10`/`11` call `multiply(G1, k)` over and over with the same
+# base point. Each call runs double-and-add from scratch: ~254 doublings and ~127 additions, each of which (in
+# `py_ecc.bn128`) pays for a modular inverse since the points are affine.
+#
+# When the base is fixed, the doublings can be done once and cached. Split k into w-bit digits:
+#   k = d_0 + d_1 * 2^w + d_2 * 2^(2w) + ...
+# and precompute, for every row i and every digit d, the point d * 2^(wi) * P. Then
+#   kP = table[0][d_0] + table[1][d_1] + table[2][d_2] + ...
+# which is ceil(254 / w) additions and no doublings at all.
+#
+# Internally the table and the additions use `py_ecc.optimized_bn128` (projective points, no inverse per addition),
+# and the result is normalized once and handed back as a regular `py_ecc.bn128` point, so it compares equal under
+# `eq` with the output of `multiply` and can be dropped into the existing scripts.
+#
+# Usage:
+#   from fixed_base import fixed_base_multiply
+#   fixed_base_multiply(G1, 5)           # same point as multiply(G1, 5)
+#   fixed_base_multiply(G2, 5)           # works for G2 as well
+#   fixed_base_multiply(P, 5, window=8)  # any base point; the table for (P, 8) is built once and cached
+from py_ecc import bn128
+from py_ecc import optimized_bn128
+from py_ecc.bn128 import curve_order
+
+DEFAULT_WINDOW = 4
+
+
+# *** Converting between `bn128` (affine) and `optimized_bn128` (projective) points ***
+# G1 coordinates are FQ elements, G2 coordinates are FQ2 elements (pairs of FQ). The point at infinity is `None`
+# in `bn128` and any point with z = 0 in `optimized_bn128`.
+def is_g2(pt):
+    return isinstance(pt[0], (bn128.FQ2, optimized_bn128.FQ2))
+
+
+def to_optimized(pt, g2=False):
+    if pt is None:
+        return optimized_bn128.Z2 if g2 else optimized_bn128.Z1
+    x, y = pt
+    if is_g2(pt):
+        return (optimized_bn128.FQ2(list(x.coeffs)), optimized_bn128.FQ2(list(y.coeffs)), optimized_bn128.FQ2.one())
+    return (optimized_bn128.FQ(x.n), optimized_bn128.FQ(y.n), optimized_bn128.FQ.one())
+
+
+def from_optimized(pt):
+    if optimized_bn128.is_inf(pt):
+        return None
+    x, y = optimized_bn128.normalize(pt)
+    if isinstance(x, optimized_bn128.FQ2):
+        return (bn128.FQ2([int(c) for c in x.coeffs]), bn128.FQ2([int(c) for c in y.coeffs]))
+    return (bn128.FQ(x.n), bn128.FQ(y.n))
+
+
+# A hashable key for a `bn128` point, so tables can be cached per base point.
+def point_key(pt):
+    if pt is None:
+        return None
+    if is_g2(pt):
+        return tuple(int(c) for c in pt[0].coeffs) + tuple(int(c) for c in pt[1].coeffs)
+    return (int(pt[0]), int(pt[1]))
+
+
+# *** The precomputed table ***
+# table[i][d] = d * 2^(w*i) * P for d in [0, 2^w). Building it costs about (254 / w) * 2^w projective additions.
+def build_table(pt, window=DEFAULT_WINDOW):
+    base = to_optimized(pt)
+    zero = optimized_bn128.Z2 if is_g2(pt) else optimized_bn128.Z1
+    rows = -(-curve_order.bit_length() // window)
+    table = []
+    for _ in range(rows):
+        row = [zero, base]
+        for _ in range(2, 1 << window):
+            row.append(optimized_bn128.add(row[-1], base))
+        table.append(row)
+        # base * 2^w for the next row: w doublings
+        for _ in range(window):
+            base = optimized_bn128.double(base)
+    return table
+
+
+_table_cache = {}
+
+
+def get_table(pt, window=DEFAULT_WINDOW):
+    key = (point_key(pt), window)
+    if key not in _table_cache:
+        _table_cache[key] = build_table(pt, window)
+    return _table_cache[key]
+
+
+def clear_cache():
+    _table_cache.clear()
+
+
+# Projective result, for callers that want to keep accumulating without normalizing.
+def fixed_base_multiply_projective(pt, k, window=DEFAULT_WINDOW):
+    table = get_table(pt, window)
+    k %= curve_order
+    mask = (1 << window) - 1
+    result = table[0][0]
+    i = 0
+    while k:
+        digit = k & mask
+        if digit:
+            result = optimized_bn128.add(result, table[i][digit])
+        k >>= window
+        i += 1
+    return result
+
+
+def fixed_base_multiply(pt, k, window=DEFAULT_WINDOW):
+    if pt is None:
+        return None
+    return from_optimized(fixed_base_multiply_projective(pt, k, window))
+
+
+if __name__ == "__main__":
+    import time
+    from py_ecc.bn128 import G1, G2, multiply, add, eq, neg
+
+    # Same results as `multiply` under `eq`
+    for k in [0, 1, 2, 15, 16, 75, 2 ** 200 + 7, curve_order - 1, curve_order, curve_order + 5]:
+        assert eq(fixed_base_multiply(G1, k), multiply(G1, k))
+    assert eq(fixed_base_multiply(G2, 12345), multiply(G2, 12345))
+    assert fixed_base_multiply(G1, curve_order) is None
+
+    # Any user-chosen base, with a different window size
+    P = multiply(G1, 987654321)
+    assert eq(fixed_base_multiply(P, 2 ** 100 + 3, window=6), multiply(P, 2 ** 100 + 3))
+
+    # The checks from `09_BN128_basicZkWithEC.py`, `10_BN128_ZkEx1.py` and `11_BN128_zKEx2.py`
+    assert eq(add(fixed_base_multiply(G1, 5), fixed_base_multiply(G1, 10)), multiply(G1, 15))
+    commitment_x = fixed_base_multiply(G1, 5)
+    commitment_y = fixed_base_multiply(G1, 10)
+    assert eq(add(multiply(commitment_x, 7), multiply(commitment_y, 4)), fixed_base_multiply(G1, 75))
+    assert eq(multiply(fixed_base_multiply(G1, 7), 23), fixed_base_multiply(G1, 161))
+    assert eq(neg(fixed_base_multiply(G1, 3)), multiply(G1, curve_order - 3))
+
+    # *** Timing ***
+    # The first 200 points of the loop in `05_EC_Point_Multiplication.py`, and 50 random-sized scalars
+    import random
+    scalars = list(range(1, 200)) + [random.randrange(curve_order) for _ in range(50)]
+
+    start = time.perf_counter()
+    expected = [multiply(G1, k) for k in scalars]
+    multiply_time = time.perf_counter() - start
+
+    clear_cache()
+    start = time.perf_counter()
+    get_table(G1)
+    table_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = [fixed_base_multiply(G1, k) for k in scalars]
+    fixed_time = time.perf_counter() - start
+
+    assert all(eq(a, b) for a, b in zip(expected, results))
+    print(f"{len(scalars)} multiplications: multiply {multiply_time:.3f}s, "
+          f"fixed base {fixed_time:.3f}s (+ {table_time:.3f}s to build the table once)")
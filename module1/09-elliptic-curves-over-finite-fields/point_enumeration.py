@@ -0,0 +1,183 @@
+# *** Batched point generation for the plotting scripts ***
+# `generate_points` in `02_BN128_plot_simple.py` and `04_EllipticCurvePoint_CyclicGroup.py` walks x over the whole
+# field and calls `libnum.has_sqrtmod_prime_power` + `libnum.sqrtmod_prime_power` for every single x. The 1000-point
+# loop in `05_EC_Point_Multiplication.py` calls `multiply(G1, i)` and `neg(multiply(G1, i))` for every i, so every
+# point costs a full double-and-add (and the point is computed twice).
+#
+# This module does the same work in bulk:
+#   1. `enumerate_curve_points` computes y^2 = x^3 + ax + b for every x at once with NumPy, uses Euler's criterion
+#      (n^((p-1)/2) == 1 iff n is a square) to find which x have points, and a vectorized Tonelli-Shanks to find
+#      the square roots. Meant for small moduli (< 2^31) so that products fit in int64.
+#   2. `bn128_multiples` walks G, 2G, 3G, ... with P_{i+1} = P_i + G in Jacobian coordinates (see `ec_jacobian.py`),
+#      where each step is a handful of multiplications and no inverse. All the points are then converted to affine
+#      together with Montgomery's trick (`batch_inversion.py`): one inverse for the whole batch instead of one per point.
+#
+# Usage:
+#   from point_enumeration import enumerate_curve_points, bn128_scatter_points
+#   xs, ys = enumerate_curve_points(11)        # same points as generate_points(11)
+#   xs, ys = bn128_scatter_points(999)         # same points as the loop in `05_EC_Point_Multiplication.py`
+import numpy as np
+from py_ecc.bn128 import G1, field_modulus
+
+from ec_jacobian import batch_from_jacobian, jacobian_add, to_jacobian
+
+MAX_VECTORIZED_MODULUS = 2**31
+
+
+def pow_mod(base, exponent, p):
+    base = np.asarray(base, dtype=np.int64) % p
+    result = np.ones_like(base)
+    while exponent > 0:
+        if exponent & 1:
+            result = (result * base) % p
+        base = (base * base) % p
+        exponent >>= 1
+    return result
+
+
+# Euler's criterion: for an odd prime p and n != 0 (mod p), n^((p-1)/2) is 1 if n is a square and p - 1 otherwise.
+def is_quadratic_residue(n, p):
+    n = np.asarray(n, dtype=np.int64) % p
+    if p == 2:
+        return np.ones(n.shape, dtype=bool)
+    return (n == 0) | (pow_mod(n, (p - 1) // 2, p) == 1)
+
+
+# *** Vectorized Tonelli-Shanks ***
+# Returns one square root r of each element (the other one is p - r). Every element must be a quadratic residue.
+# When p = 3 (mod 4) the root is simply n^((p+1)/4). Otherwise write p - 1 = Q * 2^S and run Tonelli-Shanks on the
+# whole array at once, masking out the elements that have already converged.
+def sqrt_mod_prime(n, p):
+    n = np.asarray(n, dtype=np.int64) % p
+    if p == 2:
+        return n.copy()
+    if p % 4 == 3:
+        return pow_mod(n, (p + 1) // 4, p)
+
+    Q, S = p - 1, 0
+    while Q % 2 == 0:
+        Q //= 2
+        S += 1
+    z = next(z for z in range(2, p) if pow(z, (p - 1) // 2, p) == p - 1)
+
+    M = np.full(n.shape, S, dtype=np.int64)
+    c = np.full(n.shape, pow(z, Q, p), dtype=np.int64)
+    t = pow_mod(n, Q, p)
+    R = pow_mod(n, (Q + 1) // 2, p)
+    active = (t != 1) & (n != 0)
+    while active.any():
+        # least i with t^(2^i) == 1
+        i = np.zeros_like(M)
+        found = ~active
+        tt = t.copy()
+        for k in range(1, S + 1):
+            tt = (tt * tt) % p
+            newly = ~found & (tt == 1)
+            i[newly] = k
+            found |= newly
+        # b = c^(2^(M - i - 1))
+        e = np.where(active, M - i - 1, 0)
+        b = c.copy()
+        for k in range(S):
+            b = np.where(e > k, (b * b) % p, b)
+        M = np.where(active, i, M)
+        c = np.where(active, (b * b) % p, c)
+        t = np.where(active, (t * c) % p, t)
+        R = np.where(active, (R * b) % p, R)
+        active &= t != 1
+    return R
+
+
+# All affine points of y^2 = x^3 + ax + b (mod p), sorted by x and then y. Same points as `generate_points`.
+def enumerate_curve_points(mod, a=0, b=3):
+    assert mod < MAX_VECTORIZED_MODULUS, "modulus too large for int64 arithmetic"
+    x = np.arange(mod, dtype=np.int64)
+    y_squared = (((x * x) % mod) * x % mod + (a % mod) * x % mod + b) % mod
+
+    has_root = is_quadratic_residue(y_squared, mod)
+    x = x[has_root]
+    y_squared = y_squared[has_root]
+    roots = sqrt_mod_prime(y_squared, mod)
+
+    # y = 0 is its own negation, so those x values only have one point
+    two_roots = roots != 0
+    xs = np.concatenate([x, x[two_roots]])
+    ys = np.concatenate([roots, (mod - roots[two_roots]) % mod])
+    order = np.lexsort((ys, xs))
+    return xs[order], ys[order]
+
+
+# [1G, 2G, ..., nG] on BN128 as (x, y) integer pairs.
+def bn128_multiples(n, G=G1):
+    g = to_jacobian(int(G[0]), int(G[1]))
+    points = []
+    current = g
+    for _ in range(n):
+        points.append(current)
+        current = jacobian_add(current, g, field_modulus)
+    return batch_from_jacobian(points, field_modulus)
+
+
+# The scatter data of `05_EC_Point_Multiplication.py`: for i in 1..n, the y value of iG and of -iG.
+def bn128_scatter_points(n, G=G1):
+    xs = []
+    ys = []
+    for i, (_, y) in enumerate(bn128_multiples(n, G), start=1):
+        xs.append(i)
+        ys.append(y)
+        xs.append(i)
+        ys.append((field_modulus - y) % field_modulus)
+    return xs, ys
+
+
+if __name__ == "__main__":
+    import time
+    import libnum
+    from py_ecc.bn128 import multiply, neg
+
+    def generate_points(mod):
+        xs = []
+        ys = []
+        for x in range(0, mod):
+            y_squared = (x**3 + 3) % mod
+            if libnum.has_sqrtmod_prime_power(y_squared, mod, 1):
+                for sr in libnum.sqrtmod_prime_power(y_squared, mod, 1):
+                    ys.append(sr)
+                    xs.append(x)
+        return xs, ys
+
+    # Same points as libnum, including primes = 1 (mod 4) where Tonelli-Shanks does real work (97 - 1 = 3 * 2^5)
+    for mod in [11, 43, 97, 101, 257, 7681, 12289]:
+        expected = sorted(set(zip(*generate_points(mod))))
+        xs, ys = enumerate_curve_points(mod)
+        assert list(zip(xs.tolist(), ys.tolist())) == expected, mod
+
+    # y^2 = x^3 + 2x + 3 (mod 97)
+    xs, ys = enumerate_curve_points(97, a=2, b=3)
+    assert all((y * y - x**3 - 2 * x - 3) % 97 == 0 for x, y in zip(xs.tolist(), ys.tolist()))
+
+    # Same points as the loop in `05_EC_Point_Multiplication.py`
+    xs, ys = bn128_scatter_points(50)
+    for i in range(1, 51):
+        assert ys[2 * (i - 1)] == int(multiply(G1, i)[1])
+        assert ys[2 * (i - 1) + 1] == int(neg(multiply(G1, i))[1])
+
+    # *** Timing ***
+    mod = 100003
+    start = time.perf_counter()
+    generate_points(mod)
+    libnum_time = time.perf_counter() - start
+    start = time.perf_counter()
+    enumerate_curve_points(mod)
+    numpy_time = time.perf_counter() - start
+    print(f"points of y^2 = x^3 + 3 (mod {mod}): libnum loop {libnum_time:.3f}s, vectorized {numpy_time:.3f}s")
+
+    start = time.perf_counter()
+    for i in range(1, 200):
+        multiply(G1, i)
+        neg(multiply(G1, i))
+    multiply_time = time.perf_counter() - start
+    start = time.perf_counter()
+    bn128_scatter_points(199)
+    incremental_time = time.perf_counter() - start
+    print(f"199 BN128 scatter points: multiply/neg {multiply_time:.3f}s, incremental {incremental_time:.3f}s")
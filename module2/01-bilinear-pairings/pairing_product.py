@@ -0,0 +1,137 @@
+# *** Products of pairings with one shared final exponentiation ***
+# Verifiers rarely look at a single pairing. As described in the EIP-197 section of `01_bilinearpairings.md`, they
+# check that a product of pairings is 1, e.g. for Groth16:
+#   e(-A_1, B_2) * e(alpha_1, beta_2) * e(L_1, gamma_2) * e(C_1, delta_2) == 1
+# Computing each `pairing(...)` separately and comparing with `eq` pays, for every pairing, for:
+#   1. a Miller loop: ~64 iterations, each squaring an Fp12 accumulator and multiplying in a line function
+#   2. a final exponentiation: raising the result to (p^12 - 1) / r, the most expensive part
+#
+# Since (f_1 * f_2)^e = f_1^e * f_2^e, the final exponentiation can be done ONCE on the product of the Miller loop
+# outputs. The Miller loops can share work too: they all walk the same bits of the ate loop count, so a single Fp12
+# accumulator is squared once per bit and every pair's line function is multiplied into it (a "multi-Miller loop").
+#
+# Points can be `py_ecc.bn128` points (affine, `None` at infinity) or `py_ecc.optimized_bn128` points (projective).
+# Either way the arithmetic happens on `optimized_bn128` projective points. Each pair holds one G1 and one G2 point,
+# in either order.
+#
+# Usage:
+#   from pairing_product import pairing_product, pairing_check
+#   pairing_check([(neg(A_1), B_2), (alpha_1, beta_2), (L_1, gamma_2), (C_1, delta_2)])   # True / False
+#   pairing_product([(P, Q)]) == optimized_bn128.pairing(Q, P)                              # an Fp12 element
+import os
+import sys
+
+from py_ecc import optimized_bn128
+from py_ecc.optimized_bn128 import FQ12
+from py_ecc.optimized_bn128.optimized_pairing import (
+    cast_point_to_fq12, field_modulus, linefunc, pseudo_binary_encoding, twist,
+)
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "module1",
+                             "09-elliptic-curves-over-finite-fields"))
+from fixed_base import is_g2, to_optimized
+
+
+def _as_projective(pt, g2):
+    if pt is not None and len(pt) == 3:
+        return pt
+    return to_optimized(pt, g2)
+
+
+# Returns (G2 point, G1 point) in optimized_bn128 form, or None if either is the point at infinity (the pairing is 1).
+def _normalize_pair(pair):
+    a, b = pair
+    if a is None or b is None:
+        return None
+    if is_g2(a):
+        Q, P = _as_projective(a, True), _as_projective(b, False)
+    else:
+        P, Q = _as_projective(a, False), _as_projective(b, True)
+    if is_g2(P) or not is_g2(Q):
+        raise ValueError("each pair must hold one G1 point and one G2 point")
+    if not optimized_bn128.is_on_curve(Q, optimized_bn128.b2):
+        raise ValueError("G2 point is not on the curve")
+    if not optimized_bn128.is_on_curve(P, optimized_bn128.b):
+        raise ValueError("G1 point is not on the curve")
+    if optimized_bn128.is_inf(P) or optimized_bn128.is_inf(Q):
+        return None
+    return twist(Q), cast_point_to_fq12(P)
+
+
+# *** The multi-Miller loop ***
+# Same steps as `miller_loop` in `py_ecc.optimized_bn128`, run in lockstep for every pair. Numerators and denominators
+# are accumulated separately so there is a single Fp12 division at the end.
+def miller_loop_product(pairs):
+    pairs = [p for p in (_normalize_pair(pair) for pair in pairs) if p is not None]
+    if not pairs:
+        return FQ12.one()
+    Rs = [Q for Q, _ in pairs]
+    f_num, f_den = FQ12.one(), FQ12.one()
+    for v in pseudo_binary_encoding[63::-1]:
+        f_num = f_num * f_num
+        f_den = f_den * f_den
+        for k, (Q, P) in enumerate(pairs):
+            n, d = linefunc(Rs[k], Rs[k], P)
+            f_num, f_den = f_num * n, f_den * d
+            Rs[k] = optimized_bn128.double(Rs[k])
+            if v != 0:
+                step = Q if v == 1 else optimized_bn128.neg(Q)
+                n, d = linefunc(Rs[k], step, P)
+                f_num, f_den = f_num * n, f_den * d
+                Rs[k] = optimized_bn128.add(Rs[k], step)
+    for k, (Q, P) in enumerate(pairs):
+        Q1 = (Q[0] ** field_modulus, Q[1] ** field_modulus, Q[2] ** field_modulus)
+        nQ2 = (Q1[0] ** field_modulus, -Q1[1] ** field_modulus, Q1[2] ** field_modulus)
+        n1, d1 = linefunc(Rs[k], Q1, P)
+        R = optimized_bn128.add(Rs[k], Q1)
+        n2, d2 = linefunc(R, nQ2, P)
+        f_num, f_den = f_num * n1 * n2, f_den * d1 * d2
+    return f_num / f_den
+
+
+# prod_k e(P_k, Q_k), as an Fp12 element of `optimized_bn128`
+def pairing_product(pairs):
+    return optimized_bn128.final_exponentiate(miller_loop_product(pairs))
+
+
+# The EIP-197 precompile: True iff prod_k e(P_k, Q_k) == 1
+def pairing_check(pairs):
+    return pairing_product(pairs) == FQ12.one()
+
+
+if __name__ == "__main__":
+    import time
+    from py_ecc.bn128 import G1, G2, pairing, multiply, neg, eq, curve_order
+
+    # e(P_2, P_1) * e(Q_2, Q_1) == e(R_2, R_1) from `01_bilinearpairings.md`
+    P_1, P_2 = multiply(G1, 3), multiply(G2, 8)
+    Q_1, Q_2 = multiply(G1, 6), multiply(G2, 2)
+    R_1, R_2 = multiply(G1, 9), multiply(G2, 4)
+    assert pairing_check([(P_1, P_2), (Q_1, Q_2), (neg(R_1), R_2)])
+    assert not pairing_check([(P_1, P_2), (Q_1, Q_2), (R_1, R_2)])
+
+    # G2 first (like `pairing(Q, P)`) works too, and agrees with py_ecc
+    assert pairing_product([(P_2, P_1)]) == optimized_bn128.pairing(to_optimized(P_2), to_optimized(P_1))
+    assert pairing_check([(P_2, P_1), (neg(P_1), P_2)])
+
+    # The point at infinity pairs to 1
+    assert pairing_check([(None, G2), (G1, optimized_bn128.Z2)])
+    assert pairing_check([])
+
+    # *** A Groth16-shaped check: 4 pairings ***
+    # a * b == alpha * beta + l * gamma + c * delta
+    alpha, beta, gamma, delta, l, c = 5, 7, 11, 13, 17, 19
+    a, b = 3, (alpha * beta + l * gamma + c * delta) * pow(3, -1, curve_order) % curve_order
+    A_1, B_2 = multiply(G1, a), multiply(G2, b)
+    terms = [(multiply(G1, alpha), multiply(G2, beta)), (multiply(G1, l), multiply(G2, gamma)),
+             (multiply(G1, c), multiply(G2, delta))]
+
+    start = time.perf_counter()
+    rhs = pairing(terms[0][1], terms[0][0]) * pairing(terms[1][1], terms[1][0]) * pairing(terms[2][1], terms[2][0])
+    assert eq(pairing(B_2, A_1), rhs)
+    separate_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    assert pairing_check([(neg(A_1), B_2)] + terms)
+    product_time = time.perf_counter() - start
+    print(f"4 pairings: separate bn128 pairings {separate_time:.2f}s, pairing_check {product_time:.2f}s")
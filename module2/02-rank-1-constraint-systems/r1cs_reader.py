@@ -0,0 +1,229 @@
+# *** Reading circom `.r1cs` files ***
+# `circom --r1cs` writes the compiled constraints (e.g. `r1cs-circom-multiply2.r1cs`) in a binary format:
+#
+#   "r1cs" | version (u32) | number of sections (u32)
+#   then for every section: type (u32) | size in bytes (u64) | contents
+#
+#   section 1, header:      field size n8 (u32) | prime (n8 bytes) | nWires (u32) | nPubOut (u32) | nPubIn (u32)
+#                           | nPrvIn (u32) | nLabels (u64) | nConstraints (u32)
+#   section 2, constraints: for every constraint, three linear combinations A, B, C, each stored as
+#                           nTerms (u32) | nTerms x (wire id (u32) | coefficient (n8 bytes))
+#   section 3, wire->label: nWires x label id (u64)
+#
+# All integers are little-endian and the sections can appear in any order. A constraint says A * B - C = 0, which
+# is exactly a row of L, R and O: (L w) * (R w) = (O w).
+#
+# The file is memory-mapped rather than read: the OS pages in only what we touch. The terms of one linear combination
+# all have the same size (4 + n8 bytes), so each linear combination is viewed with a single `np.frombuffer` call
+# instead of one Python object per term. Loading to COO is one pass over the constraints that only reads the term
+# counts, then one pass per matrix that copies each linear combination into preallocated arrays. Coefficients stay as n8 / 8 little-endian 64-bit limbs until they
+# are handed to `SparseMatrix.from_coo`. Everything returned is a copy, so nothing keeps the map open after `close()`.
+#
+# Usage:
+#   from r1cs_reader import R1CSFile
+#   with R1CSFile("r1cs-circom-multiply2.r1cs") as r1cs_file:
+#       print(r1cs_file.n_constraints, r1cs_file.n_wires, r1cs_file.prime)
+#       for A, B, C in r1cs_file.iter_constraints():   # each is {wire: coefficient}
+#           ...
+#       r1cs = r1cs_file.to_sparse_r1cs()               # `SparseR1CS` from `07-R1CS-to-QAP-FF/sparse_r1cs.py`
+import mmap
+import os
+import struct
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "07-R1CS-to-QAP-FF"))
+from sparse_r1cs import SparseMatrix, SparseR1CS, limbs_to_ints
+
+HEADER_SECTION = 1
+CONSTRAINTS_SECTION = 2
+WIRE_TO_LABEL_SECTION = 3
+
+
+class R1CSFile:
+    # If the file is rejected (bad magic, version or field size, missing section), the map and the file are closed
+    # before the error propagates.
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mm = None
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._read_sections()
+            self._read_header()
+        except BaseException:
+            self.close()
+            raise
+
+    def _read_sections(self):
+        magic, version, n_sections = struct.unpack_from("<4sII", self._mm, 0)
+        if magic != b"r1cs":
+            raise ValueError(f"{self.path} is not an r1cs file")
+        if version != 1:
+            raise ValueError(f"unsupported r1cs version {version}")
+
+        # section type -> (offset of the contents, size)
+        self.sections = {}
+        offset = 12
+        for _ in range(n_sections):
+            section_type, size = struct.unpack_from("<IQ", self._mm, offset)
+            self.sections[section_type] = (offset + 12, size)
+            offset += 12 + size
+
+    def _read_header(self):
+        offset, _ = self._section(HEADER_SECTION)
+        (self.field_size,) = struct.unpack_from("<I", self._mm, offset)
+        offset += 4
+        self.prime = int.from_bytes(self._mm[offset:offset + self.field_size], "little")
+        offset += self.field_size
+        (self.n_wires, self.n_pub_out, self.n_pub_in, self.n_prv_in,
+         self.n_labels, self.n_constraints) = struct.unpack_from("<IIIIQI", self._mm, offset)
+        if self.field_size % 8 != 0:
+            raise ValueError(f"field size {self.field_size} is not a multiple of 8 bytes")
+        self._term_dtype = np.dtype([("wire", "<u4"), ("coeff", "<u8", (self.field_size // 8,))])
+
+    def _section(self, section_type):
+        if section_type not in self.sections:
+            raise ValueError(f"{self.path} has no section of type {section_type}")
+        return self.sections[section_type]
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # Number of public signals (outputs + public inputs), not counting the constant wire 0
+    @property
+    def n_public(self):
+        return self.n_pub_out + self.n_pub_in
+
+    # *** Streaming the constraints ***
+    # Yields, for every constraint, the three linear combinations as structured arrays with fields
+    # `wire` (uint32) and `coeff` (uint64 limbs). Each one is a small copy, so it stays valid after `close()`: a view
+    # into the memory map would keep the map from being closed.
+    def iter_linear_combinations(self):
+        offset, _ = self._section(CONSTRAINTS_SECTION)
+        term_size = self._term_dtype.itemsize
+        for _ in range(self.n_constraints):
+            lcs = []
+            for _ in range(3):
+                (n_terms,) = struct.unpack_from("<I", self._mm, offset)
+                offset += 4
+                lcs.append(np.frombuffer(self._mm, dtype=self._term_dtype, count=n_terms, offset=offset).copy())
+                offset += n_terms * term_size
+            yield tuple(lcs)
+
+    # Same as above, as {wire: coefficient} dicts. Convenient for small circuits.
+    def iter_constraints(self):
+        for lcs in self.iter_linear_combinations():
+            yield tuple(dict(zip(lc["wire"].tolist(), limbs_to_ints(lc["coeff"]).tolist())) for lc in lcs)
+
+    # *** Loading as COO ***
+    # One pass over the constraints reads only the term counts, giving the byte offset and length of every linear
+    # combination: (n_constraints, 3) arrays. The rows, cols and limbs arrays of one matrix are then allocated at
+    # their final size and filled one linear combination at a time, straight from the map, so besides the output
+    # nothing bigger than one linear combination is ever materialized.
+    def _scan(self):
+        offset, _ = self._section(CONSTRAINTS_SECTION)
+        term_size = self._term_dtype.itemsize
+        offsets = np.empty((self.n_constraints, 3), dtype=np.int64)
+        counts = np.empty((self.n_constraints, 3), dtype=np.int64)
+        for row in range(self.n_constraints):
+            for k in range(3):
+                (n_terms,) = struct.unpack_from("<I", self._mm, offset)
+                offsets[row, k] = offset + 4
+                counts[row, k] = n_terms
+                offset += 4 + n_terms * term_size
+        return offsets, counts
+
+    def _coo(self, k, offsets, counts):
+        lengths = counts[:, k]
+        total = int(lengths.sum())
+        rows = np.repeat(np.arange(self.n_constraints, dtype=np.int64), lengths)
+        cols = np.empty(total, dtype=np.int64)
+        limbs = np.empty((total, self.field_size // 8), dtype=np.uint64)
+        position = 0
+        for offset, n_terms in zip(offsets[:, k].tolist(), lengths.tolist()):
+            if n_terms:
+                terms = np.frombuffer(self._mm, dtype=self._term_dtype, count=n_terms, offset=offset)
+                cols[position:position + n_terms] = terms["wire"]
+                limbs[position:position + n_terms] = terms["coeff"]
+                position += n_terms
+                del terms
+        return rows, cols, limbs
+
+    # Returns, for each of L, R and O, (rows, cols, limbs) arrays with one entry per non-zero coefficient.
+    def to_coo(self):
+        offsets, counts = self._scan()
+        return [self._coo(k, offsets, counts) for k in range(3)]
+
+    # The limbs go straight into the CSR build, one matrix at a time, so only one matrix's limbs exist at once.
+    def to_sparse_r1cs(self):
+        shape = (self.n_constraints, self.n_wires)
+        offsets, counts = self._scan()
+        matrices = []
+        for k in range(3):
+            rows, cols, limbs = self._coo(k, offsets, counts)
+            matrices.append(SparseMatrix.from_coo(shape, rows, cols, limbs, self.prime))
+            del rows, cols, limbs
+        return SparseR1CS(*matrices)
+
+    def wire_to_label(self):
+        offset, size = self._section(WIRE_TO_LABEL_SECTION)
+        return np.frombuffer(self._mm, dtype="<u8", count=size // 8, offset=offset).copy()
+
+
+if __name__ == "__main__":
+    from py_ecc.bn128 import curve_order
+
+    here = os.path.dirname(os.path.abspath(__file__))
+
+    # out <== x * y, wires: [1, out, x, y]
+    with R1CSFile(os.path.join(here, "r1cs-circom-multiply2.r1cs")) as r1cs_file:
+        assert r1cs_file.prime == curve_order
+        assert (r1cs_file.n_wires, r1cs_file.n_constraints, r1cs_file.n_pub_out, r1cs_file.n_prv_in) == (4, 1, 1, 2)
+        constraints = list(r1cs_file.iter_constraints())
+        print(constraints)
+        # circom writes it as (-x) * (y) - (-out) = 0
+        assert constraints == [({2: curve_order - 1}, {3: 1}, {1: curve_order - 1})]
+        assert r1cs_file.wire_to_label().tolist() == [0, 1, 2, 3]
+
+        r1cs = r1cs_file.to_sparse_r1cs()
+        x, y = 3, 7
+        assert r1cs.is_satisfied([1, x * y, x, y])
+        assert not r1cs.is_satisfied([1, x * y + 1, x, y])
+        kept = next(r1cs_file.iter_linear_combinations())
+        labels = r1cs_file.wire_to_label()
+    # Closing the map worked even though `kept` and `labels` are still alive
+    assert kept[0]["wire"].tolist() == [2] and labels.tolist() == [0, 1, 2, 3]
+
+    # A rejected file doesn't leak its descriptor
+    import tempfile
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "bad.r1cs")
+        for contents in (b"zkey" + bytes(8), b"r1cs" + struct.pack("<II", 2, 0), b"r1cs" + struct.pack("<II", 1, 0)):
+            with open(path, "wb") as f:
+                f.write(contents)
+            open_fds = len(os.listdir("/proc/self/fd")) if os.path.isdir("/proc/self/fd") else None
+            try:
+                R1CSFile(path)
+                assert False, "bad file accepted"
+            except ValueError as e:
+                print(e)
+            if open_fds is not None:
+                assert len(os.listdir("/proc/self/fd")) == open_fds
+
+    # Every compiled circuit in this directory loads
+    for name in sorted(os.listdir(here)):
+        if name.endswith(".r1cs"):
+            with R1CSFile(os.path.join(here, name)) as r1cs_file:
+                r1cs = r1cs_file.to_sparse_r1cs()
+                print(f"{name}: {r1cs.num_constraints} constraints, {r1cs.num_variables} wires, "
+                      f"{r1cs.L.nnz + r1cs.R.nnz + r1cs.O.nnz} non-zero coefficients")
@@ -0,0 +1,142 @@
+# *** Reading and writing circom `.wtns` witness files ***
+# The `generate_witness.js` scripts in `r1cs-circom-multiply2_js` and `r1cs-circom-poly_js` write `witness.wtns`:
+#
+#   "wtns" | version (u32) | number of sections (u32)
+#   then for every section: type (u32) | size in bytes (u64) | contents
+#
+#   section 1, header:  field size n8 (u32) | prime (n8 bytes) | number of witness values (u32)
+#   section 2, values:  every witness value as n8 little-endian bytes, in wire order [1, outputs, inputs, ...]
+#
+# Every value has the same width, so section 2 is just an (n, n8 / 8) array of little-endian uint64 limbs. We map it
+# with `np.memmap` instead of reading it: no copy and no Python int per element. `SparseMatrix.matvec` in
+# `07-R1CS-to-QAP-FF/sparse_r1cs.py` accepts such a limb array directly, and only converts the values it references.
+#
+# Usage:
+#   from wtns import read_wtns, write_wtns
+#   witness = read_wtns("r1cs-circom-multiply2_js/witness.wtns")
+#   witness.limbs            # (n, 4) uint64 memmap, hand it to SparseR1CS.is_satisfied / witness_products
+#   witness.values()         # the witness as Python ints, when you really need them
+#   write_wtns("out.wtns", [1, 99, 11, 9], curve_order)
+import os
+import struct
+import sys
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "07-R1CS-to-QAP-FF"))
+from sparse_r1cs import limbs_to_ints
+
+WTNS_VERSION = 2
+HEADER_SECTION = 1
+VALUES_SECTION = 2
+
+
+class WitnessFile:
+    def __init__(self, path, prime, field_size, limbs):
+        self.path = path
+        self.prime = prime
+        self.field_size = field_size
+        self.limbs = limbs
+
+    def __len__(self):
+        return len(self.limbs)
+
+    def values(self):
+        return limbs_to_ints(self.limbs)
+
+
+def read_wtns(path):
+    with open(path, "rb") as f:
+        magic, version, n_sections = struct.unpack("<4sII", f.read(12))
+        if magic != b"wtns":
+            raise ValueError(f"{path} is not a wtns file")
+        if version != WTNS_VERSION:
+            raise ValueError(f"unsupported wtns version {version}")
+
+        sections = {}
+        offset = 12
+        for _ in range(n_sections):
+            f.seek(offset)
+            section_type, size = struct.unpack("<IQ", f.read(12))
+            sections[section_type] = (offset + 12, size)
+            offset += 12 + size
+        if HEADER_SECTION not in sections or VALUES_SECTION not in sections:
+            raise ValueError(f"{path} is missing the header or the values section")
+
+        f.seek(sections[HEADER_SECTION][0])
+        (field_size,) = struct.unpack("<I", f.read(4))
+        prime = int.from_bytes(f.read(field_size), "little")
+        (n_values,) = struct.unpack("<I", f.read(4))
+
+    if field_size % 8 != 0:
+        raise ValueError(f"field size {field_size} is not a multiple of 8 bytes")
+    values_offset, values_size = sections[VALUES_SECTION]
+    if values_size != n_values * field_size:
+        raise ValueError(f"values section has {values_size} bytes, expected {n_values * field_size}")
+    limbs = np.memmap(path, dtype="<u8", mode="r", offset=values_offset, shape=(n_values, field_size // 8))
+    return WitnessFile(path, prime, field_size, limbs)
+
+
+# Field size in bytes: the prime rounded up to whole 64-bit limbs, e.g. 32 bytes for BN128.
+def field_size_for(prime):
+    return ((prime.bit_length() + 63) // 64) * 8
+
+
+# `values` can be Python ints (negative values are reduced mod prime) or an (n, k) uint64 limb array.
+def write_wtns(path, values, prime):
+    field_size = field_size_for(prime)
+    if isinstance(values, np.ndarray) and values.ndim == 2 and values.dtype == np.uint64:
+        if values.shape[1] * 8 != field_size:
+            raise ValueError(f"limb array has {values.shape[1]} limbs, expected {field_size // 8}")
+        payload = np.ascontiguousarray(values, dtype="<u8").tobytes()
+        n_values = len(values)
+    else:
+        payload = b"".join((int(v) % prime).to_bytes(field_size, "little") for v in values)
+        n_values = len(values)
+
+    header = struct.pack("<I", field_size) + prime.to_bytes(field_size, "little") + struct.pack("<I", n_values)
+    with open(path, "wb") as f:
+        f.write(struct.pack("<4sII", b"wtns", WTNS_VERSION, 2))
+        f.write(struct.pack("<IQ", HEADER_SECTION, len(header)))
+        f.write(header)
+        f.write(struct.pack("<IQ", VALUES_SECTION, len(payload)))
+        f.write(payload)
+
+
+if __name__ == "__main__":
+    import tempfile
+    from py_ecc.bn128 import curve_order
+    from r1cs_reader import R1CSFile
+
+    here = os.path.dirname(os.path.abspath(__file__))
+
+    # {"x": "11", "y": "9"} -> [1, 99, 11, 9], same as witness.json
+    witness = read_wtns(os.path.join(here, "r1cs-circom-multiply2_js", "witness.wtns"))
+    assert witness.prime == curve_order
+    assert witness.values().tolist() == [1, 99, 11, 9]
+
+    with R1CSFile(os.path.join(here, "r1cs-circom-multiply2.r1cs")) as r1cs_file:
+        r1cs = r1cs_file.to_sparse_r1cs()
+    assert r1cs.is_satisfied(witness.limbs)
+
+    # z = 3x^2y + 5xy - x - 2y + 3 with x = 2, y = 3 -> [1, 61, 2, 3, 12, 36]
+    witness = read_wtns(os.path.join(here, "r1cs-circom-poly_js", "witness.wtns"))
+    assert witness.values().tolist() == [1, 61, 2, 3, 12, 36]
+    with R1CSFile(os.path.join(here, "r1cs-circom-poly.r1cs")) as r1cs_file:
+        r1cs = r1cs_file.to_sparse_r1cs()
+    assert r1cs.is_satisfied(witness.limbs)
+    Lw, Rw, Ow = r1cs.witness_products(witness.limbs)
+    print(Lw, Rw, Ow)
+
+    # Round trips: from ints and from limbs, byte for byte identical to the file circom produced
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "witness.wtns")
+        write_wtns(path, [1, 61, 2, 3, 12, 36], curve_order)
+        with open(path, "rb") as a, open(os.path.join(here, "r1cs-circom-poly_js", "witness.wtns"), "rb") as b:
+            assert a.read() == b.read()
+
+        write_wtns(path, witness.limbs, curve_order)
+        assert read_wtns(path).values().tolist() == [1, 61, 2, 3, 12, 36]
+
+        write_wtns(path, [-1, 5], curve_order)
+        assert read_wtns(path).values().tolist() == [curve_order - 1, 5]
@@ -0,0 +1,140 @@
+# *** Evaluating Lagrange interpolants without building the polynomial ***
+# `finite_field_example.py` builds p = galois.lagrange_poly(xs, ys) and then evaluates p(1), ..., p(4). Building the
+# polynomial costs O(n^2), and it is thrown away after a few evaluations. The barycentric form of Lagrange
+# interpolation evaluates the interpolant directly from the values:
+#   p(u) = l(u) * sum_j (w_j / (u - x_j)) * y_j
+#   l(u) = (u - x_1)(u - x_2)...(u - x_n)
+#   w_j  = 1 / prod_{k != j} (x_j - x_k)       (= 1 / l'(x_j))
+# The weights w_j only depend on the x values, so they are computed once per domain. After that each evaluation is
+# O(n): one product for l(u), n divisions and a dot product with y. If u is one of the x_j, p(u) is simply y_j.
+#
+# For k points at once, the coefficients l(u) w_j / (u - x_j) form an (n x k) matrix C, and ys @ C evaluates the
+# interpolant at all k points; if ys is 2-D (one vector per row), every row's interpolant is evaluated at once.
+#
+# `LagrangeDomain` works over a galois field (`GF(p)` arrays) or over the reals (float64, the `scipy` path in
+# `float_example.py`). `lagrange_domain(xs, GF)` returns a cached domain: the last 128 (field, xs) pairs are kept in
+# an LRU cache, so code that keeps interpolating over the same x values (e.g. [1, ..., n] for an R1CS) only computes
+# the weights once.
+#
+# Usage:
+#   from lagrange_domain import lagrange_domain
+#   domain = lagrange_domain([1, 2, 3, 4], GF17)
+#   domain.evaluate(ys, 5)                    # p(5), same as galois.lagrange_poly(xs, ys)(5)
+#   domain.evaluate(ys, [5, 6, 7])            # p at several points
+#   domain.evaluate(Y, [5, 6])                # Y: (N x 4) -> (N x 2)
+#   lagrange_domain([1, 2, 3, 4]).evaluate([4, 8, 2, 1], 2.5)   # floats, same as scipy.interpolate.lagrange
+from functools import lru_cache
+
+import galois
+import numpy as np
+
+DOMAIN_CACHE_SIZE = 128
+
+
+class LagrangeDomain:
+    # `field` is a galois field class, or None for float64
+    def __init__(self, xs, field=None):
+        self.field = field
+        self.xs = self._array(xs)
+        if self.xs.ndim != 1:
+            raise ValueError("xs must be one-dimensional")
+        if len(np.unique(np.asarray(self.xs))) != len(self.xs):
+            raise ValueError("xs must be distinct")
+        self.weights = self._weights()
+
+    def __len__(self):
+        return len(self.xs)
+
+    def _array(self, values):
+        if self.field is None:
+            return np.asarray(values, dtype=np.float64)
+        return self.field(values)
+
+    def _weights(self):
+        if self.field is not None:
+            # 1 / l'(x_j), as in `07-R1CS-to-QAP-FF/qap.py`
+            return np.reciprocal(galois.Poly.Roots(self.xs, field=self.field).derivative()(self.xs))
+        diff = self.xs[:, np.newaxis] - self.xs[np.newaxis, :]
+        np.fill_diagonal(diff, 1.0)
+        return 1.0 / np.prod(diff, axis=1)
+
+    # (n x k) matrix with p(points[c]) = ys @ coefficients[:, c]
+    def coefficients(self, points):
+        points = self._array(np.atleast_1d(points))
+        diff = points[np.newaxis, :] - self.xs[:, np.newaxis]            # u_c - x_j
+        on_domain = np.asarray(diff == 0)
+        safe = self._array(np.where(on_domain, 1, diff))
+        l_u = np.multiply.reduce(safe, axis=0)
+        coefficients = self.weights[:, np.newaxis] / safe * l_u[np.newaxis, :]
+        # u = x_j: the interpolant is y_j there, so the column is the j-th unit vector
+        hit = on_domain.any(axis=0)
+        coefficients[:, hit] = self._array(on_domain[:, hit].astype(int))
+        return coefficients
+
+    # Value(s) of the interpolant of `ys` at `points`. `ys` is (n,) or (N x n); `points` a scalar or a 1-D array.
+    # The result drops the point axis when `points` is a scalar.
+    def evaluate(self, ys, points):
+        ys = self._array(ys)
+        if ys.shape[-1] != len(self):
+            raise ValueError(f"expected {len(self)} values per vector, got {ys.shape[-1]}")
+        result = ys @ self.coefficients(points)
+        return result[..., 0] if np.ndim(points) == 0 else result
+
+
+@lru_cache(maxsize=DOMAIN_CACHE_SIZE)
+def _cached_domain(field, xs):
+    return LagrangeDomain(list(xs), field)
+
+
+# A cached `LagrangeDomain` for (field, xs). `field=None` is the float path.
+def lagrange_domain(xs, field=None):
+    if field is None:
+        key = tuple(float(x) for x in np.asarray(xs, dtype=np.float64))
+    else:
+        key = tuple(int(x) for x in field(xs))
+    return _cached_domain(field, key)
+
+
+if __name__ == "__main__":
+    import time
+    from scipy.interpolate import lagrange
+
+    # `finite_field_example.py`
+    GF17 = galois.GF(17)
+    xs = GF17(np.array([1, 2, 3, 4]))
+    ys = GF17(np.array([4, 8, 2, 1]))
+    p = galois.lagrange_poly(xs, ys)  # 11x^3 + 14x^2 + 4x + 9
+    domain = lagrange_domain([1, 2, 3, 4], GF17)
+    assert domain is lagrange_domain(xs, GF17)
+    assert domain.evaluate(ys, 1) == GF17(4)
+    assert domain.evaluate(ys, GF17.elements).tolist() == p(GF17.elements).tolist()
+
+    # Several vectors and several points at once
+    Y = GF17(np.array([[4, 8, 2, 1], [1, 2, 3, 4], [0, 0, 0, 5]]))
+    expected = [galois.lagrange_poly(xs, row)(GF17([0, 5, 16])).tolist() for row in Y]
+    assert domain.evaluate(Y, [0, 5, 16]).tolist() == expected
+
+    # `float_example.py`: 2.5x^3 - 20x^2 + 46.5x - 25
+    float_domain = lagrange_domain([1, 2, 3, 4])
+    us = np.array([0.0, 1.0, 2.5, 3.0, 10.0])
+    assert np.allclose(float_domain.evaluate([4, 8, 2, 1], us), lagrange([1, 2, 3, 4], [4, 8, 2, 1])(us))
+    assert float_domain.evaluate([4, 8, 2, 1], 2.0) == 8.0
+
+    # *** Timing: evaluating 500 interpolants of length 32 at one point ***
+    GF = galois.GF(2**31 - 1)
+    n, N = 32, 500
+    xs = GF(np.arange(1, n + 1))
+    Y = GF.Random((N, n), seed=1)
+    u = GF(123456789)
+    lagrange_domain(xs, GF).evaluate(Y[:1], u)  # galois compiles its kernels on first use
+
+    start = time.perf_counter()
+    expected = [galois.lagrange_poly(xs, row)(u) for row in Y]
+    poly_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = lagrange_domain(xs, GF).evaluate(Y, u)
+    domain_time = time.perf_counter() - start
+
+    assert result.tolist() == [int(v) for v in expected]
+    print(f"{N} interpolants of length {n}: lagrange_poly {poly_time:.3f}s, cached LagrangeDomain {domain_time:.4f}s")
@@ -0,0 +1,87 @@
+# *** Batch vector equality with the Schwartz-Zippel lemma ***
+# `vector_equality_example.py` checks A == B by interpolating both vectors over x = [1, 2, 3] with
+# `galois.lagrange_poly` and comparing the two polynomials at one random u. Building a polynomial per vector is the
+# expensive part, and it isn't needed: only the VALUE at u matters, and that can be read straight off the vector with
+# the barycentric form of Lagrange interpolation:
+#   p(u) = l(u) * sum_j (w_j / (u - x_j)) * y_j,     l(u) = (u - x_1)(u - x_2)...(u - x_n),  w_j = 1 / l'(x_j)
+# For a fixed u the bracket is a vector c of n coefficients that doesn't depend on y. So for a whole 2-D array of
+# vectors (one per row), all the evaluations are one matrix-vector product: values @ c. With k random points the c's
+# form an (n x k) matrix and it is still one matrix multiplication (`04-lagrange-interpolation/lagrange_domain.py`).
+#
+# Soundness: two different vectors interpolate to different polynomials of degree < n, which agree on at most n - 1
+# points. One random u makes them collide with probability at most (n - 1) / p; k independent points push that down
+# to ((n - 1) / p)^k. For a small field like GF(103) in the examples, pick k accordingly.
+#
+# Usage:
+#   from batch_equality import batch_equal, fingerprints
+#   batch_equal(A, B, k=4)          # A, B: (N x n) GF arrays -> boolean mask of length N, row by row
+#   fingerprints(V, points)         # (N x k) evaluations of every row's interpolant at the given points
+import os
+import sys
+
+import galois
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "04-lagrange-interpolation"))
+from lagrange_domain import lagrange_domain
+
+
+# Evaluations of every row's interpolant (over `xs`, default [1, ..., n]) at every point: an (N x k) GF array.
+# The barycentric weights come from the cached `LagrangeDomain` for (GF, xs).
+def fingerprints(values, points, xs=None):
+    GF = type(values)
+    n = values.shape[-1]
+    xs = np.arange(1, n + 1) % GF.order if xs is None else xs
+    return lagrange_domain(xs, GF).evaluate(values, GF(np.atleast_1d(points)))
+
+
+# Row-wise A == B for two (N x n) GF arrays, tested at k random points. False means "definitely different", True means
+# "equal, except with probability at most ((n - 1) / p)^k".
+def batch_equal(A, B, k=1, xs=None, points=None):
+    GF = type(A)
+    if A.shape != B.shape:
+        raise ValueError(f"shapes {A.shape} and {B.shape} don't match")
+    points = GF.Random(k) if points is None else GF(points)
+    return np.all(fingerprints(A - B, points, xs) == 0, axis=-1)
+
+
+if __name__ == "__main__":
+    import time
+
+    # The vectors from `vector_equality_example.py`
+    p = 103
+    GF = galois.GF(p)
+    x_common = GF(np.array([1, 2, 3]))
+    A = GF(np.array([[4, 8, 19], [5, 13, 29]]))
+    B = GF(np.array([[4, 8, 19], [7, 17, 23]]))
+    assert batch_equal(A, B, k=8).tolist() == [True, False]
+
+    # Same value as evaluating the `galois.lagrange_poly` interpolant, including at points of the domain
+    points = GF(np.array([0, 2, 57, 102]))
+    expected = [[galois.lagrange_poly(x_common, row)(u) for u in points] for row in A]
+    assert fingerprints(A, points).tolist() == np.array(expected).tolist()
+
+    # *** Many vectors over a large field ***
+    GF = galois.GF(2**31 - 1)
+    N, n, k = 2000, 16, 2
+    rng = np.random.default_rng(0)
+    A = GF.Random((N, n), seed=rng)
+    B = A.copy()
+    changed = rng.choice(N, size=50, replace=False)
+    B[changed, rng.integers(0, n, size=50)] += GF(1)
+    xs = GF(np.arange(1, n + 1))
+    batch_equal(A[:2], B[:2], k=k)  # galois compiles its kernels on first use, keep that out of the timing
+
+    start = time.perf_counter()
+    u = GF.Random(seed=rng)
+    expected = np.array([galois.lagrange_poly(xs, a)(u) == galois.lagrange_poly(xs, b)(u) for a, b in zip(A, B)])
+    poly_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    mask = batch_equal(A, B, k=k)
+    batch_time = time.perf_counter() - start
+
+    assert (expected == mask).all()
+    assert sorted(np.flatnonzero(~mask)) == sorted(changed)
+    print(f"{N} pairs of length {n}: lagrange_poly per vector {poly_time:.3f}s, "
+          f"barycentric at {k} points {batch_time:.3f}s")
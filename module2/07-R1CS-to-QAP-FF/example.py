@@ -54,23 +54,16 @@ def interpolate_column(col):
     xs = GF(np.array([1, 2, 3, 4]))
     return galois.lagrange_poly(xs, col)
 
-u_polynomials = np.apply_along_axis(
-    interpolate_column,
-    0,
-    L_galois
-)
-
-v_polynomials = np.apply_along_axis(
-    interpolate_column,
-    0,
-    R_galois
-)
-
-w_polynomials = np.apply_along_axis(
-    interpolate_column,
-    0,
-    O_galois
-)
+# Interpolating column by column rebuilds the Lagrange basis for xs = [1, 2, 3, 4] on every call:
+# u_polynomials = np.apply_along_axis(interpolate_column, 0, L_galois)
+# `qap.r1cs_to_qap` builds the basis once and interpolates every column of a matrix with a single matrix multiply.
+from qap import r1cs_to_qap, coefficients_to_polys
+
+U_coeffs, V_coeffs, W_coeffs = r1cs_to_qap(L_galois, R_galois, O_galois, GF)
+
+u_polynomials = coefficients_to_polys(U_coeffs)
+v_polynomials = coefficients_to_polys(V_coeffs)
+w_polynomials = coefficients_to_polys(W_coeffs)
 
 print(u_polynomials[:2])
 print(v_polynomials[:2])
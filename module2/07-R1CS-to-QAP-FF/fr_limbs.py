@@ -0,0 +1,607 @@
+# *** BN128 scalar field arithmetic on 4 x 64-bit limbs (numba) ***
+# `galois.GF(p)` is fast for the toy primes in this module (79, 17, 103) because elements fit in an int64. The BN128
+# scalar field (`curve_order`, 254 bits) doesn't, so `GF(curve_order)` arrays and the `dtype=object` arrays in
+# `sparse_r1cs.py` hold Python ints, and every addition and multiplication is a Python big-int operation.
+#
+# Here an element is 4 little-endian uint64 limbs (x = l_0 + l_1 2^64 + l_2 2^128 + l_3 2^192), so a vector is an
+# (n, 4) uint64 array, and the loops are compiled with numba.
+#
+# *** Montgomery form ***
+# Reducing a 512-bit product mod r needs a division. Instead every element x is stored as x R mod r with R = 2^256.
+# The Montgomery product of a R and b R is
+#   REDC(a R * b R) = a R * b R / R = (a b) R      (mod r)
+# and REDC only needs multiplications, additions and shifts by whole limbs: for each limb, add the multiple of r that
+# makes the lowest limb 0 (m = t_0 * (-r^-1) mod 2^64), then drop that limb. This is the CIOS variant, interleaving
+# the product and the reduction limb by limb. Additions and subtractions are the same as on plain residues.
+# Converting in and out are Montgomery products with R^2 mod r and with 1.
+#
+# numba has no 128-bit integers, so the 64 x 64 -> 128-bit limb product is assembled from four 32 x 32-bit products.
+# All constants are np.uint64: mixing uint64 and int64 in numba silently produces float64.
+#
+# *** R1CS / QAP at curve_order scale ***
+# `FrSparseMatrix` mirrors `SparseMatrix.matvec` from `sparse_r1cs.py` (gather, multiply, per-row sums), and
+# `interpolate_columns` / `witness_polynomial` mirror the sparse interpolation of `sparse_r1cs.py`: the CSR entries
+# are sorted by column once and each one runs the synthetic division recurrence, without densifying the matrix or
+# building the n x n Lagrange basis (`lagrange_basis` still builds it, like `qap.py`, when it is wanted).
+# `qap.r1cs_to_qap(..., backend="limbs")` and `SparseR1CS.interpolate_columns(..., backend="limbs")` run on these.
+#
+# Usage:
+#   from fr_limbs import Fr, FrSparseMatrix, is_satisfied, interpolate_columns
+#   a = Fr.from_ints([1, 2, 3]); b = Fr.from_ints([4, 5, curve_order - 1])
+#   (a * b + a - b).to_ints()      # Python ints, same as ((a * b + a - b) % curve_order)
+#   a.inverse(), a ** 5, a / b, a @ M
+#   is_satisfied(r1cs, witness)     # r1cs: SparseR1CS over curve_order
+#   U = interpolate_columns(L)      # (columns x constraints) coefficients, descending, as Fr
+#   U_w = witness_polynomial(r1cs.L, witness)
+import numpy as np
+from numba import njit
+from py_ecc.bn128 import curve_order
+
+from sparse_r1cs import SparseMatrix, limbs_to_ints
+
+LIMBS = 4
+R = 1 << 256
+MASK64 = (1 << 64) - 1
+
+
+def _to_limbs(x):
+    return np.array([(x >> (64 * k)) & MASK64 for k in range(LIMBS)], dtype=np.uint64)
+
+
+MODULUS = _to_limbs(curve_order)
+R2 = _to_limbs(R * R % curve_order)            # converts into Montgomery form
+MONT_ONE = _to_limbs(R % curve_order)          # 1 in Montgomery form
+PLAIN_ONE = _to_limbs(1)                       # converts out of Montgomery form
+N_PRIME = np.uint64((-pow(curve_order, -1, 1 << 64)) % (1 << 64))
+
+_ZERO = np.uint64(0)
+_ONE = np.uint64(1)
+_M32 = np.uint64(0xFFFFFFFF)
+_S32 = np.uint64(32)
+
+
+# *** Limb primitives ***
+@njit(cache=True)
+def _mul64(a, b):
+    a_lo, a_hi = a & _M32, a >> _S32
+    b_lo, b_hi = b & _M32, b >> _S32
+    p0 = a_lo * b_lo
+    p1 = a_lo * b_hi
+    p2 = a_hi * b_lo
+    p3 = a_hi * b_hi
+    mid = (p0 >> _S32) + (p1 & _M32) + (p2 & _M32)
+    lo = (p0 & _M32) | (mid << _S32)
+    hi = p3 + (p1 >> _S32) + (p2 >> _S32) + (mid >> _S32)
+    return hi, lo
+
+
+# t + a * b + c as (hi, lo); never overflows 128 bits
+@njit(cache=True)
+def _mac(t, a, b, c):
+    hi, lo = _mul64(a, b)
+    s = lo + t
+    if s < lo:
+        hi += _ONE
+    s2 = s + c
+    if s2 < s:
+        hi += _ONE
+    return hi, s2
+
+
+@njit(cache=True)
+def _geq_modulus(x, n):
+    for k in range(LIMBS - 1, -1, -1):
+        if x[k] != n[k]:
+            return x[k] > n[k]
+    return True
+
+
+# x -= n in place, ignoring the final borrow
+@njit(cache=True)
+def _sub_in_place(x, n):
+    borrow = _ZERO
+    for k in range(LIMBS):
+        d = x[k] - n[k]
+        b1 = x[k] < n[k]
+        d2 = d - borrow
+        b2 = d < borrow
+        x[k] = d2
+        borrow = _ONE if (b1 or b2) else _ZERO
+
+
+# *** Montgomery multiplication (CIOS) ***
+@njit(cache=True)
+def _mont_mul(a, b, out, t, n, n_prime):
+    for k in range(LIMBS + 2):
+        t[k] = _ZERO
+    for i in range(LIMBS):
+        c = _ZERO
+        for j in range(LIMBS):
+            c, t[j] = _mac(t[j], a[j], b[i], c)
+        s = t[LIMBS] + c
+        t[LIMBS + 1] = _ONE if s < c else _ZERO
+        t[LIMBS] = s
+
+        m = t[0] * n_prime
+        c, _ = _mac(t[0], m, n[0], _ZERO)
+        for j in range(1, LIMBS):
+            c, t[j - 1] = _mac(t[j], m, n[j], c)
+        s = t[LIMBS] + c
+        t[LIMBS - 1] = s
+        t[LIMBS] = t[LIMBS + 1] + (_ONE if s < c else _ZERO)
+
+    for k in range(LIMBS):
+        out[k] = t[k]
+    if t[LIMBS] != _ZERO or _geq_modulus(out, n):
+        _sub_in_place(out, n)
+
+
+@njit(cache=True)
+def _add_mod(a, b, out, n):
+    carry = _ZERO
+    for k in range(LIMBS):
+        s = a[k] + b[k]
+        c1 = s < a[k]
+        s2 = s + carry
+        c2 = s2 < s
+        out[k] = s2
+        carry = _ONE if (c1 or c2) else _ZERO
+    if carry != _ZERO or _geq_modulus(out, n):
+        _sub_in_place(out, n)
+
+
+@njit(cache=True)
+def _sub_mod(a, b, out, n):
+    borrow = _ZERO
+    for k in range(LIMBS):
+        d = a[k] - b[k]
+        b1 = a[k] < b[k]
+        d2 = d - borrow
+        b2 = d < borrow
+        out[k] = d2
+        borrow = _ONE if (b1 or b2) else _ZERO
+    if borrow != _ZERO:
+        carry = _ZERO
+        for k in range(LIMBS):
+            s = out[k] + n[k]
+            c1 = s < out[k]
+            s2 = s + carry
+            c2 = s2 < s
+            out[k] = s2
+            carry = _ONE if (c1 or c2) else _ZERO
+
+
+# *** Vectorized kernels, over (N, 4) arrays ***
+@njit(cache=True)
+def _vec_add(a, b, n):
+    out = np.empty_like(a)
+    for i in range(a.shape[0]):
+        _add_mod(a[i], b[i], out[i], n)
+    return out
+
+
+@njit(cache=True)
+def _vec_sub(a, b, n):
+    out = np.empty_like(a)
+    for i in range(a.shape[0]):
+        _sub_mod(a[i], b[i], out[i], n)
+    return out
+
+
+@njit(cache=True)
+def _vec_mul(a, b, n, n_prime):
+    out = np.empty_like(a)
+    t = np.zeros(LIMBS + 2, dtype=np.uint64)
+    for i in range(a.shape[0]):
+        _mont_mul(a[i], b[i], out[i], t, n, n_prime)
+    return out
+
+
+# Left-to-right square and multiply. `bits` is the exponent, most significant bit first.
+@njit(cache=True)
+def _vec_pow(a, bits, one, n, n_prime):
+    out = np.empty_like(a)
+    t = np.zeros(LIMBS + 2, dtype=np.uint64)
+    acc = np.empty(LIMBS, dtype=np.uint64)
+    for i in range(a.shape[0]):
+        acc[:] = one
+        for bit in bits:
+            _mont_mul(acc, acc, acc, t, n, n_prime)
+            if bit:
+                _mont_mul(acc, a[i], acc, t, n, n_prime)
+        out[i] = acc
+    return out
+
+
+# (N x K) @ (K x M), each element 4 limbs
+@njit(cache=True)
+def _matmul(a, b, n, n_prime):
+    rows, inner, cols = a.shape[0], a.shape[1], b.shape[1]
+    out = np.zeros((rows, cols, LIMBS), dtype=np.uint64)
+    t = np.zeros(LIMBS + 2, dtype=np.uint64)
+    product = np.empty(LIMBS, dtype=np.uint64)
+    for i in range(rows):
+        for k in range(inner):
+            if a[i, k, 0] == 0 and a[i, k, 1] == 0 and a[i, k, 2] == 0 and a[i, k, 3] == 0:
+                continue  # R1CS matrices are mostly zeros
+            for j in range(cols):
+                _mont_mul(a[i, k], b[k, j], product, t, n, n_prime)
+                _add_mod(out[i, j], product, out[i, j], n)
+    return out
+
+
+# CSR matrix-vector product: out[row] = sum_k data[k] * w[indices[k]] over the row's entries
+@njit(cache=True)
+def _csr_matvec(indptr, indices, data, w, n, n_prime):
+    rows = indptr.shape[0] - 1
+    out = np.zeros((rows, LIMBS), dtype=np.uint64)
+    t = np.zeros(LIMBS + 2, dtype=np.uint64)
+    product = np.empty(LIMBS, dtype=np.uint64)
+    for row in range(rows):
+        for k in range(indptr[row], indptr[row + 1]):
+            _mont_mul(data[k], w[indices[k]], product, t, n, n_prime)
+            _add_mod(out[row], product, out[row], n)
+    return out
+
+
+# *** Conversions ***
+def _ints_to_limbs(values):
+    values = np.array([int(v) % curve_order for v in np.ravel(np.asarray(values, dtype=object))], dtype=object)
+    limbs = np.empty((len(values), LIMBS), dtype=np.uint64)
+    for k in range(LIMBS):
+        limbs[:, k] = ((values >> (64 * k)) & MASK64).astype(np.uint64)
+    return limbs
+
+
+def _exponent_bits(e):
+    return np.array([int(b) for b in bin(e)[2:]], dtype=np.uint8)
+
+
+class Fr:
+    # `limbs`: (..., 4) uint64 array, already in Montgomery form
+    def __init__(self, limbs):
+        self.limbs = limbs
+
+    @classmethod
+    def from_ints(cls, values):
+        shape = np.shape(np.asarray(values, dtype=object))
+        plain = _ints_to_limbs(values)
+        mont = _vec_mul(plain, np.broadcast_to(R2, plain.shape).copy(), MODULUS, N_PRIME)
+        return cls(mont.reshape(shape + (LIMBS,)))
+
+    @classmethod
+    def zeros(cls, shape):
+        shape = (shape,) if isinstance(shape, int) else tuple(shape)
+        return cls(np.zeros(shape + (LIMBS,), dtype=np.uint64))
+
+    @classmethod
+    def ones(cls, shape):
+        shape = (shape,) if isinstance(shape, int) else tuple(shape)
+        return cls(np.broadcast_to(MONT_ONE, shape + (LIMBS,)).copy())
+
+    def to_ints(self):
+        flat = self.limbs.reshape(-1, LIMBS)
+        plain = _vec_mul(flat, np.broadcast_to(PLAIN_ONE, flat.shape).copy(), MODULUS, N_PRIME)
+        return limbs_to_ints(plain).reshape(self.shape)
+
+    @property
+    def shape(self):
+        return self.limbs.shape[:-1]
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __getitem__(self, index):
+        return Fr(self.limbs[index])
+
+    def __setitem__(self, index, value):
+        self.limbs[index] = value.limbs
+
+    def copy(self):
+        return Fr(self.limbs.copy())
+
+    def __repr__(self):
+        return f"Fr({self.to_ints().tolist()})"
+
+    # Broadcasts both operands to a common shape and flattens them to (N, 4) for the kernels
+    def _binary(self, other, kernel, *args):
+        other = other if isinstance(other, Fr) else Fr.from_ints(other)
+        shape = np.broadcast_shapes(self.shape, other.shape)
+        a = np.ascontiguousarray(np.broadcast_to(self.limbs, shape + (LIMBS,))).reshape(-1, LIMBS)
+        b = np.ascontiguousarray(np.broadcast_to(other.limbs, shape + (LIMBS,))).reshape(-1, LIMBS)
+        return Fr(kernel(a, b, *args).reshape(shape + (LIMBS,)))
+
+    def __add__(self, other):
+        return self._binary(other, _vec_add, MODULUS)
+
+    def __sub__(self, other):
+        return self._binary(other, _vec_sub, MODULUS)
+
+    def __mul__(self, other):
+        return self._binary(other, _vec_mul, MODULUS, N_PRIME)
+
+    __radd__ = __add__
+    __rmul__ = __mul__
+
+    def __rsub__(self, other):
+        return Fr.from_ints(other) - self
+
+    def __neg__(self):
+        return Fr.zeros(self.shape) - self
+
+    def __pow__(self, exponent):
+        if exponent < 0:
+            return self.inverse() ** (-exponent)
+        flat = np.ascontiguousarray(self.limbs).reshape(-1, LIMBS)
+        out = _vec_pow(flat, _exponent_bits(exponent), MONT_ONE, MODULUS, N_PRIME)
+        return Fr(out.reshape(self.limbs.shape))
+
+    # Fermat: x^(r - 2) = x^-1
+    def inverse(self):
+        if np.any(np.all(self.limbs == 0, axis=-1)):
+            raise ZeroDivisionError("0 has no inverse")
+        return self ** (curve_order - 2)
+
+    def __truediv__(self, other):
+        other = other if isinstance(other, Fr) else Fr.from_ints(other)
+        return self * other.inverse()
+
+    def __eq__(self, other):
+        other = other if isinstance(other, Fr) else Fr.from_ints(other)
+        return np.all(self.limbs == other.limbs, axis=-1)
+
+    def __matmul__(self, other):
+        a = self.limbs if self.limbs.ndim == 3 else self.limbs[np.newaxis]
+        b = other.limbs if other.limbs.ndim == 3 else other.limbs[:, np.newaxis]
+        out = _matmul(np.ascontiguousarray(a), np.ascontiguousarray(b), MODULUS, N_PRIME)
+        if self.limbs.ndim == 2:
+            out = out[0]
+        if other.limbs.ndim == 2:
+            out = out[..., 0, :]
+        return Fr(out)
+
+    @property
+    def T(self):
+        return Fr(np.swapaxes(self.limbs, 0, 1))
+
+
+# *** R1CS ***
+class FrSparseMatrix:
+    def __init__(self, sparse_matrix):
+        if sparse_matrix.modulus != curve_order:
+            raise ValueError("the matrix must be over curve_order")
+        self.shape = sparse_matrix.shape
+        self.indptr = sparse_matrix.indptr.astype(np.int64)
+        self.indices = sparse_matrix.indices.astype(np.int64)
+        self.data = Fr.from_ints(sparse_matrix.data) if sparse_matrix.nnz else Fr.zeros(0)
+
+    def matvec(self, w):
+        w = w if isinstance(w, Fr) else Fr.from_ints(w)
+        if len(w) != self.shape[1]:
+            raise ValueError(f"witness has length {len(w)}, expected {self.shape[1]}")
+        return Fr(_csr_matvec(self.indptr, self.indices, self.data.limbs, w.limbs, MODULUS, N_PRIME))
+
+
+def witness_products(r1cs, witness):
+    witness = witness if isinstance(witness, Fr) else Fr.from_ints(witness)
+    return tuple(FrSparseMatrix(M).matvec(witness) for M in (r1cs.L, r1cs.R, r1cs.O))
+
+
+def is_satisfied(r1cs, witness):
+    Lw, Rw, Ow = witness_products(r1cs, witness)
+    return bool(np.all(Lw * Rw == Ow))
+
+
+# *** QAP ***
+# Same construction as `qap.lagrange_basis`, for x = [1, ..., n]: Z(x) = prod (x - x_j), weights 1 / Z'(x_j), and
+# Z(x) / (x - x_j) for every j by synthetic division. Returns (xs, descending coefficients of Z, weights).
+def _domain(n):
+    xs = Fr.from_ints(list(range(1, n + 1)))
+    # Z(x) one factor at a time, descending coefficients: z * (x - x_j)
+    z = Fr.ones(1)
+    for j in range(n):
+        shifted = Fr(np.concatenate([z.limbs, np.zeros((1, LIMBS), dtype=np.uint64)]))
+        scaled = Fr(np.concatenate([np.zeros((1, LIMBS), dtype=np.uint64), z.limbs])) * xs[j]
+        z = shifted - scaled
+    # Z'(x_j) by Horner on all the x_j at once
+    derivative = z[:n] * Fr.from_ints(list(range(n, 0, -1)))
+    values = Fr.zeros(n)
+    for k in range(n):
+        values = values * xs + derivative[k]
+    return xs, z, values.inverse()
+
+
+_domain_cache = {}
+
+
+def domain(n):
+    if n not in _domain_cache:
+        _domain_cache[n] = _domain(n)
+    return _domain_cache[n]
+
+
+# Row j holds the descending coefficients of L_j(x)
+def lagrange_basis(n):
+    xs, z, weights = domain(n)
+    quotients = Fr.zeros((n, n))
+    q = Fr.ones(n)
+    quotients[:, 0] = q
+    for k in range(1, n):
+        q = xs * q + z[k]
+        quotients[:, k] = q
+    return quotients * weights[:, np.newaxis]
+
+
+_basis_cache = {}
+
+
+def domain_basis(n):
+    if n not in _basis_cache:
+        _basis_cache[n] = lagrange_basis(n)
+    return _basis_cache[n]
+
+
+# The sparse interpolation of `sparse_r1cs._interpolate_entries` on limbs: entry e is the value data[e] at
+# x = xs[rows[e]], entries are grouped by column, and column c is entries starts[c]:starts[c + 1]. Each entry runs
+# the synthetic division recurrence q_k = z_k + x q_(k-1) and adds weight * value * q_k into coefficient k of its
+# column, so the cost is nnz x n products and no n x n basis is built.
+@njit(cache=True)
+def _interpolate_csc(rows, data, starts, xs, z, weights, n, n_prime):
+    columns = starts.shape[0] - 1
+    size = xs.shape[0]
+    out = np.zeros((columns, size, LIMBS), dtype=np.uint64)
+    t = np.zeros(LIMBS + 2, dtype=np.uint64)
+    scaled = np.empty(LIMBS, dtype=np.uint64)
+    q = np.empty(LIMBS, dtype=np.uint64)
+    product = np.empty(LIMBS, dtype=np.uint64)
+    for c in range(columns):
+        for e in range(starts[c], starts[c + 1]):
+            x = xs[rows[e]]
+            _mont_mul(data[e], weights[rows[e]], scaled, t, n, n_prime)
+            _add_mod(out[c, 0], scaled, out[c, 0], n)          # q_0 = z_0 = 1
+            q[:] = z[0]
+            for k in range(1, size):
+                _mont_mul(q, x, q, t, n, n_prime)
+                _add_mod(q, z[k], q, n)
+                _mont_mul(scaled, q, product, t, n, n_prime)
+                _add_mod(out[c, k], product, out[c, k], n)
+    return out
+
+
+# Interpolates the non-zero columns of a `SparseMatrix` over curve_order. Returns (columns, coefficients): the
+# column indices, and one row of descending coefficients (as Fr) per column.
+def interpolate_sparse_columns(M):
+    if M.modulus != curve_order:
+        raise ValueError("the matrix must be over curve_order")
+    order = np.argsort(M.indices, kind="stable")               # CSR -> CSC
+    cols = M.indices[order].astype(np.int64)
+    columns, counts = np.unique(cols, return_counts=True)
+    starts = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+    rows = M.row_indices()[order].astype(np.int64)
+    data = Fr.from_ints(M.data[order]) if M.nnz else Fr.zeros(0)
+    xs, z, weights = domain(M.shape[0])
+    coeffs = _interpolate_csc(rows, data.limbs, starts, xs.limbs, z.limbs, weights.limbs, MODULUS, N_PRIME)
+    return columns, Fr(coeffs)
+
+
+# Row c: descending coefficients of the polynomial interpolating column c of M over [1, ..., n], like
+# `qap.interpolate_columns` (zero columns give zero rows). `M` is an integer matrix or a `SparseMatrix`; a dense
+# matrix is converted to CSR first, so the work only depends on its non-zero entries.
+def interpolate_columns(M):
+    if not isinstance(M, SparseMatrix):
+        M = SparseMatrix.from_dense(np.asarray(M), curve_order)
+    columns, coeffs = interpolate_sparse_columns(M)
+    result = Fr.zeros((M.shape[1], M.shape[0]))
+    result[columns] = coeffs
+    return result
+
+
+# Descending coefficients of sum_c w_c u_c(x), as the interpolation of M w (see `SparseR1CS.witness_polynomial`)
+def witness_polynomial(M, witness):
+    Mw = FrSparseMatrix(M).matvec(witness)
+    rows = np.flatnonzero(np.any(Mw.limbs != 0, axis=1)).astype(np.int64)
+    xs, z, weights = domain(M.shape[0])
+    coeffs = _interpolate_csc(rows, Mw.limbs[rows], np.array([0, len(rows)], dtype=np.int64), xs.limbs, z.limbs,
+                              weights.limbs, MODULUS, N_PRIME)
+    return Fr(coeffs[0])
+
+
+if __name__ == "__main__":
+    import random
+    import time
+    import galois
+    from qap import r1cs_to_qap
+    from sparse_r1cs import SparseR1CS
+
+    # *** Against Python ints ***
+    rng = random.Random(0)
+    values_a = [0, 1, 2, curve_order - 1, curve_order - 2, 2**64 - 1, 2**192 + 5] + \
+               [rng.randrange(curve_order) for _ in range(200)]
+    values_b = [rng.randrange(1, curve_order) for _ in values_a]
+    a, b = Fr.from_ints(values_a), Fr.from_ints(values_b)
+    assert a.to_ints().tolist() == values_a
+    assert (a + b).to_ints().tolist() == [(x + y) % curve_order for x, y in zip(values_a, values_b)]
+    assert (a - b).to_ints().tolist() == [(x - y) % curve_order for x, y in zip(values_a, values_b)]
+    assert (a * b).to_ints().tolist() == [x * y % curve_order for x, y in zip(values_a, values_b)]
+    assert (-a).to_ints().tolist() == [-x % curve_order for x in values_a]
+    assert (a ** 5).to_ints().tolist() == [pow(x, 5, curve_order) for x in values_a]
+    assert b.inverse().to_ints().tolist() == [pow(y, -1, curve_order) for y in values_b]
+    assert (a / b).to_ints().tolist() == [x * pow(y, -1, curve_order) % curve_order for x, y in zip(values_a, values_b)]
+    assert np.all(a * b / b == a)
+
+    M = [[rng.randrange(curve_order) for _ in range(5)] for _ in range(3)]
+    v = [rng.randrange(curve_order) for _ in range(5)]
+    expected = [sum(x * y for x, y in zip(row, v)) % curve_order for row in M]
+    assert (Fr.from_ints(M) @ Fr.from_ints(v)).to_ints().tolist() == expected
+
+    # *** R1CS and QAP against the Python int / galois paths ***
+    GF = galois.GF(curve_order, primitive_element=5, verify=False)
+    L = np.array([[0, 0, 1, 0, 0, 0, 0], [0, 0, 0, 0, 1, 0, 0], [0, 0, 0, -5, 0, 0, 0], [0, 0, 0, 0, 0, 0, 1]])
+    R = np.array([[0, 0, 1, 0, 0, 0, 0], [0, 0, 0, 0, 1, 0, 0], [0, 0, 0, 1, 0, 0, 0], [0, 0, 0, 0, 1, 0, 0]])
+    O = np.array([[0, 0, 0, 0, 1, 0, 0], [0, 0, 0, 0, 0, 1, 0], [0, 0, 0, 0, 0, 0, 1], [0, 1, 0, 0, 0, -1, 0]])
+    x, y = 4, curve_order - 2
+    v1 = x * x % curve_order
+    v2 = v1 * v1 % curve_order
+    v3 = -5 * y * y % curve_order
+    witness = [1, (v3 * v1 + v2) % curve_order, x, y, v1, v2, v3]
+    r1cs = SparseR1CS.from_dense(L, R, O, curve_order)
+    assert is_satisfied(r1cs, witness)
+    assert not is_satisfied(r1cs, witness[:6] + [v3 + 1])
+    U, _, _ = r1cs_to_qap(L, R, O, GF)
+    assert interpolate_columns(r1cs.L).to_ints().tolist() == [[int(c) for c in row] for row in U]
+
+    # *** Timing ***
+    n = 100_000
+    big_a = [rng.randrange(curve_order) for _ in range(n)]
+    big_b = [rng.randrange(curve_order) for _ in range(n)]
+    start = time.perf_counter()
+    expected = [(x * y + x) % curve_order for x, y in zip(big_a, big_b)]
+    int_time = time.perf_counter() - start
+    fa, fb = Fr.from_ints(big_a), Fr.from_ints(big_b)
+    start = time.perf_counter()
+    result = fa * fb + fa
+    limb_time = time.perf_counter() - start
+    assert result.to_ints().tolist() == expected
+    print(f"{n} x (a * b + a): Python ints {int_time:.3f}s, limbs {limb_time:.3f}s")
+
+    n, m = 64, 128
+    dense = np.random.default_rng(0).integers(-3, 4, size=(n, m)) * (np.random.default_rng(1).random((n, m)) < 0.05)
+    interpolate_columns(dense[:2, :2])  # compile
+    _domain_cache.clear()
+    start = time.perf_counter()
+    expected = r1cs_to_qap(dense, dense, dense, GF)[0]
+    galois_time = time.perf_counter() - start
+    start = time.perf_counter()
+    result = interpolate_columns(dense)
+    limb_time = time.perf_counter() - start
+    assert result.to_ints().tolist() == [[int(c) for c in row] for row in expected]
+    print(f"{n} x {m} column interpolation over curve_order: galois (x3 matrices) {galois_time:.3f}s, "
+          f"limbs {limb_time:.3f}s")
+
+    # *** Through the backend parameter of `qap.py` and `sparse_r1cs.py` ***
+    assert all((a == b).all() for a, b in zip(r1cs_to_qap(L, R, O, GF, backend="limbs"), r1cs_to_qap(L, R, O, GF)))
+    columns = r1cs.interpolate_columns(r1cs.L, GF, backend="limbs")
+    assert sorted(columns) == [2, 3, 4, 6] and all((coeffs == U[c]).all() for c, coeffs in columns.items())
+    assert all((a == b).all() for a, b in zip(r1cs.qap_polynomials(witness, GF, backend="limbs"),
+                                              r1cs.qap_polynomials(witness, GF)))
+    try:
+        r1cs_to_qap(L, R, O, galois.GF(79), backend="limbs")
+        assert False, "limb backend accepted GF(79)"
+    except ValueError:
+        pass
+
+    # A chain of n multiplications (3 non-zero entries per constraint) over curve_order, straight from CSR
+    n = 512
+    rows = np.arange(n)
+    k = np.random.default_rng(2).integers(0, 2, size=n)
+    chain = SparseR1CS.from_coo(n, n + 2, (rows, k, [1] * n), (rows, rows + 1, [1] * n), (rows, rows + 2, [1] * n),
+                                curve_order)
+    start = time.perf_counter()
+    python_columns = chain.interpolate_columns(chain.L, GF)
+    python_time = time.perf_counter() - start
+    start = time.perf_counter()
+    limb_columns = chain.interpolate_columns(chain.L, GF, backend="limbs")
+    limb_time = time.perf_counter() - start
+    assert all((limb_columns[c] == coeffs).all() for c, coeffs in python_columns.items())
+    print(f"{n} constraints, sparse column interpolation over curve_order: Python ints {python_time:.3f}s, "
+          f"limbs {limb_time:.3f}s")
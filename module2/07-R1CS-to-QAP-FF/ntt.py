@@ -0,0 +1,295 @@
+# *** NTT-based polynomial arithmetic over the BN128 scalar field ***
+# `example.py` interpolates over x = [1, 2, 3, 4], builds t(x) from linear factors, and computes
+# h(x) = (U(x)V(x) - W(x)) // t(x) with schoolbook multiplication and long division. All of that is O(n^2).
+#
+# If we interpolate over the n-th roots of unity {1, w, w^2, ..., w^(n-1)} instead (n a power of two), then:
+#   - the vanishing polynomial is simply Z(x) = x^n - 1,
+#   - evaluating at / interpolating from all n roots of unity is the Number Theoretic Transform (NTT / inverse NTT),
+#     an FFT over a finite field, which is O(n log n).
+#
+# The scalar field of BN128 (`curve_order`) has roots of unity of order up to 2^28, since curve_order - 1 is
+# divisible by 2^28. 5 generates the whole multiplicative group, so 5^((r - 1) / n) is a primitive n-th root of unity.
+# `Domain` also takes another modulus and generator, and then checks both of these facts instead of assuming them.
+#
+# *** h(x) without long division ***
+# U(x)V(x) - W(x) has degree up to 2n - 2, so we cannot evaluate it on the domain itself (it is 0 there - that's
+# the whole point). Instead we evaluate on a coset g * {1, w, ..., w^(n-1)}, where Z(g w^i) = g^n - 1 is the same
+# non-zero constant for every i:
+#   h(g w^i) = (U(g w^i) V(g w^i) - W(g w^i)) / (g^n - 1)
+# h has degree at most n - 2, so these n values determine it, and one inverse coset NTT gives its coefficients.
+#
+# Unlike `galois.Poly`, the coefficient lists here are in ASCENDING order (constant term first), which is the natural
+# order for the NTT. `to_galois_poly` converts to a `galois.Poly`.
+#
+# Usage:
+#   from ntt import Domain
+#   domain = Domain(4)                                 # n = 4 roots of unity in the BN128 scalar field
+#   coeffs = domain.interpolate(values)                # values at 1, w, w^2, w^3 -> coefficients
+#   values = domain.evaluate(coeffs)                   # coefficients -> values at 1, w, w^2, w^3
+#   h = domain.compute_h(a_evals, b_evals, c_evals)    # h(x) = (A(x)B(x) - C(x)) / (x^n - 1)
+import galois
+from py_ecc.bn128 import curve_order
+
+MULTIPLICATIVE_GENERATOR = 5
+TWO_ADICITY = 28
+
+
+def root_of_unity(n, modulus=curve_order, generator=MULTIPLICATIVE_GENERATOR):
+    if n & (n - 1) != 0 or n == 0:
+        raise ValueError(f"domain size must be a power of two, got {n}")
+    if (modulus - 1) % n != 0:
+        raise ValueError(f"the field has no root of unity of order {n}")
+    return pow(generator, (modulus - 1) // n, modulus)
+
+
+def next_power_of_two(n):
+    return 1 if n <= 1 else 1 << (n - 1).bit_length()
+
+
+# Permutes `values` (length a power of two) into bit-reversed index order, the input order of the iterative NTT
+def bit_reverse(values):
+    n = len(values)
+    bits = n.bit_length() - 1
+    result = list(values)
+    for i in range(n):
+        j = int(format(i, f"0{bits}b")[::-1], 2) if bits else 0
+        if i < j:
+            result[i], result[j] = result[j], result[i]
+    return result
+
+
+# Iterative radix-2 Cooley-Tukey. Evaluates the polynomial with ascending `coeffs` at omega^0, ..., omega^(n-1).
+def ntt(coeffs, omega, modulus=curve_order):
+    n = len(coeffs)
+    a = bit_reverse([c % modulus for c in coeffs])
+    length = 2
+    while length <= n:
+        w_len = pow(omega, n // length, modulus)
+        half = length // 2
+        twiddles = [1] * half
+        for k in range(1, half):
+            twiddles[k] = (twiddles[k - 1] * w_len) % modulus
+        for start in range(0, n, length):
+            for k in range(half):
+                u = a[start + k]
+                v = (a[start + k + half] * twiddles[k]) % modulus
+                a[start + k] = (u + v) % modulus
+                a[start + k + half] = (u - v) % modulus
+        length <<= 1
+    return a
+
+
+def intt(values, omega, modulus=curve_order):
+    n = len(values)
+    n_inv = pow(n, -1, modulus)
+    coeffs = ntt(values, pow(omega, -1, modulus), modulus)
+    return [(c * n_inv) % modulus for c in coeffs]
+
+
+def to_galois_poly(coeffs, GF):
+    return galois.Poly(list(reversed([int(c) for c in coeffs])), field=GF)
+
+
+class Domain:
+    def __init__(self, n, modulus=curve_order, generator=MULTIPLICATIVE_GENERATOR):
+        if modulus == curve_order and n > 1 << TWO_ADICITY:
+            raise ValueError(f"domain size {n} is larger than 2^{TWO_ADICITY}, the largest power of two dividing "
+                             f"curve_order - 1")
+        self.n = n
+        self.modulus = modulus
+        self.omega = root_of_unity(n, modulus, generator)
+        # 5 and 2^28 are facts about curve_order. For any other modulus or generator, check what the NTT and the coset
+        # rely on: omega has order exactly n, and the coset shift is not itself an n-th root of unity.
+        if n > 1 and pow(self.omega, n // 2, modulus) == 1:
+            raise ValueError(f"{generator}^(({modulus} - 1) / {n}) is not a primitive {n}-th root of unity "
+                             f"mod {modulus}")
+        if pow(generator, n, modulus) == 1:
+            raise ValueError(f"coset shift {generator} is an {n}-th root of unity mod {modulus}, the coset would be H")
+        # The coset shift: the multiplicative generator is never an n-th root of unity, so g * H doesn't overlap H
+        self.coset_shift = generator % modulus
+        self._coset_powers = None
+
+    @classmethod
+    def for_constraints(cls, num_constraints, modulus=curve_order):
+        return cls(next_power_of_two(num_constraints), modulus)
+
+    def elements(self):
+        result = [1] * self.n
+        for i in range(1, self.n):
+            result[i] = (result[i - 1] * self.omega) % self.modulus
+        return result
+
+    def pad(self, values):
+        values = [int(v) % self.modulus for v in values]
+        if len(values) > self.n:
+            raise ValueError(f"{len(values)} values don't fit a domain of size {self.n}")
+        return values + [0] * (self.n - len(values))
+
+    def evaluate(self, coeffs):
+        return ntt(self.pad(coeffs), self.omega, self.modulus)
+
+    def interpolate(self, values):
+        return intt(self.pad(values), self.omega, self.modulus)
+
+    # g^0, g^1, ..., g^(n-1)
+    def coset_powers(self):
+        if self._coset_powers is None:
+            powers = [1] * self.n
+            for i in range(1, self.n):
+                powers[i] = (powers[i - 1] * self.coset_shift) % self.modulus
+            self._coset_powers = powers
+        return self._coset_powers
+
+    # Values of the polynomial at g * w^i: scale coefficient i by g^i, then a regular NTT.
+    def coset_evaluate(self, coeffs):
+        p = self.modulus
+        scaled = [(c * s) % p for c, s in zip(self.pad(coeffs), self.coset_powers())]
+        return ntt(scaled, self.omega, p)
+
+    def coset_interpolate(self, values):
+        p = self.modulus
+        coeffs = intt(self.pad(values), self.omega, p)
+        g_inv = pow(self.coset_shift, -1, p)
+        scale = 1
+        for i in range(self.n):
+            coeffs[i] = (coeffs[i] * scale) % p
+            scale = (scale * g_inv) % p
+        return coeffs
+
+    # Z(x) = x^n - 1, ascending coefficients
+    def vanishing_polynomial(self):
+        return [self.modulus - 1] + [0] * (self.n - 1) + [1]
+
+    def evaluate_vanishing(self, x):
+        return (pow(x, self.n, self.modulus) - 1) % self.modulus
+
+    # *** Polynomial product ***
+    # Both inputs (ascending coefficients) are evaluated on a domain big enough for the product, multiplied
+    # pointwise, and interpolated back.
+    def multiply(self, a, b):
+        return multiply_polynomials(a, b, self.modulus)
+
+    # Exact division by Z(x) = x^n - 1 in O(deg): q[i] = p[i + n] + q[i + n]. Raises if there is a remainder.
+    def divide_by_vanishing(self, coeffs):
+        p = self.modulus
+        coeffs = [int(c) % p for c in coeffs]
+        n = self.n
+        if len(coeffs) <= n:
+            if any(coeffs):
+                raise ValueError("polynomial is not divisible by the vanishing polynomial")
+            return [0]
+        quotient = [0] * (len(coeffs) - n)
+        for i in range(len(quotient) - 1, -1, -1):
+            quotient[i] = (coeffs[i + n] + (quotient[i + n] if i + n < len(quotient) else 0)) % p
+        remainder = [(coeffs[i] + quotient[i]) % p if i < len(quotient) else coeffs[i] for i in range(n)]
+        if any(remainder):
+            raise ValueError("polynomial is not divisible by the vanishing polynomial")
+        return quotient
+
+    # *** h(x) from evaluations on the domain ***
+    # a_evals, b_evals, c_evals are A(w^i), B(w^i), C(w^i), e.g. (Lw)_i, (Rw)_i, (Ow)_i for a satisfied R1CS padded
+    # to n rows. Returns the ascending coefficients of h(x) = (A(x)B(x) - C(x)) / (x^n - 1), degree <= n - 2.
+    def compute_h(self, a_evals, b_evals, c_evals):
+        p = self.modulus
+        a_coset = self.coset_evaluate(self.interpolate(a_evals))
+        b_coset = self.coset_evaluate(self.interpolate(b_evals))
+        c_coset = self.coset_evaluate(self.interpolate(c_evals))
+        z_inv = pow(self.evaluate_vanishing(self.coset_shift), -1, p)
+        h_coset = [((a * b - c) * z_inv) % p for a, b, c in zip(a_coset, b_coset, c_coset)]
+        return self.coset_interpolate(h_coset)
+
+
+def multiply_polynomials(a, b, modulus=curve_order):
+    if not a or not b:
+        return []
+    size = len(a) + len(b) - 1
+    n = next_power_of_two(size)
+    omega = root_of_unity(n, modulus)
+    fa = ntt(list(a) + [0] * (n - len(a)), omega, modulus)
+    fb = ntt(list(b) + [0] * (n - len(b)), omega, modulus)
+    return intt([(x * y) % modulus for x, y in zip(fa, fb)], omega, modulus)[:size]
+
+
+if __name__ == "__main__":
+    import random
+    import time
+
+    p = curve_order
+    GF = galois.GF(p, primitive_element=MULTIPLICATIVE_GENERATOR, verify=False)
+
+    # NTT and inverse NTT are inverses, and the NTT really evaluates the polynomial at the roots of unity
+    domain = Domain(8)
+    coeffs = [random.randrange(p) for _ in range(8)]
+    values = domain.evaluate(coeffs)
+    assert domain.interpolate(values) == coeffs
+    poly = to_galois_poly(coeffs, GF)
+    assert [int(poly(GF(x))) for x in domain.elements()] == values
+    assert pow(domain.omega, 8, p) == 1 and pow(domain.omega, 4, p) != 1
+
+    try:
+        Domain(2**29)
+        assert False, "domain larger than 2^28 accepted"
+    except ValueError:
+        pass
+
+    # Other fields need a generator of the right order: 3 generates GF(17)^*, 2 and 16 have order 8 and 2. In GF(13),
+    # 5 gives a 4th root of unity but has order 4 itself, so the coset 5 * H would be H.
+    small = Domain(8, modulus=17, generator=3)
+    assert small.interpolate(small.evaluate([1, 2, 3])) == [1, 2, 3, 0, 0, 0, 0, 0]
+    for n, modulus, generator in ((8, 17, 2), (8, 17, 16), (4, 13, 5)):
+        try:
+            Domain(n, modulus, generator)
+            assert False, f"generator {generator} accepted"
+        except ValueError as e:
+            print(e)
+
+    # Coset evaluation
+    g = domain.coset_shift
+    assert domain.coset_evaluate(coeffs) == [int(poly(GF(g * x % p))) for x in domain.elements()]
+    assert domain.coset_interpolate(domain.coset_evaluate(coeffs)) == coeffs
+
+    # Polynomial product against galois
+    a = [random.randrange(p) for _ in range(5)]
+    b = [random.randrange(p) for _ in range(7)]
+    assert to_galois_poly(multiply_polynomials(a, b), GF) == to_galois_poly(a, GF) * to_galois_poly(b, GF)
+
+    # Division by x^n - 1
+    q = [random.randrange(p) for _ in range(6)]
+    product = domain.multiply(q, domain.vanishing_polynomial())
+    assert domain.divide_by_vanishing(product) == q
+
+    # *** The R1CS from `example.py`, over the BN128 scalar field and the 4th roots of unity ***
+    # Constraint i is placed at x = w^i instead of x = i + 1; the QAP is just as valid.
+    L = [[0, 0, 1, 0, 0, 0, 0], [0, 0, 0, 0, 1, 0, 0], [0, 0, 0, -5, 0, 0, 0], [0, 0, 0, 0, 0, 0, 1]]
+    R = [[0, 0, 1, 0, 0, 0, 0], [0, 0, 0, 0, 1, 0, 0], [0, 0, 0, 1, 0, 0, 0], [0, 0, 0, 0, 1, 0, 0]]
+    O = [[0, 0, 0, 0, 1, 0, 0], [0, 0, 0, 0, 0, 1, 0], [0, 0, 0, 0, 0, 0, 1], [0, 1, 0, 0, 0, -1, 0]]
+    x, y = 4, p - 2
+    v1 = x * x % p
+    v2 = v1 * v1 % p
+    v3 = (p - 5) * y * y % p
+    z = (v3 * v1 + v2) % p
+    witness = [1, z, x, y, v1, v2, v3]
+
+    def matvec(M, w):
+        return [sum(m * wi for m, wi in zip(row, w)) % p for row in M]
+
+    domain = Domain.for_constraints(len(L))
+    a_evals, b_evals, c_evals = matvec(L, witness), matvec(R, witness), matvec(O, witness)
+    h = domain.compute_h(a_evals, b_evals, c_evals)
+
+    # U(x)V(x) - W(x) == h(x)Z(x)
+    A = to_galois_poly(domain.interpolate(a_evals), GF)
+    B = to_galois_poly(domain.interpolate(b_evals), GF)
+    C = to_galois_poly(domain.interpolate(c_evals), GF)
+    Z = to_galois_poly(domain.vanishing_polynomial(), GF)
+    assert A * B - C == to_galois_poly(h, GF) * Z
+
+    # *** Timing: h(x) for a random satisfied "R1CS" with 2^12 constraints ***
+    n = 2**12
+    a_evals = [random.randrange(p) for _ in range(n)]
+    b_evals = [random.randrange(p) for _ in range(n)]
+    c_evals = [a * b % p for a, b in zip(a_evals, b_evals)]
+    domain = Domain(n)
+    start = time.perf_counter()
+    h = domain.compute_h(a_evals, b_evals, c_evals)
+    print(f"h(x) for n = {n} constraints with coset NTTs: {time.perf_counter() - start:.3f}s")
@@ -0,0 +1,165 @@
+# *** Vectorized R1CS to QAP conversion ***
+# `example.py` interpolates every column of L, R and O separately:
+#   np.apply_along_axis(interpolate_column, 0, L_galois)
+# and every call to `galois.lagrange_poly` rebuilds the Lagrange basis for the same x values [1, 2, ..., n].
+#
+# Interpolation is linear: if the column c holds the values (M[1][c], ..., M[n][c]) at x = 1, ..., n, then
+#   u_c(x) = M[1][c] * L_1(x) + M[2][c] * L_2(x) + ... + M[n][c] * L_n(x)
+# where L_j(x) is the Lagrange basis polynomial that is 1 at x_j and 0 at every other x_i. Put the coefficients of
+# every L_j(x) in the rows of a matrix B (this is the inverse of the Vandermonde matrix, transposed), and ALL the
+# column polynomials come out of a single matrix multiplication:
+#   U = L^T @ B      (row c of U holds the coefficients of u_c(x))
+#
+# B only depends on the field and the x values, so it is built once per (field, n) and cached.
+#
+# Coefficient rows are in descending order (highest power first), the same as `galois.Poly` and the SRS in
+# `08-Trusted-Setup/01_Trusted_Setup.md`, so `galois.Poly(U[c])` is u_c(x).
+#
+# Usage:
+#   from qap import r1cs_to_qap, coefficients_to_polys
+#   U, V, W = r1cs_to_qap(L, R, O, GF)         # (columns x constraints) coefficient matrices over GF
+#   u_polynomials = coefficients_to_polys(U)   # the same polynomials as the np.apply_along_axis version
+#   r1cs_to_qap(L, R, O, GF, backend="limbs")  # GF(curve_order) only: numba limb arithmetic, see `fr_limbs.py`
+import galois
+import numpy as np
+
+
+# *** Building the Lagrange basis ***
+# Z(x) = (x - x_1)(x - x_2)...(x - x_n)
+# L_j(x) = w_j * Z(x) / (x - x_j), with w_j = 1 / Z'(x_j)
+# Z(x) / (x - x_j) is computed for every j at once with synthetic division: q_0 = z_0, q_k = z_k + x_j * q_{k-1}.
+def lagrange_basis(GF, xs):
+    xs = GF(xs)
+    n = len(xs)
+    Z = galois.Poly.Roots(xs, field=GF)
+    weights = np.reciprocal(Z.derivative()(xs))
+
+    z = Z.coeffs  # descending, length n + 1, z[0] = 1
+    quotients = GF.Zeros((n, n))
+    q = GF.Zeros(n) + z[0]
+    quotients[:, 0] = q
+    for k in range(1, n):
+        q = z[k] + xs * q
+        quotients[:, k] = q
+    return quotients * weights[:, np.newaxis]
+
+
+_basis_cache = {}
+
+
+# The basis for the R1CS constraint domain x = [1, 2, ..., n], cached per (field, n).
+def domain_basis(GF, n):
+    key = (GF.order, n)
+    if key not in _basis_cache:
+        _basis_cache[key] = lagrange_basis(GF, np.arange(1, n + 1))
+    return _basis_cache[key]
+
+
+# Converts an integer vector or matrix (possibly with negative entries) into a field array.
+def to_field(M, GF):
+    if isinstance(M, galois.FieldArray):
+        return M
+    M = np.asarray(M)
+    # `% GF.order` on an int64 array only works if the order fits in an int64, e.g. not for the BN128 scalar field
+    if M.dtype == object or GF.order > np.iinfo(np.int64).max:
+        return GF(np.array([int(v) % GF.order for v in M.ravel()], dtype=object).reshape(M.shape))
+    return GF(M % GF.order)
+
+
+BACKENDS = ("galois", "limbs")
+
+
+# The limb backend (`fr_limbs.py`) only exists for the BN128 scalar field. It is imported on first use, so the
+# galois path doesn't need numba.
+def check_backend(backend, order):
+    if backend not in BACKENDS:
+        raise ValueError(f"unknown backend {backend!r}, expected one of {BACKENDS}")
+    if backend == "limbs":
+        from py_ecc.bn128 import curve_order
+        if order != curve_order:
+            raise ValueError("the limb backend only supports the BN128 scalar field (curve_order)")
+
+
+# Row c of the result holds the coefficients of the polynomial that interpolates column c of M over [1, ..., n].
+# backend="limbs" interpolates the non-zero entries of M on 4 x 64-bit limbs instead of multiplying by the dense
+# basis (GF must be GF(curve_order)); the result is the same GF array.
+def interpolate_columns(M, GF, backend="galois"):
+    check_backend(backend, GF.order)
+    if backend == "limbs":
+        import fr_limbs
+        if isinstance(M, galois.FieldArray):
+            M = M.view(np.ndarray)
+        return GF(fr_limbs.interpolate_columns(M).to_ints())
+    M = to_field(M, GF)
+    return M.T @ domain_basis(GF, M.shape[0])
+
+
+def r1cs_to_qap(L, R, O, GF, backend="galois"):
+    return tuple(interpolate_columns(M, GF, backend) for M in (L, R, O))
+
+
+def coefficients_to_polys(coeffs):
+    return [galois.Poly(row) for row in coeffs]
+
+
+# t(x) = (x - 1)(x - 2)...(x - n)
+def vanishing_polynomial(GF, n):
+    return galois.Poly.Roots(GF(np.arange(1, n + 1)), field=GF)
+
+
+if __name__ == "__main__":
+    import time
+
+    # The R1CS from `example.py`
+    p = 79
+    GF = galois.GF(p)
+    L = np.array([
+        [0, 0, 1, 0, 0, 0, 0],
+        [0, 0, 0, 0, 1, 0, 0],
+        [0, 0, 0, -5, 0, 0, 0],
+        [0, 0, 0, 0, 0, 0, 1],
+    ])
+    R = np.array([
+        [0, 0, 1, 0, 0, 0, 0],
+        [0, 0, 0, 0, 1, 0, 0],
+        [0, 0, 0, 1, 0, 0, 0],
+        [0, 0, 0, 0, 1, 0, 0],
+    ])
+    O = np.array([
+        [0, 0, 0, 0, 1, 0, 0],
+        [0, 0, 0, 0, 0, 1, 0],
+        [0, 0, 0, 0, 0, 0, 1],
+        [0, 1, 0, 0, 0, -1, 0],
+    ])
+
+    def interpolate_column(col):
+        xs = GF(np.array([1, 2, 3, 4]))
+        return galois.lagrange_poly(xs, col)
+
+    U, V, W = r1cs_to_qap(L, R, O, GF)
+    for M, coeffs in [(L, U), (R, V), (O, W)]:
+        expected = np.apply_along_axis(interpolate_column, 0, GF((M + p) % p))
+        assert list(expected) == coefficients_to_polys(coeffs)
+
+    print(coefficients_to_polys(U)[3])  # 42x^3 + 22x^2 + 35x + 59
+    assert vanishing_polynomial(GF, 4) == galois.Poly([1, 69, 35, 29, 24], field=GF)
+
+    # *** Timing on a random sparse R1CS ***
+    GF = galois.GF(3221225473)  # 3 * 2^30 + 1
+    n, m = 32, 64
+    rng = np.random.default_rng(0)
+    M = rng.integers(-3, 4, size=(n, m)) * (rng.random((n, m)) < 0.05)
+    M_galois = GF(M % GF.order)
+    xs = GF(np.arange(1, n + 1))
+
+    start = time.perf_counter()
+    expected = [galois.lagrange_poly(xs, M_galois[:, c]) for c in range(m)]
+    column_time = time.perf_counter() - start
+
+    _basis_cache.clear()
+    start = time.perf_counter()
+    result = coefficients_to_polys(interpolate_columns(M, GF))
+    matrix_time = time.perf_counter() - start
+
+    assert expected == result
+    print(f"{n} x {m} matrix: lagrange_poly per column {column_time:.3f}s, basis + matmul {matrix_time:.3f}s")
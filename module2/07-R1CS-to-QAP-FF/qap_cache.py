@@ -0,0 +1,380 @@
+# *** Caching the QAP of a circuit ***
+# In `example.py` the polynomials u_i(x), v_i(x), w_i(x) and t(x) only depend on L, R, O and p, not on the witness.
+# When the same circuit is proved over and over, only these depend on the witness:
+#   u(x) = sum a_i u_i(x),  v(x) = sum a_i v_i(x),  w(x) = sum a_i w_i(x)     (a @ U, a @ V, a @ W)
+#   h(x) = (u(x) v(x) - w(x)) / t(x)
+#
+# `QAPCache` maps a circuit to its `CircuitQAP` (U, V, W from `qap.r1cs_to_qap` and t(x)). The key is a SHA-256 of
+# p, the matrix shapes and the entries of L, R and O reduced mod p, so -5 and p - 5 are the same circuit, and a copy
+# of the matrices hits the same entry. Over fields that fit in an int64 the entries are hashed as one int64 buffer, so
+# a lookup costs a vectorized pass over L, R and O; callers that look up the same circuit often can compute
+# `circuit_key` once and pass it as `key=`. Entries come back as arrays of the caller's GF class. The last `maxsize`
+# circuits are kept in memory (least recently used goes first). With `directory=...` every entry is also written to
+# `<directory>/<key>.npz`, so a new process doesn't have to interpolate again. Coefficients are stored as fixed-width
+# little-endian bytes, which also works for fields larger than an int64, such as the BN128 scalar field.
+#
+# Usage:
+#   from qap_cache import QAPCache, circuit_key
+#   cache = QAPCache(maxsize=32, directory=".qap_cache")   # directory is optional
+#   qap = cache.get(L, R, O, GF)      # interpolates on a miss, looks up on a hit
+#   key = circuit_key(L, R, O, GF)
+#   qap = cache.get(L, R, O, GF, key=key)   # no hashing
+#   u, v, w, h = qap.prove(witness)   # per-witness work only
+#   cache.hits, cache.misses
+#
+# *** Proving many witnesses at once ***
+# `qap.prove_batch(A)` takes one witness per row of A (proofs x variables). The polynomials are never built one by one:
+#   - u(x) for every witness is a row of A @ U (same for v and w): one matrix product per matrix.
+#   - h(x) has degree n - 2, so it is fixed by its values at the n - 1 points x = n + 1, ..., 2n - 1, where t(x) != 0:
+#       h(x_k) = (u(x_k) v(x_k) - w(x_k)) / t(x_k)
+#     The values of every u_i(x) at x = 1, ..., 2n - 1 are U @ X (X: Vandermonde matrix of those points), computed once
+#     per circuit, so the values of u(x) for every witness are A @ (U @ X). The first n values check the R1CS
+#     (u(i) v(i) = w(i) at every constraint), the other n - 1 give h(x_k), and one more product with the Lagrange basis
+#     of x = n + 1, ..., 2n - 1 (`qap.lagrange_basis`) turns them into coefficients.
+# Every step is a matrix product or an elementwise operation over the whole batch.
+#   u, v, w, h = qap.prove_batch(A)   # (proofs x n), (proofs x n), (proofs x n), (proofs x (n - 1)) coefficients
+import hashlib
+import os
+import tempfile
+from collections import OrderedDict
+
+import galois
+import numpy as np
+
+from qap import r1cs_to_qap, vanishing_polynomial, to_field, lagrange_basis
+
+DEFAULT_CACHE_SIZE = 32
+
+
+class CircuitQAP:
+    def __init__(self, GF, U, V, W, t):
+        self.GF = GF
+        self.U, self.V, self.W = U, V, W
+        self.t = t
+        self._batch_matrices = None
+
+    # The same QAP as arrays of `GF`. galois won't mix arrays of two field classes, even two GF(p) classes that only
+    # differ in their primitive element, so a cached entry is re-wrapped for a caller that built its own class.
+    def in_field(self, GF):
+        if GF is self.GF:
+            return self
+        U, V, W = (GF(M.view(np.ndarray)) for M in (self.U, self.V, self.W))
+        return CircuitQAP(GF, U, V, W, galois.Poly(GF(self.t.coeffs.view(np.ndarray))))
+
+    @property
+    def num_constraints(self):
+        return self.U.shape[1]
+
+    @property
+    def num_variables(self):
+        return self.U.shape[0]
+
+    # Descending coefficients of u(x), v(x), w(x) for the witness
+    def witness_polynomials(self, witness):
+        a = to_field(witness, self.GF)
+        return a @ self.U, a @ self.V, a @ self.W
+
+    # u(x), v(x), w(x) and h(x) as galois polynomials. Raises ValueError if t(x) doesn't divide u(x)v(x) - w(x),
+    # i.e. if the witness doesn't satisfy the R1CS.
+    def prove(self, witness):
+        u, v, w = (galois.Poly(c) for c in self.witness_polynomials(witness))
+        h, remainder = divmod(u * v - w, self.t)
+        if remainder != 0:
+            raise ValueError("t(x) does not divide u(x)v(x) - w(x)")
+        return u, v, w, h
+
+    # U @ X, V @ X, W @ X for the points x = 1, ..., 2n - 1, 1 / t(x) at x = n + 1, ..., 2n - 1, and the Lagrange basis
+    # for those n - 1 points. Built on the first batch and kept with the circuit. The points must be distinct in GF(p):
+    # if 2n - 1 >= p, some x = n + 1, ..., 2n - 1 wrap around onto the constraint domain, where t(x) = 0.
+    def _batch_setup(self):
+        if self._batch_matrices is None:
+            GF, n = self.GF, self.num_constraints
+            if 2 * n - 1 >= GF.order:
+                raise ValueError(f"batch proving {n} constraints needs {2 * n - 1} distinct points, GF({GF.order}) "
+                                 f"has {GF.order}")
+            xs = GF([i for i in range(1, 2 * n)])                # Python ints: the order may not fit an int64
+            X = xs[np.newaxis, :] ** np.arange(n - 1, -1, -1)[:, np.newaxis]      # descending powers
+            outside = xs[n:]
+            self._batch_matrices = (self.U @ X, self.V @ X, self.W @ X, np.reciprocal(self.t(outside)),
+                                    lagrange_basis(GF, outside) if n > 1 else GF.Zeros((0, 0)))
+        return self._batch_matrices
+
+    # Coefficient matrices of u(x), v(x), w(x) and h(x), one row per witness (row) of A. Raises ValueError naming the
+    # witnesses that don't satisfy the R1CS.
+    def prove_batch(self, A):
+        A = to_field(A, self.GF)
+        if A.ndim != 2 or A.shape[1] != self.num_variables:
+            raise ValueError(f"expected a (proofs x {self.num_variables}) witness matrix, got shape {A.shape}")
+        UX, VX, WX, t_inverse, basis = self._batch_setup()
+        n = self.num_constraints
+        u_values, v_values, w_values = A @ UX, A @ VX, A @ WX
+        quotient = u_values * v_values - w_values
+        bad = np.flatnonzero(np.any(quotient[:, :n] != 0, axis=1))
+        if len(bad):
+            raise ValueError(f"witnesses {bad.tolist()} do not satisfy the R1CS")
+        h = (quotient[:, n:] * t_inverse) @ basis
+        return A @ self.U, A @ self.V, A @ self.W, h
+
+
+def _field_bytes(GF):
+    return (GF.order.bit_length() + 7) // 8
+
+
+def _to_bytes(M, width):
+    flat = np.ravel(np.asarray(M, dtype=object))
+    return np.frombuffer(b"".join(int(v).to_bytes(width, "little") for v in flat), dtype=np.uint8)
+
+
+def _from_bytes(data, shape, width, GF):
+    raw = data.tobytes()
+    values = [int.from_bytes(raw[k:k + width], "little") for k in range(0, len(raw), width)]
+    return to_field(np.array(values, dtype=object).reshape(shape), GF)
+
+
+# The entries of M over GF as bytes. When the field fits in an int64 the whole array is converted at once; wider
+# fields (dtype=object) go through Python ints.
+def _matrix_bytes(M, GF):
+    if GF.order > np.iinfo(np.int64).max:
+        return _to_bytes(to_field(M, GF), _field_bytes(GF)).tobytes()
+    if isinstance(M, galois.FieldArray):
+        M = M.view(np.ndarray)
+    elif np.asarray(M).dtype == object:
+        M = to_field(M, GF).view(np.ndarray)
+    else:
+        M = np.asarray(M).astype(np.int64) % GF.order
+    return M.astype("<i8").tobytes()
+
+
+# Content hash of the circuit (L, R, O) over GF. For GF(p^m), m > 1, the irreducible polynomial is part of the key,
+# since it decides what the integer representation of an element means.
+def circuit_key(L, R, O, GF):
+    width = _field_bytes(GF)
+    digest = hashlib.sha256()
+    digest.update(GF.order.to_bytes(width, "little"))
+    if GF.degree > 1:
+        digest.update(str(GF.irreducible_poly).encode())
+    for M in (L, R, O):
+        digest.update(np.array(np.shape(M), dtype=np.int64).tobytes())
+        digest.update(_matrix_bytes(M, GF))
+    return digest.hexdigest()
+
+
+class QAPCache:
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE, directory=None):
+        self.maxsize = maxsize
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = self.misses = 0
+
+    # `key` can be a `circuit_key(L, R, O, GF)` computed earlier, to skip hashing the matrices on every lookup.
+    def get(self, L, R, O, GF, key=None):
+        key = circuit_key(L, R, O, GF) if key is None else key
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key].in_field(GF)
+
+        qap = self._load(key, GF)
+        if qap is None:
+            self.misses += 1
+            U, V, W = r1cs_to_qap(L, R, O, GF)
+            qap = CircuitQAP(GF, U, V, W, vanishing_polynomial(GF, U.shape[1]))
+            self._store(key, qap)
+        else:
+            self.hits += 1
+        self._entries[key] = qap
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return qap.in_field(GF)
+
+    # *** Disk persistence ***
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.npz")
+
+    def _load(self, key, GF):
+        if self.directory is None or not os.path.exists(self._path(key)):
+            return None
+        width = _field_bytes(GF)
+        with np.load(self._path(key)) as data:
+            if int.from_bytes(data["order"].tobytes(), "little") != GF.order:
+                return None
+            shape = tuple(data["shape"])
+            U, V, W = (_from_bytes(data[name], shape, width, GF) for name in ("U", "V", "W"))
+            t = galois.Poly(_from_bytes(data["t"], (shape[1] + 1,), width, GF))
+        return CircuitQAP(GF, U, V, W, t)
+
+    # Written to a temporary file first, so a concurrent reader never sees half an entry
+    def _store(self, key, qap):
+        if self.directory is None:
+            return
+        width = _field_bytes(qap.GF)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".npz")
+        with os.fdopen(fd, "wb") as f:
+            np.savez(f, order=_to_bytes([qap.GF.order], width), shape=np.array(qap.U.shape, dtype=np.int64),
+                     U=_to_bytes(qap.U, width), V=_to_bytes(qap.V, width), W=_to_bytes(qap.W, width),
+                     t=_to_bytes(qap.t.coeffs, width))
+        os.replace(tmp, self._path(key))
+
+
+if __name__ == "__main__":
+    import shutil
+    import time
+
+    # The R1CS from `example.py`
+    p = 79
+    GF = galois.GF(p)
+    L = np.array([[0, 0, 1, 0, 0, 0, 0], [0, 0, 0, 0, 1, 0, 0], [0, 0, 0, -5, 0, 0, 0], [0, 0, 0, 0, 0, 0, 1]])
+    R = np.array([[0, 0, 1, 0, 0, 0, 0], [0, 0, 0, 0, 1, 0, 0], [0, 0, 0, 1, 0, 0, 0], [0, 0, 0, 0, 1, 0, 0]])
+    O = np.array([[0, 0, 0, 0, 1, 0, 0], [0, 0, 0, 0, 0, 1, 0], [0, 0, 0, 0, 0, 0, 1], [0, 1, 0, 0, 0, -1, 0]])
+
+    def witness_for(x, y):
+        x, y = GF(x % p), GF(y % p)
+        v1 = x * x
+        v2 = v1 * v1
+        v3 = GF(-5 % p) * y * y
+        return GF(np.array([1, v3 * v1 + v2, x, y, v1, v2, v3]))
+
+    directory = tempfile.mkdtemp()
+    try:
+        cache = QAPCache(maxsize=2, directory=directory)
+        qap = cache.get(L, R, O, GF)
+        assert cache.get((L + p) % p, R.copy(), O, GF) is qap and (cache.hits, cache.misses) == (1, 1)
+        u, v, w, h = qap.prove(witness_for(4, -2))
+        assert h == galois.Poly([68, 17, 59], field=GF)   # same h(x) as `example.py`
+        assert u * v == w + h * qap.t
+        try:
+            qap.prove(witness_for(4, -2) + GF([0, 1, 0, 0, 0, 0, 0]))
+            assert False, "invalid witness accepted"
+        except ValueError:
+            pass
+
+        # A new cache (new process) finds the circuit on disk
+        reloaded = QAPCache(directory=directory).get(L, R, O, GF)
+        assert (reloaded.U == qap.U).all() and (reloaded.W == qap.W).all() and reloaded.t == qap.t
+
+        # LRU eviction
+        cache.get(L, O, R, GF)
+        cache.get(R, L, O, GF)
+        assert len(cache) == 2 and circuit_key(L, R, O, GF) not in cache
+
+        # A precomputed key skips the hashing; another GF(79) class gets arrays of its own class
+        key = circuit_key(L, R, O, GF)
+        assert circuit_key(L.astype(object), GF(R % p), O, GF) == key
+        assert cache.get(L, R, O, GF, key=key) is cache.get(L, R, O, GF)
+        GF_29 = galois.GF(p, primitive_element=29)
+        assert circuit_key(L, R, O, GF_29) == key
+        other = cache.get(L, R, O, GF_29)
+        assert type(other.U) is GF_29 and (other.U.view(np.ndarray) == qap.U.view(np.ndarray)).all()
+        assert other.prove(GF_29(witness_for(4, -2).view(np.ndarray)))[3] == galois.Poly([68, 17, 59], field=GF_29)
+
+        # Large field: entries wider than an int64 survive the round trip
+        from py_ecc.bn128 import curve_order
+        GF_bn = galois.GF(curve_order, primitive_element=5, verify=False)
+        big = QAPCache(directory=directory).get(L, R, O, GF_bn)
+        assert (QAPCache(directory=directory).get(L, R, O, GF_bn).V == big.V).all()
+
+        # *** Timing: proving the same random circuit for many witnesses ***
+        GF = galois.GF(3221225473)
+        n, m, proofs = 64, 128, 20
+        rng = np.random.default_rng(0)
+        A = rng.integers(-3, 4, size=(n, m)) * (rng.random((n, m)) < 0.05)
+        B = rng.integers(-3, 4, size=(n, m)) * (rng.random((n, m)) < 0.05)
+        witnesses = GF.Random((proofs, m), seed=1)
+        # Random witnesses don't satisfy this circuit, so only the witness polynomials are timed, not h(x)
+        cache = QAPCache()
+        cache.get(A, B, A, GF)                 # galois compiles its kernels on first use
+        cache.clear()
+
+        start = time.perf_counter()
+        for witness in witnesses:
+            U, V, W = r1cs_to_qap(A, B, A, GF)
+            t = vanishing_polynomial(GF, n)
+            witness @ U, witness @ V, witness @ W
+        uncached_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for witness in witnesses:
+            cache.get(A, B, A, GF).witness_polynomials(witness)
+        cached_time = time.perf_counter() - start
+        assert (cache.hits, cache.misses) == (proofs - 1, 1)
+        print(f"{proofs} witnesses, {n} x {m} circuit: interpolating every time {uncached_time:.3f}s, "
+              f"cached {cached_time:.3f}s")
+
+        start = time.perf_counter()
+        for _ in range(100):
+            cache.get(A, B, A, GF)
+        print(f"cache hit (hashing three {n} x {m} matrices): {(time.perf_counter() - start) * 10:.3f}ms")
+
+        # *** Batch proving ***
+        # `example.py`: the batch gives the same polynomials as one witness at a time
+        GF = galois.GF(p)
+        qap = QAPCache().get(L, R, O, GF)
+        A = GF(np.array([witness_for(x, y) for x, y in [(4, -2), (1, 1), (7, 30), (0, 5)]]))
+        u, v, w, h = qap.prove_batch(A)
+        for row, witness in enumerate(A):
+            expected = qap.prove(witness)
+            assert [galois.Poly(c) for c in (u[row], v[row], w[row], h[row])] == list(expected)
+        A[2, 5] += GF(1)
+        try:
+            qap.prove_batch(A)
+            assert False, "invalid witness accepted"
+        except ValueError as e:
+            assert "[2]" in str(e)
+
+        # Over the BN128 scalar field, where Groth16 runs
+        p = curve_order
+        GF = GF_bn
+        qap = QAPCache().get(L, R, O, GF)
+        A = GF(np.array([witness_for(x, y) for x, y in [(4, -2), (1, 1), (7, 30), (0, 5)]]))
+        u, v, w, h = qap.prove_batch(A)
+        for row, witness in enumerate(A):
+            assert [galois.Poly(c) for c in (u[row], v[row], w[row], h[row])] == list(qap.prove(witness))
+
+        # 4 constraints need the 7 points 1, ..., 7: too many for GF(5)
+        try:
+            QAPCache().get(L, R, O, galois.GF(5)).prove_batch(galois.GF(5).Zeros((1, 7)))
+            assert False, "batch over a field with too few points"
+        except ValueError as e:
+            print(e)
+
+        # A chain of multiplications: constraint i is a[k_i] * a[i + 1] = a[i + 2], with k_i in {0, 1}
+        GF = galois.GF(3221225473)
+        n, proofs = 64, 200
+        k = rng.integers(0, 2, size=n)
+        L, R, O = (np.zeros((n, n + 2), dtype=np.int64) for _ in range(3))
+        L[np.arange(n), k] = 1
+        R[np.arange(n), np.arange(n) + 1] = 1
+        O[np.arange(n), np.arange(n) + 2] = 1
+        A = GF.Zeros((proofs, n + 2))
+        A[:, 0] = 1
+        A[:, 1] = GF.Random(proofs, seed=2)
+        for i in range(n):
+            A[:, i + 2] = A[:, k[i]] * A[:, i + 1]
+        qap = QAPCache().get(L, R, O, GF)
+        qap.prove(A[0]), qap.prove_batch(A[:2])   # compile, and build the batch matrices
+
+        start = time.perf_counter()
+        expected = [qap.prove(witness)[3] for witness in A]
+        loop_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        h = qap.prove_batch(A)[3]
+        batch_time = time.perf_counter() - start
+        assert [galois.Poly(row) for row in h] == expected
+        print(f"{proofs} witnesses, {n} constraints: one at a time {proofs / loop_time:.0f} proofs/s, "
+              f"batched {proofs / batch_time:.0f} proofs/s")
+    finally:
+        shutil.rmtree(directory)
@@ -0,0 +1,350 @@
+# *** Sparse R1CS ***
+# In `example.py`, L, R and O are dense `np.array`s, converted to GF and checked with `np.matmul(L_galois, witness)`.
+# In a real circuit almost every entry of those matrices is 0: each constraint only touches a handful of variables.
+# A dense matrix then costs rows x columns memory and rows x columns multiplications per check.
+#
+# Here each matrix is stored in CSR (compressed sparse row) form: only the non-zero entries, row by row:
+#   data[k], indices[k]   the value and column of the k-th non-zero entry
+#   indptr[i]:indptr[i+1] the range of k that belongs to row i
+# so memory and the matrix-vector products scale with the number of non-zero entries.
+#
+# Negative coefficients (like the -5 and -1 in `example.py`) are normalized mod p when the matrix is built.
+# Values are stored as int64 when p < 2^31 (so products fit), and as Python ints (dtype=object) otherwise, e.g. for
+# the BN128 scalar field.
+#
+# *** QAP without densifying ***
+# The QAP polynomials are u_c(x) = sum_i L[i][c] * L_i(x), where L_i(x) is the Lagrange basis polynomial for
+# constraint i. For the prover, only the witness-weighted sum matters, and it can be rearranged:
+#   sum_c w_c u_c(x) = sum_c w_c sum_i L[i][c] L_i(x) = sum_i (Lw)_i L_i(x)
+# i.e. interpolate the vector Lw (one value per constraint) instead of interpolating every column.
+#
+# Neither interpolation builds the dense n x n Lagrange basis of `qap.py`. Over x = [1, ..., n]
+#   L_i(x) = w_i * Z(x) / (x - i),   Z(x) = (x - 1)...(x - n),   w_i = 1 / Z'(i) = (-1)^(n - i) / ((i - 1)! (n - i)!)
+# and the descending coefficients of Z(x) / (x - i) follow the synthetic division recurrence q_0 = 1,
+# q_k = z_k + i * q_(k-1). Running that recurrence on all the non-zero entries at once (one vector of length nnz),
+# with the entries sorted by column (CSC order), every column's coefficient k is a segmented sum of the vector:
+# O(n + nnz) memory besides the output, and n vectorized steps.
+#
+# Usage:
+#   from sparse_r1cs import SparseR1CS
+#   r1cs = SparseR1CS.from_dense(L, R, O, p)
+#   r1cs.is_satisfied(witness)
+#   Lw, Rw, Ow = r1cs.witness_products(witness)
+#   U_w = r1cs.witness_polynomial(r1cs.L, witness, GF)   # coefficients of sum_c w_c u_c(x)
+#   r1cs.qap_polynomials(witness, GF, backend="limbs")    # over curve_order, on the numba limb kernels of `fr_limbs.py`
+from functools import lru_cache
+
+import numpy as np
+
+from qap import to_field, check_backend
+
+INT64_SAFE_MODULUS = 2**31
+
+
+def _dtype_for(modulus):
+    return np.int64 if modulus < INT64_SAFE_MODULUS else object
+
+
+# Converts an (n, k) array of little-endian uint64 limbs (the layout of circom's `.r1cs` / `.wtns` files) into
+# Python ints (dtype=object).
+def limbs_to_ints(limbs):
+    limbs = np.asarray(limbs, dtype=np.uint64)
+    result = np.zeros(limbs.shape[0], dtype=object)
+    for k in range(limbs.shape[1] - 1, -1, -1):
+        result = (result << 64) + limbs[:, k].astype(object)
+    return result
+
+
+def _is_limbs(values):
+    return isinstance(values, np.ndarray) and values.ndim == 2 and values.dtype == np.uint64
+
+
+def _as_field_vector(values, modulus):
+    dtype = _dtype_for(modulus)
+    if _is_limbs(values):
+        values = limbs_to_ints(values)
+        if dtype is object:
+            return values % modulus
+    if dtype is object:
+        return np.array([int(v) % modulus for v in values], dtype=object)
+    return np.asarray(values, dtype=np.int64) % modulus
+
+
+# Z(x) = (x - 1)(x - 2)...(x - n) (descending coefficients) and w_i = 1 / Z'(i) for i = 1, ..., n, mod p
+@lru_cache(maxsize=32)
+def _domain(modulus, n):
+    if n >= modulus:
+        raise ValueError(f"{n} constraints don't fit in distinct points of GF({modulus})")
+    dtype = _dtype_for(modulus)
+    z = np.zeros(n + 1, dtype=dtype)
+    z[0] = 1
+    for i in range(1, n + 1):
+        z[1:] = (z[1:] - i * z[:-1]) % modulus
+    factorials = [1] * (n + 1)
+    for k in range(1, n + 1):
+        factorials[k] = factorials[k - 1] * k % modulus
+    inverse_factorials = [0] * (n + 1)
+    inverse_factorials[n] = pow(factorials[n], -1, modulus)
+    for k in range(n, 0, -1):
+        inverse_factorials[k - 1] = inverse_factorials[k] * k % modulus
+    weights = [(-1) ** (n - i) * inverse_factorials[i - 1] * inverse_factorials[n - i] % modulus
+               for i in range(1, n + 1)]
+    return z, np.array(weights, dtype=dtype)
+
+
+# Interpolation of sparse columns over x = [1, ..., n]. Entry e is the value values[e] at x = rows[e] + 1; entries
+# are grouped by column, and starts[c] is where column c begins. Returns (columns x n) descending coefficients.
+def _interpolate_entries(rows, values, starts, modulus, n):
+    z, weights = _domain(modulus, n)
+    rows = np.asarray(rows, dtype=np.int64)
+    xs = (rows + 1).astype(z.dtype)
+    scaled = (np.asarray(values).astype(z.dtype) * weights[rows]) % modulus
+    result = np.zeros((len(starts), n), dtype=z.dtype)
+    q = np.ones(len(rows), dtype=z.dtype)
+    for k in range(n):
+        if k:
+            q = (z[k] + xs * q) % modulus
+        result[:, k] = np.add.reduceat((scaled * q) % modulus, starts) % modulus
+    return result
+
+
+class SparseMatrix:
+    def __init__(self, shape, indptr, indices, data, modulus):
+        self.shape = shape
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.modulus = modulus
+
+    # Builds a CSR matrix from COO triplets (row, column, value). Duplicate entries are summed, zeros dropped.
+    @classmethod
+    def from_coo(cls, shape, rows, cols, values, modulus):
+        num_rows, num_cols = shape
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = np.asarray(cols, dtype=np.int64)
+        values = _as_field_vector(values, modulus)
+        if len(rows) and (rows.max() >= num_rows or cols.max() >= num_cols or rows.min() < 0 or cols.min() < 0):
+            raise ValueError(f"entry out of bounds for a {num_rows} x {num_cols} matrix")
+
+        order = np.lexsort((cols, rows))
+        rows, cols, values = rows[order], cols[order], values[order]
+
+        # sum duplicates
+        if len(rows):
+            starts = np.flatnonzero(np.r_[True, (rows[1:] != rows[:-1]) | (cols[1:] != cols[:-1])])
+            values = np.add.reduceat(values, starts) % modulus
+            rows, cols = rows[starts], cols[starts]
+        nonzero = values != 0
+        rows, cols, values = rows[nonzero], cols[nonzero], values[nonzero]
+
+        indptr = np.zeros(num_rows + 1, dtype=np.int64)
+        np.add.at(indptr, rows + 1, 1)
+        indptr = np.cumsum(indptr)
+        return cls(shape, indptr, cols, values, modulus)
+
+    @classmethod
+    def from_dense(cls, M, modulus):
+        M = np.asarray(M)
+        rows, cols = np.nonzero(M)
+        return cls.from_coo(M.shape, rows, cols, [int(v) for v in M[rows, cols]], modulus)
+
+    @property
+    def nnz(self):
+        return len(self.data)
+
+    def row_indices(self):
+        return np.repeat(np.arange(self.shape[0]), np.diff(self.indptr))
+
+    # (M w)_i = sum over the non-zero entries of row i of value * w[column]
+    # `w` can also be an (n, k) uint64 limb array (see `02-rank-1-constraint-systems/wtns.py`). Then only the entries
+    # the matrix actually references are converted to field elements.
+    def matvec(self, w):
+        if len(w) != self.shape[1]:
+            raise ValueError(f"witness has length {len(w)}, expected {self.shape[1]}")
+        if _is_limbs(w):
+            used = _as_field_vector(w[self.indices], self.modulus)
+        else:
+            used = _as_field_vector(w, self.modulus)[self.indices]
+        products = (self.data * used) % self.modulus
+        result = np.zeros(self.shape[0], dtype=products.dtype)
+        np.add.at(result, self.row_indices(), products)
+        return result % self.modulus
+
+    def to_dense(self):
+        dense = np.zeros(self.shape, dtype=self.data.dtype)
+        dense[self.row_indices(), self.indices] = self.data
+        return dense
+
+
+class SparseR1CS:
+    def __init__(self, L, R, O):
+        if not (L.shape == R.shape == O.shape):
+            raise ValueError("L, R and O must have the same shape")
+        if not (L.modulus == R.modulus == O.modulus):
+            raise ValueError("L, R and O must be over the same field")
+        self.L = L
+        self.R = R
+        self.O = O
+        self.modulus = L.modulus
+
+    @classmethod
+    def from_dense(cls, L, R, O, modulus):
+        return cls(*(SparseMatrix.from_dense(M, modulus) for M in (L, R, O)))
+
+    # `entries` are (rows, cols, values) triplets for L, R and O.
+    @classmethod
+    def from_coo(cls, num_constraints, num_variables, l_entries, r_entries, o_entries, modulus):
+        shape = (num_constraints, num_variables)
+        return cls(*(SparseMatrix.from_coo(shape, *entries, modulus) for entries in (l_entries, r_entries, o_entries)))
+
+    @property
+    def num_constraints(self):
+        return self.L.shape[0]
+
+    @property
+    def num_variables(self):
+        return self.L.shape[1]
+
+    def witness_products(self, witness):
+        return self.L.matvec(witness), self.R.matvec(witness), self.O.matvec(witness)
+
+    # Lw * Rw == Ow, element-wise (the Hadamard product)
+    def is_satisfied(self, witness):
+        Lw, Rw, Ow = self.witness_products(witness)
+        return bool(np.all((Lw * Rw) % self.modulus == Ow))
+
+    # Index of every constraint that doesn't hold
+    def unsatisfied_constraints(self, witness):
+        Lw, Rw, Ow = self.witness_products(witness)
+        return np.flatnonzero((Lw * Rw) % self.modulus != Ow)
+
+    # *** Column interpolation ***
+    # u_c(x) = sum over the non-zero entries (i, c) of M[i][c] * L_i(x). Only the non-zero columns are returned, as
+    # {column: coefficients (descending, GF array)}; a zero column interpolates to the zero polynomial.
+    # backend="limbs" runs the same recurrence on 4 x 64-bit limbs with numba (`fr_limbs.py`, curve_order only).
+    def interpolate_columns(self, M, GF, backend="galois"):
+        check_backend(backend, GF.order)
+        if backend == "limbs":
+            from fr_limbs import interpolate_sparse_columns
+            columns, coeffs = interpolate_sparse_columns(M)
+            coeffs = GF(coeffs.to_ints())
+            return {int(c): coeffs[k] for k, c in enumerate(columns)}
+        order = np.argsort(M.indices, kind="stable")               # CSR -> CSC, once
+        cols = M.indices[order]
+        if not len(cols):
+            return {}
+        starts = np.flatnonzero(np.r_[True, cols[1:] != cols[:-1]])
+        coeffs = _interpolate_entries(M.row_indices()[order], M.data[order], starts, M.modulus, self.num_constraints)
+        coeffs = to_field(coeffs, GF)
+        return {int(c): coeffs[k] for k, c in enumerate(cols[starts])}
+
+    # Coefficients (descending, GF array) of sum_c w_c * u_c(x), computed as the interpolation of M w.
+    def witness_polynomial(self, M, witness, GF, backend="galois"):
+        check_backend(backend, GF.order)
+        if backend == "limbs":
+            from fr_limbs import witness_polynomial
+            return GF(witness_polynomial(M, witness).to_ints())
+        Mw = M.matvec(witness)
+        rows = np.flatnonzero(Mw != 0)
+        if not len(rows):
+            return GF.Zeros(self.num_constraints)
+        coeffs = _interpolate_entries(rows, Mw[rows], np.array([0]), M.modulus, self.num_constraints)
+        return to_field(coeffs[0], GF)
+
+    def qap_polynomials(self, witness, GF, backend="galois"):
+        return tuple(self.witness_polynomial(M, witness, GF, backend) for M in (self.L, self.R, self.O))
+
+
+if __name__ == "__main__":
+    import time
+    import galois
+    from functools import reduce
+    from qap import r1cs_to_qap, coefficients_to_polys
+
+    # The R1CS from `example.py`
+    p = 79
+    GF = galois.GF(p)
+    L = np.array([[0, 0, 1, 0, 0, 0, 0], [0, 0, 0, 0, 1, 0, 0], [0, 0, 0, -5, 0, 0, 0], [0, 0, 0, 0, 0, 0, 1]])
+    R = np.array([[0, 0, 1, 0, 0, 0, 0], [0, 0, 0, 0, 1, 0, 0], [0, 0, 0, 1, 0, 0, 0], [0, 0, 0, 0, 1, 0, 0]])
+    O = np.array([[0, 0, 0, 0, 1, 0, 0], [0, 0, 0, 0, 0, 1, 0], [0, 0, 0, 0, 0, 0, 1], [0, 1, 0, 0, 0, -1, 0]])
+    r1cs = SparseR1CS.from_dense(L, R, O, p)
+    assert r1cs.L.nnz == 4 and r1cs.O.nnz == 5
+    assert (r1cs.L.to_dense() == L % p).all()
+
+    x = GF(4)
+    y = GF((-2 + p) % p)
+    v1 = x * x
+    v2 = v1 * v1
+    v3 = GF((-5 + p) % p) * y * y
+    z = v3 * v1 + v2
+    witness = GF(np.array([1, z, x, y, v1, v2, v3]))
+
+    assert r1cs.is_satisfied(witness)
+    bad = witness.copy()
+    bad[1] += GF(1)
+    assert not r1cs.is_satisfied(bad)
+    assert r1cs.unsatisfied_constraints(bad).tolist() == [3]
+
+    # Same polynomials as the dense path
+    U, V, W = r1cs_to_qap(L, R, O, GF)
+    columns = r1cs.interpolate_columns(r1cs.L, GF)
+    u_polynomials = coefficients_to_polys(U)
+    assert sorted(columns) == [2, 3, 4, 6]
+    assert all(galois.Poly(coeffs) == u_polynomials[c] for c, coeffs in columns.items())
+
+    # sum_c w_c u_c(x), without the per-column polynomials
+    U_w, V_w, W_w = (galois.Poly(c) for c in r1cs.qap_polynomials(witness, GF))
+    assert U_w == reduce(lambda a, b: a + b, map(lambda poly, w: poly * w, u_polynomials, witness))
+    print(U_w)  # 78x^3 + 76x^2 + 28x + 59
+
+    # COO construction, with negative values and duplicate entries summed
+    M = SparseMatrix.from_coo((2, 3), [0, 1, 1, 0], [2, 0, 0, 1], [-1, 3, 4, 0], p)
+    assert M.to_dense().tolist() == [[0, 0, 78], [7, 0, 0]]
+
+    # Over the BN128 scalar field (Python ints), against the dense basis of `qap.py`
+    from py_ecc.bn128 import curve_order
+    GF_bn = galois.GF(curve_order, primitive_element=5, verify=False)
+    r1cs_bn = SparseR1CS.from_dense(L, R, O, curve_order)
+    U_bn = r1cs_to_qap(L, R, O, GF_bn)[0]
+    assert all((coeffs == U_bn[c]).all() for c, coeffs in r1cs_bn.interpolate_columns(r1cs_bn.L, GF_bn).items())
+
+    # *** A large random circuit over the BN128 scalar field ***
+    from py_ecc.bn128 import curve_order
+    n = 20000
+    rng = np.random.default_rng(1)
+    # Constraint i: w[a_i] * w[b_i] = w[i + 1] for a chain of multiplications
+    witness = [1, 3]
+    a_idx = rng.integers(0, 2, size=n)
+    for i in range(n):
+        witness.append(witness[a_idx[i]] * witness[i + 1] % curve_order)
+    rows = np.arange(n)
+    r1cs = SparseR1CS.from_coo(
+        n, n + 2,
+        (rows, a_idx, [1] * n),
+        (rows, rows + 1, [1] * n),
+        (rows, rows + 2, [1] * n),
+        curve_order,
+    )
+    start = time.perf_counter()
+    assert r1cs.is_satisfied(witness)
+    print(f"{n} constraints x {n + 2} variables over curve_order checked in {time.perf_counter() - start:.3f}s "
+          f"(dense would be {3 * n * (n + 2):,} entries)")
+
+    # *** Column interpolation without the dense basis ***
+    GF = galois.GF(3221225473)
+    n = 256
+    L_big = np.zeros((n, n + 2), dtype=np.int64)
+    L_big[np.arange(n), a_idx[:n]] = 1
+    L_big[np.arange(n), np.arange(n) + 2] = rng.integers(1, 100, size=n)
+    r1cs = SparseR1CS.from_dense(L_big, L_big, L_big, GF.order)
+    r1cs.interpolate_columns(SparseMatrix.from_dense(L_big[:4, :6], GF.order), GF)  # galois compiles on first use
+    start = time.perf_counter()
+    columns = r1cs.interpolate_columns(r1cs.L, GF)
+    sparse_time = time.perf_counter() - start
+    start = time.perf_counter()
+    U = r1cs_to_qap(L_big, L_big, L_big, GF)[0]
+    dense_time = time.perf_counter() - start
+    assert all((coeffs == U[c]).all() for c, coeffs in columns.items())
+    assert len(columns) == len(np.unique(r1cs.L.indices))
+    print(f"{n} x {n + 2} column interpolation: sparse recurrence {sparse_time:.3f}s, "
+          f"dense basis {dense_time:.3f}s ({n * n:,} basis entries)")
@@ -0,0 +1,94 @@
+# *** Multi-scalar multiplication (Pippenger / bucket method) ***
+# Evaluating a polynomial on the SRS is an inner product of scalars with points:
+#   <[c_0, c_1, ..., c_n], [P_0, P_1, ..., P_n]> = c_0 P_0 + c_1 P_1 + ... + c_n P_n
+# `01_Trusted_Setup.md` computes it as `reduce(add, map(multiply, points, coeffs))`, i.e. n independent
+# double-and-add scalar multiplications (~254 doublings each) followed by n additions.
+#
+# The bucket method shares the doublings between all the points. Cut every scalar into c-bit windows. For one window:
+#   1. Drop each point into the bucket numbered by its c-bit digit (bucket 0 is skipped): one addition per point.
+#   2. Window sum = 1*B_1 + 2*B_2 + ... + (2^c - 1)*B_{2^c - 1}, computed with a running sum from the top bucket
+#      down, which only takes 2 * 2^c additions.
+# Then combine the windows from the most significant one down, doubling c times in between:
+#   result = (((W_top * 2^c) + W_top-1) * 2^c + ...) + W_0
+# In total that is about (254 / c) * (n + 2^(c+1)) additions and 254 doublings, instead of n * 254 doublings.
+#
+# Points can be `py_ecc.bn128` G1 or G2 points. The arithmetic happens on `py_ecc.optimized_bn128` projective points
+# and the result is normalized once at the end. The bucket method itself (`msm_projective`) lives in
+# `module1/09-elliptic-curves-over-finite-fields/bucket_msm.py`, so the module1 helpers can use it too.
+#
+# Usage:
+#   from msm import msm, inner_product
+#   msm(srs, coeffs)                  # same point as reduce(add, map(multiply, srs, coeffs))
+#   msm(srs, coeffs, window=8)        # explicit window size
+#   inner_product(srs, coeffs)        # drop-in for the helper in `01_Trusted_Setup.md`
+import os
+import sys
+
+from py_ecc import optimized_bn128
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "module1",
+                             "09-elliptic-curves-over-finite-fields"))
+from fixed_base import to_optimized, from_optimized, is_g2
+from bucket_msm import default_window, msm_projective
+
+
+def msm(points, scalars, window=None):
+    points = list(points)
+    scalars = [int(s) for s in scalars]
+    if len(points) != len(scalars):
+        raise ValueError("points and scalars must have the same length")
+    g2 = any(pt is not None and is_g2(pt) for pt in points)
+    zero = optimized_bn128.Z2 if g2 else optimized_bn128.Z1
+    projective = [to_optimized(pt, g2) for pt in points]
+    return from_optimized(msm_projective(projective, scalars, zero, window))
+
+
+# Drop-in replacement for the `inner_product` helper in `01_Trusted_Setup.md`, called as `inner_product(srs, coeffs)`.
+def inner_product(points, coeffs, window=None):
+    return msm(points, coeffs, window)
+
+
+if __name__ == "__main__":
+    import random
+    import time
+    from functools import reduce
+    from py_ecc.bn128 import G1, G2, multiply, add, eq, curve_order
+
+    def naive_inner_product(points, coeffs):
+        return reduce(add, map(multiply, points, coeffs))
+
+    # The example from `01_Trusted_Setup.md`: p(x) = 4x^2 + 7x + 8 evaluated at tau = 88
+    tau = 88
+    degree = 3
+    srs = [multiply(G1, tau**i) for i in range(degree, -1, -1)]
+    coeffs = [0, 4, 7, 8]
+    poly_at_tau = inner_product(srs, coeffs)
+    assert eq(poly_at_tau, multiply(G1, 4 * tau**2 + 7 * tau + 8))
+    assert eq(poly_at_tau, naive_inner_product(srs, coeffs))
+
+    # G2 points, every window size, and edge cases
+    srs2 = [multiply(G2, tau**i) for i in range(degree, -1, -1)]
+    assert eq(inner_product(srs2, coeffs), multiply(G2, 4 * tau**2 + 7 * tau + 8))
+    for window in range(1, 9):
+        assert eq(msm(srs, [curve_order - 1, 2**130 + 5, 1, 3], window),
+                  naive_inner_product(srs, [curve_order - 1, 2**130 + 5, 1, 3]))
+    assert msm(srs, [0, 0, 0, 0]) is None
+    assert msm([None, G1], [5, 1]) == G1
+    assert eq(msm([G1, G1], [1, curve_order - 1]), None)
+
+    # *** Timing ***
+    n = 64
+    tau = random.randrange(curve_order)
+    srs = [multiply(G1, pow(tau, i, curve_order)) for i in range(n)]
+    coeffs = [random.randrange(curve_order) for _ in range(n)]
+
+    start = time.perf_counter()
+    expected = naive_inner_product(srs, coeffs)
+    naive_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = inner_product(srs, coeffs)
+    msm_time = time.perf_counter() - start
+
+    assert eq(expected, result)
+    print(f"inner product of {n} points: reduce(add, map(multiply, ...)) {naive_time:.3f}s, msm {msm_time:.3f}s")
@@ -0,0 +1,157 @@
+# *** Parallel MSM and column interpolation over a process pool ***
+# `py_ecc` is pure Python and holds the GIL, so threads don't help. Both big loops of a prover are embarrassingly
+# parallel though:
+#   - an MSM is a sum, so split the (point, scalar) pairs into chunks, run `msm_projective` on every chunk in a
+#     separate process, and add up the partial results,
+#   - interpolating the columns of L, R and O (`07-R1CS-to-QAP-FF/qap.py`) is independent per column, so every process
+#     multiplies a block of columns with the Lagrange basis.
+#
+# *** Cheap IPC ***
+# Pickling `py_ecc` points means pickling nested FQ / FQ2 objects, one class reference and one Python int per
+# coordinate. Instead a chunk of points is sent as ONE bytes object in the fixed-width encoding of `point_encoding.py`
+# (64 bytes per G1 point, 128 per G2 point). Partial sums come back the same way. Field matrices are sent as plain ints.
+#
+# Process start-up is expensive compared to a small MSM, so pass a long-lived `ProcessPoolExecutor` when calling
+# these repeatedly. `workers` (default `os.cpu_count()`) is the number of chunks the work is split into, and the size
+# of the pool that is started when no executor is given; with an executor of a different size, pass its size too.
+#
+# Usage:
+#   from parallel import parallel_msm, parallel_r1cs_to_qap
+#   with ProcessPoolExecutor(32) as executor:
+#       parallel_msm(srs, coeffs, workers=32, executor=executor)            # same point as msm(srs, coeffs)
+#       U, V, W = parallel_r1cs_to_qap(L, R, O, GF, workers=32, executor=executor)
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import galois
+import numpy as np
+from py_ecc import optimized_bn128
+
+from msm import msm_projective, is_g2, to_optimized, from_optimized
+from point_encoding import serialize_points, deserialize_points
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "07-R1CS-to-QAP-FF"))
+from qap import domain_basis, to_field
+
+# *** Chunking ***
+def _chunks(n, num_chunks):
+    num_chunks = max(1, min(n, num_chunks))
+    bounds = np.linspace(0, n, num_chunks + 1).astype(int)
+    return [(int(a), int(b)) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+
+
+def _num_workers(workers):
+    return workers or os.cpu_count() or 1
+
+
+def _run(fn, tasks, executor, workers):
+    if executor is not None:
+        return list(executor.map(fn, *zip(*tasks)))
+    with ProcessPoolExecutor(workers) as pool:
+        return list(pool.map(fn, *zip(*tasks)))
+
+
+# *** Parallel MSM ***
+def _msm_chunk(data, g2, scalars, window):
+    zero = optimized_bn128.Z2 if g2 else optimized_bn128.Z1
+    points = [to_optimized(pt, g2) for pt in deserialize_points(data, g2)]
+    return serialize_points([from_optimized(msm_projective(points, scalars, zero, window))], g2)
+
+
+def parallel_msm(points, scalars, workers=None, executor=None, window=None):
+    points = list(points)
+    scalars = [int(s) for s in scalars]
+    if len(points) != len(scalars):
+        raise ValueError("points and scalars must have the same length")
+    g2 = any(pt is not None and is_g2(pt) for pt in points)
+    num_workers = _num_workers(workers)
+    tasks = [(serialize_points(points[a:b], g2), g2, scalars[a:b], window)
+             for a, b in _chunks(len(points), num_workers)]
+    if not tasks:
+        return None
+
+    partials = [deserialize_points(blob, g2)[0] for blob in _run(_msm_chunk, tasks, executor, num_workers)]
+    zero = optimized_bn128.Z2 if g2 else optimized_bn128.Z1
+    total = zero
+    for pt in partials:
+        total = optimized_bn128.add(total, to_optimized(pt, g2))
+    return from_optimized(total)
+
+
+# *** Parallel column interpolation ***
+# Every worker rebuilds GF from its order and primitive element (no primality test, no search for a generator) and
+# builds the Lagrange basis once, in its own `domain_basis` cache.
+def _field(order, primitive_element):
+    return galois.GF(order, primitive_element=primitive_element, verify=False)
+
+
+def _interpolate_chunk(order, primitive_element, columns):
+    GF = _field(order, primitive_element)
+    M = to_field(np.array(columns, dtype=object), GF)
+    result = M.T @ domain_basis(GF, M.shape[0])
+    return [[int(v) for v in row] for row in result]
+
+
+def parallel_interpolate_columns(M, GF, workers=None, executor=None):
+    M = to_field(M, GF)
+    num_workers = _num_workers(workers)
+    primitive_element = int(GF.primitive_element)
+    tasks = [(GF.order, primitive_element, [[int(v) for v in row] for row in M[:, a:b]])
+             for a, b in _chunks(M.shape[1], num_workers)]
+    rows = [row for chunk in _run(_interpolate_chunk, tasks, executor, num_workers) for row in chunk]
+    return to_field(np.array(rows, dtype=object), GF)
+
+
+def parallel_r1cs_to_qap(L, R, O, GF, workers=None, executor=None):
+    if executor is None:
+        with ProcessPoolExecutor(_num_workers(workers)) as executor:
+            return parallel_r1cs_to_qap(L, R, O, GF, workers, executor)
+    return tuple(parallel_interpolate_columns(M, GF, workers, executor) for M in (L, R, O))
+
+
+if __name__ == "__main__":
+    import random
+    import time
+    from py_ecc.bn128 import G1, G2, multiply, curve_order, eq
+    from msm import msm
+    from qap import r1cs_to_qap
+
+    workers = max(2, os.cpu_count() or 1)
+    with ProcessPoolExecutor(workers) as executor:
+        # *** MSM ***
+        n = 256
+        tau = random.randrange(curve_order)
+        srs = [multiply(G1, pow(tau, i, curve_order)) for i in range(n)]
+        coeffs = [random.randrange(curve_order) for _ in range(n)]
+
+        start = time.perf_counter()
+        expected = msm(srs, coeffs)
+        serial_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        result = parallel_msm(srs, coeffs, workers=workers, executor=executor)
+        parallel_time = time.perf_counter() - start
+        assert eq(expected, result)
+        print(f"msm of {n} G1 points: serial {serial_time:.3f}s, {workers} processes {parallel_time:.3f}s "
+              f"({os.cpu_count()} cores)")
+
+        srs2 = [multiply(G2, i + 1) for i in range(8)]
+        assert eq(parallel_msm(srs2, coeffs[:8], workers=workers, executor=executor), msm(srs2, coeffs[:8]))
+        assert parallel_msm(srs[:3], [0, 0, 0], workers=workers, executor=executor) is None
+
+        # *** Column interpolation ***
+        GF = galois.GF(curve_order, primitive_element=5, verify=False)
+        n, m = 16, 40
+        rng = np.random.default_rng(0)
+        L, R, O = (rng.integers(-3, 4, size=(n, m)) * (rng.random((n, m)) < 0.2) for _ in range(3))
+
+        start = time.perf_counter()
+        expected = r1cs_to_qap(L, R, O, GF)
+        serial_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        result = parallel_r1cs_to_qap(L, R, O, GF, workers=workers, executor=executor)
+        parallel_time = time.perf_counter() - start
+        assert all(np.array_equal(a, b) for a, b in zip(expected, result))
+        print(f"{n} x {m} R1CS to QAP: serial {serial_time:.3f}s, {workers} processes {parallel_time:.3f}s")
@@ -0,0 +1,68 @@
+# *** Fixed-width byte encoding of BN128 points ***
+# Every coordinate is written as 32 big-endian bytes (the field modulus is < 2^254):
+#   G1 point: x | y                      64 bytes
+#   G2 point: x_0 | x_1 | y_0 | y_1      128 bytes, where x = x_0 + x_1 * i
+# The point at infinity (`None` in `py_ecc.bn128`) is all zeros, which is not a point on either curve.
+#
+# Since every point has the same size, point k of an encoded array starts at byte k * POINT_BYTES[g2]. That lets
+# `parallel.py` ship a chunk of points between processes as one bytes object, and `srs_file.py` decode a single point
+# out of a memory-mapped file.
+#
+# Usage:
+#   from point_encoding import serialize_points, deserialize_points
+#   data = serialize_points(srs)                 # bytes, 64 per point
+#   deserialize_points(data) == srs
+#   deserialize_points(data_g2, g2=True)
+from py_ecc import bn128
+
+from msm import is_g2
+
+COORDINATE_BYTES = 32
+POINT_BYTES = {False: 2 * COORDINATE_BYTES, True: 4 * COORDINATE_BYTES}
+
+
+def _coordinates(pt):
+    if is_g2(pt):
+        return [int(c) for c in pt[0].coeffs] + [int(c) for c in pt[1].coeffs]
+    return [int(pt[0]), int(pt[1])]
+
+
+def serialize_points(points, g2=False):
+    size = POINT_BYTES[g2]
+    out = bytearray()
+    for pt in points:
+        if pt is None:
+            out += bytes(size)
+        else:
+            for c in _coordinates(pt):
+                out += c.to_bytes(COORDINATE_BYTES, "big")
+    return bytes(out)
+
+
+# Returns `py_ecc.bn128` points (None for infinity). `data` can be bytes, a memoryview or an mmap slice.
+def deserialize_points(data, g2=False):
+    n_coords = 4 if g2 else 2
+    size = POINT_BYTES[g2]
+    if len(data) % size != 0:
+        raise ValueError(f"{len(data)} bytes is not a whole number of {size}-byte points")
+    points = []
+    for offset in range(0, len(data), size):
+        coords = [int.from_bytes(data[offset + k * COORDINATE_BYTES:offset + (k + 1) * COORDINATE_BYTES], "big")
+                  for k in range(n_coords)]
+        if not any(coords):
+            points.append(None)
+        elif g2:
+            points.append((bn128.FQ2(coords[:2]), bn128.FQ2(coords[2:])))
+        else:
+            points.append((bn128.FQ(coords[0]), bn128.FQ(coords[1])))
+    return points
+
+
+if __name__ == "__main__":
+    from py_ecc.bn128 import G1, G2, multiply
+
+    points = [G1, None, multiply(G1, 5)]
+    assert deserialize_points(serialize_points(points)) == points
+    assert len(serialize_points(points)) == 3 * 64
+    points2 = [G2, None]
+    assert deserialize_points(serialize_points(points2, g2=True), g2=True) == points2
@@ -0,0 +1,207 @@
+# *** Storing an SRS on disk ***
+# `01_Trusted_Setup.md` builds the SRS on every run:
+#   srs = [multiply(G1, tau**i) for i in range(degree, -1, -1)]
+# which is one full scalar multiplication per point before the prover can do anything. A real ceremony produces the
+# SRS once; the prover should just open it.
+#
+# File layout (integers little-endian, like circom's `.r1cs` / `.wtns` files):
+#
+#   header, 64 bytes:  "zsrs" | version (u32) | curve id (u32) | degree (u32) | n_g1 (u64) | n_g2 (u64)
+#                      | coordinate size (u32) | zero padding
+#   G1 section:        n_g1 points, 64 bytes each
+#   G2 section:        n_g2 points, 128 bytes each
+#
+# Points use the fixed-width encoding of `point_encoding.py` (32-byte big-endian coordinates, all zeros for the point
+# at infinity), so point k of a section is at a known offset. The points are stored in the order they were given,
+# which for the SRS in the md is descending: [tau^d G, ..., tau G, G].
+#
+# `SRSFile` memory-maps the file. Opening it only reads the header, whatever the degree. `srs_file.g1[k]` and
+# `srs_file.g1[a:b]` decode just those points; nothing else is ever turned into Python objects.
+#
+# Usage:
+#   from srs_file import write_srs, SRSFile
+#   write_srs("powers_of_tau.srs", srs_g1, srs_g2)
+#   with SRSFile("powers_of_tau.srs") as srs_file:
+#       srs_file.degree
+#       srs_file.g1[-1]                                     # G1
+#       inner_product(srs_file.g1[-3:], coeffs)             # only 3 points decoded
+import mmap
+import struct
+
+from py_ecc import bn128
+
+from point_encoding import serialize_points, deserialize_points, COORDINATE_BYTES, POINT_BYTES
+
+MAGIC = b"zsrs"
+VERSION = 1
+CURVES = {"bn128": 1}
+HEADER_FORMAT = "<4sIIIQQI"
+HEADER_SIZE = 64
+
+
+class PointSection:
+    def __init__(self, buffer, offset, count, g2):
+        self._buffer = buffer
+        self._offset = offset
+        self._count = count
+        self.g2 = g2
+
+    def __len__(self):
+        return self._count
+
+    def raw(self, index):
+        start = self._offset + index * POINT_BYTES[self.g2]
+        return self._buffer[start:start + POINT_BYTES[self.g2]]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(self._count)
+            if step != 1:
+                return [self[i] for i in range(start, stop, step)]
+            size = POINT_BYTES[self.g2]
+            return deserialize_points(self._buffer[self._offset + start * size:self._offset + max(start, stop) * size],
+                                      self.g2)
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError(f"point index {index} out of range for {self._count} points")
+        return deserialize_points(self.raw(index), self.g2)[0]
+
+    def __iter__(self):
+        for i in range(self._count):
+            yield self[i]
+
+
+class SRSFile:
+    # If the file is rejected (bad header, wrong size, invalid point), the map and the file are closed before the
+    # error propagates.
+    def __init__(self, path, validate=False):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mm = None
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            self._read_header()
+            if validate:
+                self.validate()
+        except BaseException:
+            self.close()
+            raise
+
+    def _read_header(self):
+        path = self.path
+        magic, version, curve_id, self.degree, n_g1, n_g2, coordinate_size = struct.unpack_from(
+            HEADER_FORMAT, self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not an SRS file")
+        if version != VERSION:
+            raise ValueError(f"unsupported SRS file version {version}")
+        if curve_id not in CURVES.values():
+            raise ValueError(f"unknown curve id {curve_id}")
+        if coordinate_size != COORDINATE_BYTES:
+            raise ValueError(f"unsupported coordinate size {coordinate_size}")
+        self.curve = next(name for name, i in CURVES.items() if i == curve_id)
+        expected_size = HEADER_SIZE + n_g1 * POINT_BYTES[False] + n_g2 * POINT_BYTES[True]
+        if len(self._mm) != expected_size:
+            raise ValueError(f"{path} has {len(self._mm)} bytes, expected {expected_size}")
+
+        self.g1 = PointSection(self._mm, HEADER_SIZE, n_g1, g2=False)
+        self.g2 = PointSection(self._mm, HEADER_SIZE + n_g1 * POINT_BYTES[False], n_g2, g2=True)
+
+    # Decodes every point and checks it is on its curve. Costs as much as loading the whole SRS.
+    def validate(self):
+        for section, b in ((self.g1, bn128.b), (self.g2, bn128.b2)):
+            for k, pt in enumerate(section):
+                if pt is not None and not bn128.is_on_curve(pt, b):
+                    raise ValueError(f"{'G2' if section.g2 else 'G1'} point {k} is not on the curve")
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# `g1_points` and `g2_points` can be any iterables (e.g. generators): they are written as they come, and the header
+# is filled in at the end. `degree` defaults to len(g1_points) - 1.
+def write_srs(path, g1_points, g2_points=(), degree=None, curve="bn128"):
+    if curve not in CURVES:
+        raise ValueError(f"unknown curve {curve}")
+    with open(path, "wb") as f:
+        f.write(bytes(HEADER_SIZE))
+        counts = []
+        for points, g2 in ((g1_points, False), (g2_points, True)):
+            count = 0
+            for pt in points:
+                f.write(serialize_points([pt], g2))
+                count += 1
+            counts.append(count)
+        if degree is None:
+            degree = max(counts[0] - 1, 0)
+        f.seek(0)
+        f.write(struct.pack(HEADER_FORMAT, MAGIC, VERSION, CURVES[curve], degree, counts[0], counts[1],
+                            COORDINATE_BYTES))
+
+
+if __name__ == "__main__":
+    import os
+    import random
+    import tempfile
+    import time
+    from py_ecc.bn128 import G1, G2, multiply, eq, curve_order
+    from msm import inner_product
+
+    degree = 16
+    tau = random.randrange(1, curve_order)
+    srs_g1 = [multiply(G1, pow(tau, i, curve_order)) for i in range(degree, -1, -1)]
+    srs_g2 = [multiply(G2, pow(tau, i, curve_order)) for i in range(2, -1, -1)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "powers_of_tau.srs")
+        write_srs(path, iter(srs_g1), srs_g2)
+        assert os.path.getsize(path) == HEADER_SIZE + 17 * 64 + 3 * 128
+
+        start = time.perf_counter()
+        srs_file = SRSFile(path)
+        open_time = time.perf_counter() - start
+        with srs_file:
+            assert (srs_file.degree, len(srs_file.g1), len(srs_file.g2), srs_file.curve) == (degree, 17, 3, "bn128")
+            assert srs_file.g1[-1] == G1 and srs_file.g2[-1] == G2
+            assert srs_file.g1[0] == srs_g1[0]
+            assert srs_file.g1[3:7] == srs_g1[3:7]
+            assert srs_file.g1[::4] == srs_g1[::4]
+            assert list(srs_file.g2) == srs_g2
+            srs_file.validate()
+
+            # p(x) = 4x^2 + 7x + 8 from the md, decoding only the last 3 points
+            coeffs = [4, 7, 8]
+            assert eq(inner_product(srs_file.g1[-3:], coeffs), multiply(G1, 4 * tau**2 + 7 * tau + 8))
+        print(f"opened a degree {degree} SRS in {open_time * 1000:.3f}ms")
+
+        # Corrupt one point: `validate` finds it
+        with open(path, "r+b") as f:
+            f.seek(HEADER_SIZE + 5 * 64)
+            f.write(b"\x01")
+        try:
+            SRSFile(path, validate=True)
+            assert False, "corrupted point not detected"
+        except ValueError as e:
+            print(e)
+
+        # A rejected file doesn't leak its descriptor
+        with open(path, "r+b") as f:
+            f.truncate(HEADER_SIZE + 10)
+        open_fds = len(os.listdir("/proc/self/fd")) if os.path.isdir("/proc/self/fd") else None
+        for _ in range(3):
+            try:
+                SRSFile(path)
+                assert False, "truncated file accepted"
+            except ValueError:
+                pass
+        if open_fds is not None:
+            assert len(os.listdir("/proc/self/fd")) == open_fds
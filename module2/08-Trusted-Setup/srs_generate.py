@@ -0,0 +1,130 @@
+# *** Fast SRS generation ***
+# `01_Trusted_Setup.md` generates the SRS with
+#   srs = [multiply(G1, tau**i) for i in range(degree, -1, -1)]
+# which is slow in three ways:
+#   1. tau**i is never reduced mod curve_order, so the exponent grows to i * log2(tau) bits and computing it gets
+#      more expensive with every power,
+#   2. every point is a fresh double-and-add from G1, ~254 doublings that are the same for every point,
+#   3. `py_ecc.bn128` points are affine, so each of those additions and doublings pays for a modular inverse.
+#
+# Here:
+#   1. the powers are computed incrementally mod curve_order: tau^(i+1) = tau^i * tau, one multiplication each,
+#   2. G1 and G2 are fixed bases, so the doublings are precomputed once in a window table (`fixed_base.py`, module1)
+#      and every point costs ~254 / w projective additions,
+#   3. the points stay projective (`optimized_bn128`, (X, Y, Z) with x = X / Z) and are normalized at the end with
+#      ONE batch inversion of all the Z's (`batch_inversion.py`, module1). A G2 Z is an FQ2 element a + b i, and
+#      1 / (a + b i) = (a - b i) / (a^2 + b^2), so the G2 Z's are inverted through their FQ norms a^2 + b^2.
+#
+# The result is a list of regular `py_ecc.bn128` points in the md's descending order [tau^d G, ..., tau G, G].
+#
+# Usage:
+#   from srs_generate import generate_srs, generate_srs_file
+#   srs_g1, srs_g2 = generate_srs(tau, degree)                  # G2 powers up to degree as well
+#   srs_g1, srs_g2 = generate_srs(tau, degree, g2_degree=1)     # [tau G2, G2], enough for `srs_verify.py`
+#   generate_srs_file("powers_of_tau.srs", tau, degree)          # straight to a `srs_file.py` file
+import os
+import sys
+
+from py_ecc import bn128, optimized_bn128
+from py_ecc.bn128 import G1, G2, curve_order, field_modulus
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "module1",
+                             "09-elliptic-curves-over-finite-fields"))
+from fixed_base import fixed_base_multiply_projective
+from batch_inversion import batch_inverse
+
+
+# [1, tau, tau^2, ..., tau^(n-1)] mod curve_order
+def powers_of_tau(tau, n):
+    powers = []
+    power = 1
+    tau %= curve_order
+    for _ in range(n):
+        powers.append(power)
+        power = power * tau % curve_order
+    return powers
+
+
+# A w-bit table costs about (254 / w) * 2^w additions to build and saves (254 / w) additions per point.
+def table_window(n):
+    return min(8, max(2, n.bit_length() - 2))
+
+
+# optimized_bn128 projective points -> bn128 affine points (None at infinity), with one modular inverse in total
+def batch_normalize(points):
+    if not points:
+        return []
+    g2 = isinstance(points[0][2], optimized_bn128.FQ2)
+    finite = [k for k, pt in enumerate(points) if not optimized_bn128.is_inf(pt)]
+    if g2:
+        zs = [points[k][2].coeffs for k in finite]
+        norms = batch_inverse([int(a) * int(a) + int(b) * int(b) for a, b in zs], field_modulus)
+        z_invs = [optimized_bn128.FQ2([int(a) * n, -int(b) * n]) for (a, b), n in zip(zs, norms)]
+    else:
+        z_invs = [optimized_bn128.FQ(z) for z in batch_inverse([points[k][2].n for k in finite], field_modulus)]
+
+    result = [None] * len(points)
+    for k, z_inv in zip(finite, z_invs):
+        x, y = points[k][0] * z_inv, points[k][1] * z_inv
+        if g2:
+            result[k] = (bn128.FQ2([int(c) for c in x.coeffs]), bn128.FQ2([int(c) for c in y.coeffs]))
+        else:
+            result[k] = (bn128.FQ(x.n), bn128.FQ(y.n))
+    return result
+
+
+def _powers_times(base, scalars, window):
+    return batch_normalize([fixed_base_multiply_projective(base, s, window) for s in scalars])
+
+
+# Returns (srs_g1, srs_g2), both descending: [tau^d G1, ..., G1] and [tau^g2_degree G2, ..., G2].
+def generate_srs(tau, degree, g2_degree=None, window=None):
+    g2_degree = degree if g2_degree is None else g2_degree
+    powers = powers_of_tau(tau, max(degree, g2_degree) + 1)
+    descending_g1 = powers[degree::-1]
+    descending_g2 = powers[g2_degree::-1]
+    srs_g1 = _powers_times(G1, descending_g1, window or table_window(len(descending_g1)))
+    srs_g2 = _powers_times(G2, descending_g2, window or table_window(len(descending_g2)))
+    return srs_g1, srs_g2
+
+
+def generate_srs_file(path, tau, degree, g2_degree=None, window=None):
+    from srs_file import write_srs
+    srs_g1, srs_g2 = generate_srs(tau, degree, g2_degree, window)
+    write_srs(path, srs_g1, srs_g2, degree=degree)
+
+
+if __name__ == "__main__":
+    import random
+    import time
+    from py_ecc.bn128 import multiply, eq
+    from fixed_base import clear_cache
+
+    # The md's example: tau = 88, degree 3
+    srs_g1, srs_g2 = generate_srs(88, 3)
+    assert srs_g1 == [multiply(G1, 88**i) for i in range(3, -1, -1)]
+    assert all(eq(a, b) for a, b in zip(srs_g2, [multiply(G2, 88**i) for i in range(3, -1, -1)]))
+    assert batch_normalize([optimized_bn128.Z1, optimized_bn128.G1]) == [None, G1]
+
+    # *** Benchmark ***
+    degree = 64
+    tau = random.randrange(1, curve_order)
+
+    start = time.perf_counter()
+    naive = [multiply(G1, 88**i) for i in range(degree, -1, -1)]
+    naive_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    reduced = [multiply(G1, pow(tau, i, curve_order)) for i in range(degree, -1, -1)]
+    reduced_time = time.perf_counter() - start
+
+    clear_cache()
+    start = time.perf_counter()
+    fast, _ = generate_srs(tau, degree, g2_degree=0)
+    fast_time = time.perf_counter() - start
+    assert fast == reduced
+
+    print(f"degree {degree} G1 SRS:")
+    print(f"  [multiply(G1, tau**i) ...] (tau = 88)       {naive_time:.3f}s")
+    print(f"  [multiply(G1, pow(tau, i, r)) ...]          {reduced_time:.3f}s")
+    print(f"  generate_srs (fixed base + batch normalize) {fast_time:.3f}s (window {table_window(degree + 1)})")
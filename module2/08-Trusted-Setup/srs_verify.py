@@ -0,0 +1,113 @@
+# *** Batched verification of a powers-of-tau SRS ***
+# `01_Trusted_Setup.md` checks that [Omega_d, ..., Omega_1, G_1] are successive powers of tau with one equation per i:
+#   e(Theta, Omega_i) == e(G_2, Omega_{i+1})        for i = 0, ..., d - 1 (Omega_0 = G_1)
+# That is 2d pairings, and 2d final exponentiations, the most expensive part of a pairing.
+#
+# Pick random scalars r_0, ..., r_{d-1} and add the equations up in the exponent. By bilinearity
+#   prod_i e(Theta, Omega_i)^{r_i} = e(Theta, sum_i r_i Omega_i)
+# so all d checks fold into ONE equation with two pairings:
+#   e(Theta, A) == e(G_2, B),   A = sum_i r_i Omega_i,   B = sum_i r_i Omega_{i+1}
+# A and B are multi-scalar multiplications (`msm.py`). Both sides go through one pairing product
+#   e(Theta, A) * e(-G_2, B) == 1
+# which is a single multi-Miller loop and one final exponentiation (`01-bilinear-pairings/pairing_product.py`).
+#
+# Why it's sound: write Omega_i = a_i G_1. The batched check holds iff sum_i r_i (tau a_i - a_{i+1}) = 0 mod the curve
+# order. If any single check is wrong, some (tau a_i - a_{i+1}) is non-zero, and random r_i hit a root of that linear
+# equation with probability 2^-128 (the r_i are 128-bit, which keeps the MSMs short).
+#
+# If the batched check fails, the range of indices is split in half and each half is checked the same way, so a single
+# bad Omega is located with about 2 log2(d) batched checks instead of d individual ones.
+#
+# Usage:
+#   from srs_verify import verify_srs, find_bad_powers
+#   verify_srs(srs, theta)         # srs = [Omega_d, ..., Omega_1, G_1] (bn128 G1 points), theta = tau G_2
+#   find_bad_powers(srs, theta)    # [i, ...] such that e(Theta, Omega_i) != e(G_2, Omega_{i+1})
+import os
+import secrets
+import sys
+
+from py_ecc import optimized_bn128
+from py_ecc.bn128 import G1, eq
+
+from msm import msm_projective, to_optimized
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "01-bilinear-pairings"))
+from pairing_product import pairing_check
+
+CHALLENGE_BITS = 128
+
+
+# `powers` is ascending: powers[i] = Omega_i as an optimized_bn128 point. Checks every i in [start, end) at once.
+def _batch_check(powers, theta, start, end):
+    r = [secrets.randbits(CHALLENGE_BITS) for _ in range(start, end)]
+    A = msm_projective(powers[start:end], r, optimized_bn128.Z1)
+    B = msm_projective(powers[start + 1:end + 1], r, optimized_bn128.Z1)
+    return pairing_check([(theta, A), (optimized_bn128.neg(optimized_bn128.G2), B)])
+
+
+def _bisect(powers, theta, start, end, bad):
+    if _batch_check(powers, theta, start, end):
+        return
+    if end - start == 1:
+        bad.append(start)
+        return
+    mid = (start + end) // 2
+    _bisect(powers, theta, start, mid, bad)
+    _bisect(powers, theta, mid, end, bad)
+
+
+def _prepare(srs, theta):
+    if not eq(srs[-1], G1):
+        raise ValueError("the last element of the SRS must be G_1")
+    powers = [to_optimized(pt) for pt in reversed(srs)]
+    return powers, to_optimized(theta, g2=True)
+
+
+def verify_srs(srs, theta):
+    powers, theta = _prepare(srs, theta)
+    return _batch_check(powers, theta, 0, len(powers) - 1)
+
+
+# Only pays for the bisection when the batched check fails.
+def find_bad_powers(srs, theta):
+    powers, theta = _prepare(srs, theta)
+    bad = []
+    _bisect(powers, theta, 0, len(powers) - 1, bad)
+    return bad
+
+
+if __name__ == "__main__":
+    import random
+    import time
+    from py_ecc.bn128 import G2, multiply, curve_order
+
+    # e(Theta, Omega_i) == e(G_2, Omega_{i+1}), one pairing check per i as in `01_Trusted_Setup.md`
+    def naive_verify_srs(srs, theta):
+        powers = [to_optimized(pt) for pt in reversed(srs)]
+        theta = to_optimized(theta, g2=True)
+        return all(optimized_bn128.pairing(theta, powers[i]) == optimized_bn128.pairing(optimized_bn128.G2, powers[i + 1])
+                   for i in range(len(powers) - 1))
+
+    degree = 8
+    tau = random.randrange(1, curve_order)
+    srs = [multiply(G1, pow(tau, i, curve_order)) for i in range(degree, -1, -1)]
+    theta = multiply(G2, tau)
+
+    start = time.perf_counter()
+    assert naive_verify_srs(srs, theta)
+    naive_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    assert verify_srs(srs, theta)
+    batch_time = time.perf_counter() - start
+    print(f"degree {degree} SRS: {2 * degree} pairings {naive_time:.2f}s, batched {batch_time:.2f}s")
+
+    # A wrong tau in Theta breaks every link
+    assert not verify_srs(srs, multiply(G2, tau + 1))
+
+    # Replace Omega_5 with tau^5 + 1: the links 4 -> 5 and 5 -> 6 break
+    bad_srs = list(srs)
+    bad_srs[degree - 5] = multiply(G1, pow(tau, 5, curve_order) + 1)
+    assert not verify_srs(bad_srs, theta)
+    assert find_bad_powers(bad_srs, theta) == [4, 5]
+    assert find_bad_powers(srs, theta) == []
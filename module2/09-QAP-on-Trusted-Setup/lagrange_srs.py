@@ -0,0 +1,148 @@
+# *** Lagrange-basis SRS: committing to a QAP straight from evaluation form ***
+# `01_Evaluating_QAP_on_TS.md` evaluates sum_i a_i u_i(tau) on the monomial SRS [tau^(n-1) G1, ..., tau G1, G1].
+# That needs the coefficients of every u_i(x), so the columns of L, R and O are interpolated first
+# (`galois.lagrange_poly` in `07-R1CS-to-QAP-FF/example.py`).
+#
+# The witness-weighted sum doesn't need the individual u_i(x) at all. On a domain {x_0, ..., x_(n-1)}:
+#   sum_i a_i u_i(x) = sum_j (L a)_j * L_j(x)
+# where L_j(x) is the Lagrange polynomial that is 1 at x_j and 0 at the other domain points. So if the SRS holds
+# [L_0(tau) G1, ..., L_(n-1)(tau) G1] instead of powers of tau, the commitment is ONE MSM of the R1CS row values
+# (L a) against it: no interpolation, no polynomial coefficients.
+#
+# *** From the monomial SRS, without tau ***
+# Use the n-th roots of unity {1, w, ..., w^(n-1)} as the domain (`07-R1CS-to-QAP-FF/ntt.py`). There
+#   L_j(x) = (1 / n) * sum_k w^(-jk) x^k
+# so L_j(tau) G1 = (1 / n) * sum_k w^(-jk) (tau^k G1): the inverse NTT of the monomial SRS, computed "in the
+# exponent". The butterflies are the same as in `ntt.py`, with point additions instead of field additions and scalar
+# multiplications by the twiddle factors instead of field multiplications. That is O(n log n) butterflies, but each
+# twiddle is a full 254-bit scalar multiplication (~254 doublings and ~127 additions, skipped only for the twiddle 1),
+# so the cost is O(n log n) scalar multiplications, plus n more for the final 1 / n: roughly 380 n log n group
+# operations, not n log n. It still avoids interpolating every column of the R1CS, and it is done once per SRS. The
+# points stay `optimized_bn128` projective points and are normalized together at the end
+# (`08-Trusted-Setup/srs_generate.py`).
+#
+# Note the domain: the QAP here is interpolated over the roots of unity, not over x = [1, ..., n] as in `qap.py`, and
+# the R1CS is padded with zero rows up to the next power of two.
+#
+# Usage:
+#   from lagrange_srs import lagrange_srs, commit_evaluations, commit_witness_polynomials
+#   srs_lagrange = lagrange_srs(srs, n)                           # srs = [tau^d G1, ..., G1] with d >= n - 1
+#   commit_evaluations(srs_lagrange, values)                      # [p(tau)] G1 for p with p(w^j) = values[j]
+#   U_tau, V_tau, W_tau = commit_witness_polynomials(srs_lagrange, r1cs, witness)
+import os
+import sys
+
+from py_ecc import optimized_bn128
+from py_ecc.bn128 import curve_order
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(here, "..", "07-R1CS-to-QAP-FF"))
+sys.path.append(os.path.join(here, "..", "08-Trusted-Setup"))
+from ntt import root_of_unity, bit_reverse
+from msm import msm, to_optimized, is_g2
+from srs_generate import batch_normalize
+
+
+# The same iterative radix-2 butterflies as `ntt.ntt`, on group elements.
+def ntt_in_exponent(points, omega, zero):
+    n = len(points)
+    a = bit_reverse(points)
+    length = 2
+    while length <= n:
+        w_len = pow(omega, n // length, curve_order)
+        half = length // 2
+        twiddles = [1] * half
+        for k in range(1, half):
+            twiddles[k] = (twiddles[k - 1] * w_len) % curve_order
+        for start in range(0, n, length):
+            for k in range(half):
+                u = a[start + k]
+                v = a[start + k + half]
+                if twiddles[k] != 1:
+                    v = optimized_bn128.multiply(v, twiddles[k])
+                a[start + k] = optimized_bn128.add(u, v)
+                a[start + k + half] = optimized_bn128.add(u, optimized_bn128.neg(v))
+        length <<= 1
+    return a
+
+
+# [L_0(tau) G, ..., L_(n-1)(tau) G] for the n-th roots of unity, from a descending monomial SRS (G1 or G2).
+def lagrange_srs(srs, n):
+    if len(srs) < n:
+        raise ValueError(f"an SRS with {len(srs)} points only supports a domain of size up to {len(srs)}")
+    g2 = is_g2(srs[-1])
+    zero = optimized_bn128.Z2 if g2 else optimized_bn128.Z1
+    ascending = [to_optimized(pt, g2) for pt in srs[::-1][:n]]     # [G, tau G, ..., tau^(n-1) G]
+    omega_inv = pow(root_of_unity(n), -1, curve_order)
+    n_inv = pow(n, -1, curve_order)
+    points = ntt_in_exponent(ascending, omega_inv, zero)
+    return batch_normalize([optimized_bn128.multiply(pt, n_inv) for pt in points])
+
+
+# [p(tau)] G where p is the polynomial with p(w^j) = values[j] (missing values are 0).
+def commit_evaluations(srs_lagrange, values):
+    values = [int(v) for v in values]
+    if len(values) > len(srs_lagrange):
+        raise ValueError(f"{len(values)} values don't fit a domain of size {len(srs_lagrange)}")
+    return msm(srs_lagrange[:len(values)], values)
+
+
+# [sum_i a_i u_i(tau)], [sum_i a_i v_i(tau)], [sum_i a_i w_i(tau)] for a `SparseR1CS` (`sparse_r1cs.py`) over the
+# BN128 scalar field: three sparse matrix-vector products and three MSMs. Pass `srs_lagrange_g2` to get the v term
+# in G2, as needed for [B]_2.
+def commit_witness_polynomials(srs_lagrange, r1cs, witness, srs_lagrange_g2=None):
+    Lw, Rw, Ow = r1cs.witness_products(witness)
+    return (commit_evaluations(srs_lagrange, Lw),
+            commit_evaluations(srs_lagrange_g2 if srs_lagrange_g2 is not None else srs_lagrange, Rw),
+            commit_evaluations(srs_lagrange, Ow))
+
+
+if __name__ == "__main__":
+    import random
+    import time
+    import numpy as np
+    from py_ecc.bn128 import G1, multiply, eq
+    from ntt import Domain, intt
+    from sparse_r1cs import SparseR1CS
+    from srs_generate import generate_srs, powers_of_tau
+
+    tau = random.randrange(1, curve_order)
+    n = 8
+    srs, srs_g2 = generate_srs(tau, n - 1)
+
+    # L_j(tau) G1, checked against the scalars computed with tau
+    start = time.perf_counter()
+    srs_lagrange = lagrange_srs(srs, n)
+    print(f"Lagrange SRS of size {n} from the monomial SRS in {time.perf_counter() - start:.3f}s")
+    expected = intt(powers_of_tau(tau, n), root_of_unity(n))
+    assert all(eq(pt, multiply(G1, scalar)) for pt, scalar in zip(srs_lagrange, expected))
+    srs_lagrange_g2 = lagrange_srs(srs_g2, n)
+
+    # The R1CS from `07-R1CS-to-QAP-FF/example.py` over the BN128 scalar field, padded to n = 8 rows
+    L = np.array([[0, 0, 1, 0, 0, 0, 0], [0, 0, 0, 0, 1, 0, 0], [0, 0, 0, -5, 0, 0, 0], [0, 0, 0, 0, 0, 0, 1]])
+    R = np.array([[0, 0, 1, 0, 0, 0, 0], [0, 0, 0, 0, 1, 0, 0], [0, 0, 0, 1, 0, 0, 0], [0, 0, 0, 0, 1, 0, 0]])
+    O = np.array([[0, 0, 0, 0, 1, 0, 0], [0, 0, 0, 0, 0, 1, 0], [0, 0, 0, 0, 0, 0, 1], [0, 1, 0, 0, 0, -1, 0]])
+    L, R, O = (np.vstack([M, np.zeros((n - len(M), M.shape[1]), dtype=M.dtype)]) for M in (L, R, O))
+    r1cs = SparseR1CS.from_dense(L, R, O, curve_order)
+    x, y = 4, curve_order - 2
+    v1 = x * x % curve_order
+    v2 = v1 * v1 % curve_order
+    v3 = -5 * y * y % curve_order
+    witness = [1, (v3 * v1 + v2) % curve_order, x, y, v1, v2, v3]
+    assert r1cs.is_satisfied(witness)
+
+    # Evaluation form: one MSM per polynomial
+    start = time.perf_counter()
+    U_tau, V_tau, W_tau = commit_witness_polynomials(srs_lagrange, r1cs, witness, srs_lagrange_g2)
+    lagrange_time = time.perf_counter() - start
+
+    # Coefficient form: interpolate (inverse NTT) first, then the MSM against the monomial SRS
+    domain = Domain(n)
+    start = time.perf_counter()
+    Lw, Rw, Ow = r1cs.witness_products(witness)
+    coefficients = [domain.interpolate(values)[::-1] for values in (Lw, Rw, Ow)]  # descending, like the SRS
+    expected = (msm(srs, coefficients[0]), msm(srs_g2, coefficients[1]), msm(srs, coefficients[2]))
+    monomial_time = time.perf_counter() - start
+
+    assert all(eq(a, b) for a, b in zip((U_tau, V_tau, W_tau), expected))
+    print(f"committing u, v, w: Lagrange SRS {lagrange_time:.3f}s, interpolate + monomial SRS {monomial_time:.3f}s")
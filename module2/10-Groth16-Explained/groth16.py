@@ -0,0 +1,289 @@
+# *** Groth16, end to end ***
+# A runnable version of "Groth16 Proof Algorithm, End-to-End" in `01_Groth16.md`, on top of the pieces built in the
+# earlier chapters:
+#   - `07-R1CS-to-QAP-FF/qap.py`          R1CS -> QAP (U, V, W coefficient matrices) over x = [1, ..., n]
+#   - `07-R1CS-to-QAP-FF/sparse_r1cs.py`  checking the witness against L, R, O
+#   - `08-Trusted-Setup/msm.py`           every sum of scalar * point is a single multi-scalar multiplication
+#   - `01-bilinear-pairings/pairing_product.py`  the verifier's 4 pairings with one final exponentiation
+#
+# Witness layout: a = [1, public outputs/inputs ..., private ...]. The first `num_public` entries (including the
+# constant 1) are public: the md's a_1, ..., a_l. Everything is indexed from 0 here.
+#
+# All polynomial coefficients are in DESCENDING order, matching the SRS [tau^(n-1) G, ..., tau G, G], so every
+# commitment is msm(srs, coefficients).
+#
+# *** Stages and timing hooks ***
+# `setup`, `prove` and `verify` take an optional `on_stage(stage, seconds)` callback, called after each stage:
+#   setup:  "qap", "setup scalars", "setup points"
+#   prove:  "witness check", "qap", "h(x)", "msm"
+#   verify: "public input msm", "pairing check"
+# `StageTimings` is such a callback that collects the times. Under `ec_profile.profile()` (module1), the py_ecc
+# operations are also counted per stage and group:
+#   with profile() as prof:
+#       proof = prove(pk, witness)
+#   print(prof.report())
+#
+# Usage:
+#   from groth16 import setup, prove, verify, StageTimings
+#   pk, vk = setup(L, R, O, num_public, GF)
+#   timings = StageTimings()
+#   proof = prove(pk, witness, on_stage=timings)        # proof.A (G1), proof.B (G2), proof.C (G1)
+#   verify(vk, proof, witness[:num_public])
+#   print(timings.report())
+#
+# `setup` and `prove` also take a `concurrent.futures.ProcessPoolExecutor`, to run the column interpolation and the MSMs
+# on several cores (`08-Trusted-Setup/parallel.py`), and `setup` a `qap_cache.QAPCache`, so that setting up the same
+# circuit again skips the interpolation (`07-R1CS-to-QAP-FF/qap_cache.py`). `setup(..., backend="limbs")` interpolates
+# on the numba limb kernels of `07-R1CS-to-QAP-FF/fr_limbs.py` instead of galois (see `qap.r1cs_to_qap`).
+import os
+import secrets
+import sys
+import time
+from contextlib import contextmanager
+from functools import partial
+
+import galois
+import numpy as np
+from py_ecc.bn128 import G1, G2, curve_order, neg
+
+here = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(here, "..", "07-R1CS-to-QAP-FF"))
+sys.path.append(os.path.join(here, "..", "08-Trusted-Setup"))
+sys.path.append(os.path.join(here, "..", "01-bilinear-pairings"))
+sys.path.append(os.path.join(here, "..", "..", "module1", "09-elliptic-curves-over-finite-fields"))
+from qap import r1cs_to_qap, vanishing_polynomial, to_field
+from sparse_r1cs import SparseR1CS
+from qap_cache import QAPCache
+from msm import msm
+from parallel import parallel_msm, parallel_r1cs_to_qap
+from fixed_base import fixed_base_multiply
+from ec_profile import profile, stage as profile_stage
+from pairing_product import pairing_check
+
+
+class StageTimings:
+    def __init__(self):
+        self.timings = {}
+
+    def __call__(self, stage, seconds):
+        self.timings[stage] = self.timings.get(stage, 0.0) + seconds
+
+    def report(self):
+        total = sum(self.timings.values())
+        return "\n".join(f"{stage:>18}: {seconds:8.3f}s  {100 * seconds / total if total else 0:5.1f}%"
+                         for stage, seconds in self.timings.items())
+
+
+# Also labels the py_ecc calls of the stage for `ec_profile.profile()`
+@contextmanager
+def _stage(name, on_stage):
+    start = time.perf_counter()
+    with profile_stage(name):
+        yield
+    if on_stage is not None:
+        on_stage(name, time.perf_counter() - start)
+
+
+class ProvingKey:
+    def __init__(self, r1cs, GF, U, V, W, t, num_public, alpha_1, beta_1, beta_2, delta_1, delta_2,
+                 srs_g1, srs_g2, srs_ht, psi_private):
+        self.r1cs = r1cs
+        self.GF = GF
+        self.U, self.V, self.W = U, V, W
+        self.t = t
+        self.num_public = num_public
+        self.alpha_1 = alpha_1
+        self.beta_1, self.beta_2 = beta_1, beta_2
+        self.delta_1, self.delta_2 = delta_1, delta_2
+        self.srs_g1 = srs_g1        # [tau^(n-1) G1, ..., G1]
+        self.srs_g2 = srs_g2        # [tau^(n-1) G2, ..., G2]
+        self.srs_ht = srs_ht        # [tau^(n-2) t(tau) / delta G1, ..., t(tau) / delta G1]
+        self.psi_private = psi_private
+
+
+class VerifyingKey:
+    def __init__(self, alpha_1, beta_2, gamma_2, delta_2, psi_public):
+        self.alpha_1 = alpha_1
+        self.beta_2 = beta_2
+        self.gamma_2 = gamma_2
+        self.delta_2 = delta_2
+        self.psi_public = psi_public
+
+
+class Proof:
+    def __init__(self, A, B, C):
+        self.A = A
+        self.B = B
+        self.C = C
+
+
+# Toxic waste and blinding factors must be unpredictable: `secrets`, not the Mersenne Twister behind `random`
+def _random_scalar():
+    return secrets.randbelow(curve_order - 1) + 1
+
+
+# *** Trusted setup ***
+# `toxic` can fix (tau, alpha, beta, gamma, delta) for reproducible examples; they are random otherwise.
+def setup(L, R, O, num_public, GF, toxic=None, on_stage=None, executor=None, qap_cache=None, backend="galois"):
+    with _stage("qap", on_stage):
+        r1cs = SparseR1CS.from_dense(L, R, O, GF.order)
+        n = r1cs.num_constraints
+        if qap_cache is not None:
+            qap = qap_cache.get(L, R, O, GF)
+            U, V, W, t = qap.U, qap.V, qap.W, qap.t
+        else:
+            if executor is None or backend != "galois":
+                U, V, W = r1cs_to_qap(L, R, O, GF, backend)
+            else:
+                U, V, W = parallel_r1cs_to_qap(L, R, O, GF, executor=executor)
+            t = vanishing_polynomial(GF, n)
+
+    with _stage("setup scalars", on_stage):
+        tau, alpha, beta, gamma, delta = (GF(v % GF.order) for v in (toxic or [_random_scalar() for _ in range(5)]))
+        powers = tau ** np.arange(n - 1, -1, -1)                 # [tau^(n-1), ..., tau, 1]
+        u_tau, v_tau, w_tau = U @ powers, V @ powers, W @ powers
+        psi = beta * u_tau + alpha * v_tau + w_tau
+        psi_public = psi[:num_public] / gamma
+        psi_private = psi[num_public:] / delta
+        ht = powers[1:] * t(tau) / delta                         # [tau^(n-2) t(tau) / delta, ..., t(tau) / delta]
+
+    with _stage("setup points", on_stage):
+        def g1(scalars):
+            return [fixed_base_multiply(G1, int(s)) for s in scalars]
+
+        def g2(scalars):
+            return [fixed_base_multiply(G2, int(s)) for s in scalars]
+
+        alpha_1, beta_1, delta_1 = g1([alpha, beta, delta])
+        beta_2, gamma_2, delta_2 = g2([beta, gamma, delta])
+        pk = ProvingKey(r1cs, GF, U, V, W, t, num_public, alpha_1, beta_1, beta_2, delta_1, delta_2,
+                        g1(powers), g2(powers), g1(ht), g1(psi_private))
+        vk = VerifyingKey(alpha_1, beta_2, gamma_2, delta_2, g1(psi_public))
+    return pk, vk
+
+
+# *** Prover ***
+# [A]_1 = [alpha]_1 + sum a_i u_i(tau) + r [delta]_1
+# [B]_2 = [beta]_2  + sum a_i v_i(tau) + s [delta]_2     ([B]_1 likewise, only needed for [C]_1)
+# [C]_1 = sum_{private} a_i [Psi_i]_1 + h(tau) t(tau) / delta + s [A]_1 + r [B]_1 - rs [delta]_1
+def prove(pk, witness, r=None, s=None, on_stage=None, executor=None):
+    GF = pk.GF
+    msm_fn = msm if executor is None else partial(parallel_msm, executor=executor)
+
+    with _stage("witness check", on_stage):
+        witness = [int(v) for v in witness]
+        if not pk.r1cs.is_satisfied(witness):
+            raise ValueError("the witness does not satisfy the R1CS")
+        a = to_field(witness, GF)
+
+    # sum_i a_i u_i(x) is the witness vector times the coefficient matrix
+    with _stage("qap", on_stage):
+        u, v, w = a @ pk.U, a @ pk.V, a @ pk.W
+
+    with _stage("h(x)", on_stage):
+        h, remainder = divmod(galois.Poly(u) * galois.Poly(v) - galois.Poly(w), pk.t)
+        if remainder != 0:
+            raise ValueError("t(x) does not divide u(x)v(x) - w(x)")
+        h = h.coeffs
+        h = np.concatenate([GF.Zeros(len(pk.srs_ht) - len(h)), h])
+
+    with _stage("msm", on_stage):
+        r = _random_scalar() if r is None else r
+        s = _random_scalar() if s is None else s
+        A = msm_fn([pk.alpha_1] + pk.srs_g1 + [pk.delta_1], [1] + [int(c) for c in u] + [r])
+        B2 = msm_fn([pk.beta_2] + pk.srs_g2 + [pk.delta_2], [1] + [int(c) for c in v] + [s])
+        B1 = msm_fn([pk.beta_1] + pk.srs_g1 + [pk.delta_1], [1] + [int(c) for c in v] + [s])
+        private = [int(c) for c in a[pk.num_public:]]
+        C = msm_fn(pk.psi_private + pk.srs_ht + [A, B1, pk.delta_1],
+                private + [int(c) for c in h] + [s, r, -r * s])
+    return Proof(A, B2, C)
+
+
+# *** Verifier ***
+# [X]_1 = sum_{public} a_i [Psi_i]_1
+# [A]_1 . [B]_2 == [alpha]_1 . [beta]_2 + [X]_1 . [gamma]_2 + [C]_1 . [delta]_2, checked as
+# e(-A, B) * e(alpha, beta) * e(X, gamma) * e(C, delta) == 1
+def verify(vk, proof, public_inputs, on_stage=None):
+    if len(public_inputs) != len(vk.psi_public):
+        raise ValueError(f"expected {len(vk.psi_public)} public inputs, got {len(public_inputs)}")
+    with _stage("public input msm", on_stage):
+        X = msm(vk.psi_public, [int(v) for v in public_inputs])
+    with _stage("pairing check", on_stage):
+        return pairing_check([(neg(proof.A), proof.B), (vk.alpha_1, vk.beta_2), (X, vk.gamma_2),
+                              (proof.C, vk.delta_2)])
+
+
+if __name__ == "__main__":
+    GF = galois.GF(curve_order, primitive_element=5, verify=False)
+
+    # The R1CS from `07-R1CS-to-QAP-FF/example.py`, over the BN128 scalar field
+    # a = [1, z, x, y, v1, v2, v3], public: [1, z]
+    L = np.array([[0, 0, 1, 0, 0, 0, 0], [0, 0, 0, 0, 1, 0, 0], [0, 0, 0, -5, 0, 0, 0], [0, 0, 0, 0, 0, 0, 1]])
+    R = np.array([[0, 0, 1, 0, 0, 0, 0], [0, 0, 0, 0, 1, 0, 0], [0, 0, 0, 1, 0, 0, 0], [0, 0, 0, 0, 1, 0, 0]])
+    O = np.array([[0, 0, 0, 0, 1, 0, 0], [0, 0, 0, 0, 0, 1, 0], [0, 0, 0, 0, 0, 0, 1], [0, 1, 0, 0, 0, -1, 0]])
+    x, y = 4, curve_order - 2
+    v1 = x * x % curve_order
+    v2 = v1 * v1 % curve_order
+    v3 = -5 * y * y % curve_order
+    z = (v3 * v1 + v2) % curve_order
+    witness = [1, z, x, y, v1, v2, v3]
+
+    pk, vk = setup(L, R, O, 2, GF)
+    proof = prove(pk, witness)
+    assert verify(vk, proof, witness[:2])
+    assert not verify(vk, proof, [1, z + 1])
+
+    bad_witness = list(witness)
+    bad_witness[6] += 1
+    try:
+        prove(pk, bad_witness)
+        assert False, "proved a wrong witness"
+    except ValueError:
+        pass
+
+    # A second setup of the same circuit takes U, V, W and t(x) from the cache
+    qap_cache = QAPCache()
+    pk, vk = setup(L, R, O, 2, GF, qap_cache=qap_cache)
+    pk, vk = setup(L, R, O, 2, GF, qap_cache=qap_cache)
+    assert (qap_cache.hits, qap_cache.misses) == (1, 1)
+    assert verify(vk, prove(pk, witness), witness[:2])
+
+    # The same QAP from the limb backend
+    pk_limbs, vk_limbs = setup(L, R, O, 2, GF, backend="limbs")
+    assert all((a == b).all() for a, b in zip((pk_limbs.U, pk_limbs.V, pk_limbs.W), (pk.U, pk.V, pk.W)))
+    assert verify(vk_limbs, prove(pk_limbs, witness), witness[:2])
+
+    # py_ecc operations per stage
+    with profile() as prof:
+        assert verify(vk, prove(pk, witness), witness[:2])
+    # `pairing_check` runs its own multi-Miller loop (FQ12 products) and one final exponentiation, no `pairing`
+    assert prof.total("GT", "final_exponentiate")[0] == 1 and prof.total(op="pairing")[0] == 0
+    print(prof.report())
+
+    # *** Where the time goes as the circuit grows ***
+    # A chain of multiplications: constraint i is a[k_i] * a[i + 1] = a[i + 2], with k_i in {0, 1}
+    rng = np.random.default_rng(0)
+    for n in (4, 8, 16, 32):
+        k = rng.integers(0, 2, size=n)
+        witness = [1, 3]
+        for i in range(n):
+            witness.append(witness[k[i]] * witness[i + 1] % curve_order)
+        L, R, O = (np.zeros((n, n + 2), dtype=np.int64) for _ in range(3))
+        L[np.arange(n), k] = 1
+        R[np.arange(n), np.arange(n) + 1] = 1
+        O[np.arange(n), np.arange(n) + 2] = 1
+
+        setup_timings, prove_timings, verify_timings = StageTimings(), StageTimings(), StageTimings()
+        pk, vk = setup(L, R, O, 2, GF, on_stage=setup_timings)
+        proof = prove(pk, witness, on_stage=prove_timings)
+        assert verify(vk, proof, witness[:2], on_stage=verify_timings)
+        print(f"n = {n} constraints, {n + 2} variables")
+        print(prove_timings.report())
+        print(verify_timings.report())
+
+    # Same proof system, MSMs and interpolation spread over a process pool
+    from concurrent.futures import ProcessPoolExecutor
+    with ProcessPoolExecutor(max(2, os.cpu_count() or 1)) as executor:
+        pk, vk = setup(L, R, O, 2, GF, executor=executor)
+        proof = prove(pk, witness, executor=executor)
+        assert verify(vk, proof, witness[:2])